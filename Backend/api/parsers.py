@@ -0,0 +1,21 @@
+"""
+Szybki parser JSON (orjson) dla wszystkich endpointów DRF.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class ORJSONParser(BaseParser):
+    """
+    Parser `application/json` oparty o orjson.
+
+    Jak `JSONParser` z `STRICT_JSON` - wartości NaN / Infinity są odrzucane.
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,48 @@
+"""
+Szybki renderer JSON (orjson) dla wszystkich endpointów DRF.
+
+Tablice i skalary NumPy są serializowane natywnie (`OPT_SERIALIZE_NUMPY`), więc wyniki
+modelu nie wymagają rzutowania na `float`/`int`. Typy nieobsługiwane przez orjson
+(Decimal, leniwe tłumaczenia, tablice NumPy o typie object itp.) trafiają do
+`rest_framework.utils.encoders.JSONEncoder` - wynik jest taki sam jak w `JSONRenderer`.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+_fallback_encoder = JSONEncoder()
+
+
+def default(obj):
+    """Typy spoza orjson - jak w `JSONRenderer` (np. Decimal, lazy str, tablice object)."""
+    return _fallback_encoder.default(obj)
+
+
+def dumps(data, indent=False):
+    """Serializuje dane do JSON (bytes) tak samo jak `ORJSONRenderer`."""
+    options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    return orjson.dumps(data, default=default, option=options)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renderer `application/json` oparty o orjson.
+
+    Wcięcie (`indent` w nagłówku Accept lub w kontekście, np. z BrowsableAPIRenderer)
+    jest zawsze 2 spacje - jedyne obsługiwane przez orjson.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data, indent=self.get_indent(accepted_media_type or '', renderer_context or {}))
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        if 'indent=' in accepted_media_type:
+            return True
+        return bool(renderer_context.get('indent'))
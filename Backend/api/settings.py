@@ -58,6 +58,16 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON przez orjson (tablice i skalary NumPy serializowane natywnie)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
@@ -66,6 +76,57 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Klasyfikacja stresu - format modelu (auto/eager/torchscript/quantized/onnx), wątki
+# ONNX Runtime (0 = liczba rdzeni) i wspólne batche dla równoległych żądań (mikro-batching)
+STRESS_CLASSIFICATION = {
+    'MODEL_FORMAT': os.getenv('STRESS_MODEL_FORMAT', 'auto'),
+    'ONNX_INTRA_OP_THREADS': int(os.getenv('STRESS_ONNX_INTRA_OP_THREADS', '0')),
+    'BATCHING': os.getenv('STRESS_INFERENCE_BATCHING', 'True') == 'True',
+    'MAX_BATCH_SIZE': int(os.getenv('STRESS_INFERENCE_MAX_BATCH_SIZE', '256')),
+    'MAX_WAIT_MS': float(os.getenv('STRESS_INFERENCE_MAX_WAIT_MS', '2')),
+    # Serwer inferencji (run_inference_server) - pusty INFERENCE_SOCKET = model w każdym workerze WWW;
+    # 0 procesów / wątków = podział automatyczny według liczby rdzeni
+    'INFERENCE_SOCKET': os.getenv('STRESS_INFERENCE_SOCKET', ''),
+    'INFERENCE_WORKERS': int(os.getenv('STRESS_INFERENCE_WORKERS', '0')),
+    'INFERENCE_THREADS_PER_WORKER': int(os.getenv('STRESS_INFERENCE_THREADS_PER_WORKER', '0')),
+    # Maksymalny czas oczekiwania workera WWW na odpowiedź serwera inferencji (s)
+    'INFERENCE_TIMEOUT_SEC': float(os.getenv('STRESS_INFERENCE_TIMEOUT_SEC', '60')),
+    # Cache wyników klasyfikacji - liczba wpisów w pamięci (0 = wyłączony), opcjonalny katalog na dysku
+    # z limitem rozmiaru i TTL w sekundach (0 = bez wygasania)
+    'RESULT_CACHE_SIZE': int(os.getenv('STRESS_RESULT_CACHE_SIZE', '32')),
+    'RESULT_CACHE_DIR': os.getenv('STRESS_RESULT_CACHE_DIR', ''),
+    'RESULT_CACHE_DISK_MAX_MB': int(os.getenv('STRESS_RESULT_CACHE_DISK_MAX_MB', '512')),
+    'RESULT_CACHE_TTL_SEC': int(os.getenv('STRESS_RESULT_CACHE_TTL_SEC', '0')),
+    # Długość kawałka nagrania (s) w blokowym przetwarzaniu classify - ogranicza pamięć pośrednią
+    'CHUNK_SEC': int(os.getenv('STRESS_CHUNK_SEC', '600')),
+    # Wspólne obliczenia CNN dla nakładających się okien: off / exact (wynik jak okno po oknie) /
+    # shared (przybliżony, najszybszy) - zob. stress_classification/overlap_inference.py
+    'OVERLAP_INFERENCE': os.getenv('STRESS_OVERLAP_INFERENCE', 'off'),
+    # Normalizacja Z-Score wbudowana w pierwszą konwolucję przy ładowaniu modelu (eager / quantized
+    # kwantyzowany w locie) lub przy eksporcie TorchScript - predykcja bez osobnego przebiegu normalizacji
+    'FOLD_NORMALIZATION': os.getenv('STRESS_FOLD_NORMALIZATION', 'True') == 'True',
+    # Pomiary etapów classify (czas, liczniki okien i batchy) w logu i w /api/stress-classification/stats/:
+    # off (tylko żądania z ?timings=true) / timings (każda klasyfikacja) / memory (także szczytowa
+    # pamięć etapów - tracemalloc, wyraźny narzut) - zob. stress_classification/instrumentation.py
+    'INSTRUMENTATION': os.getenv('STRESS_INSTRUMENTATION', 'off'),
+    # Sesje strumieniowe (/api/stress-classification/streams/) - limit aktywnych sesji w procesie
+    # i czasu nagrania (s) zbuforowanego w jednej sesji w oczekiwaniu na pozostałe kanały
+    'STREAMING_MAX_SESSIONS': int(os.getenv('STRESS_STREAMING_MAX_SESSIONS', '100')),
+    'STREAMING_MAX_BUFFERED_SEC': int(os.getenv('STRESS_STREAMING_MAX_BUFFERED_SEC', '3600')),
+    # Maksymalny rozmiar żądania binarnej klasyfikacji (/api/stress-classification/binary/) w MB
+    'MAX_UPLOAD_MB': int(os.getenv('STRESS_MAX_UPLOAD_MB', '64')),
+    # Zadania w tle (/api/stress-classification/jobs/) - procesy puli na worker WWW (0 = jeden na dwa rdzenie),
+    # limit aktywnych zadań na użytkownika, maksymalny czas long-pollingu i czas bez postępu (trwające)
+    # lub bez odświeżenia przez pulę (oczekujące), po którym zadanie jest uznawane za przerwane
+    'JOB_WORKERS': int(os.getenv('STRESS_JOB_WORKERS', '0')),
+    'JOB_MAX_ACTIVE_PER_USER': int(os.getenv('STRESS_JOB_MAX_ACTIVE_PER_USER', '2')),
+    'JOB_LONG_POLL_MAX_SEC': int(os.getenv('STRESS_JOB_LONG_POLL_MAX_SEC', '30')),
+    'JOB_STALE_SEC': int(os.getenv('STRESS_JOB_STALE_SEC', '600')),
+    # Maksymalna długość symulacji wizyty w żądaniu HTTP i w zadaniu w tle (s)
+    'SIMULATION_MAX_DURATION_SEC': int(os.getenv('STRESS_SIMULATION_MAX_DURATION_SEC', '3600')),
+    'JOB_SIMULATION_MAX_DURATION_SEC': int(os.getenv('STRESS_JOB_SIMULATION_MAX_DURATION_SEC', '86400')),
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Hackathon API',
     'DESCRIPTION': 'Hackathon API',
@@ -16,6 +16,33 @@ python manage.py migrate security --noinput
 python manage.py migrate patient_management --noinput
 python manage.py migrate --noinput
 
+# Export optimized model artifacts (skipped if already up to date)
+python manage.py export_stress_model --if-stale
+case "${STRESS_MODEL_FORMAT:-auto}" in
+    quantized|onnx) python manage.py export_stress_model --format "$STRESS_MODEL_FORMAT" --if-stale ;;
+esac
+
+# Start local inference server (model loaded once per inference process, shared by all gunicorn workers)
+if [ -n "$STRESS_INFERENCE_SOCKET" ]; then
+    echo "Starting inference server..."
+    python manage.py run_inference_server &
+    inference_pid=$!
+    deadline=$((SECONDS + ${STRESS_INFERENCE_STARTUP_TIMEOUT_SEC:-120}))
+    while [ ! -S "$STRESS_INFERENCE_SOCKET" ]; do
+        if ! kill -0 "$inference_pid" 2>/dev/null; then
+            echo "Inference server exited before creating $STRESS_INFERENCE_SOCKET" >&2
+            exit 1
+        fi
+        if [ "$SECONDS" -ge "$deadline" ]; then
+            echo "Inference server did not create $STRESS_INFERENCE_SOCKET within ${STRESS_INFERENCE_STARTUP_TIMEOUT_SEC:-120} s" >&2
+            kill "$inference_pid" 2>/dev/null || true
+            exit 1
+        fi
+        sleep 0.5
+    done
+fi
+
 # Start server
+# Wątki (gthread) pozwalają łączyć okna z równoległych żądań we wspólne batche modelu
 echo "Starting server..."
-exec gunicorn api.wsgi:application -b 0.0.0.0:6543
\ No newline at end of file
+exec gunicorn api.wsgi:application -b 0.0.0.0:6543 --worker-class gthread --threads ${GUNICORN_THREADS:-8}
\ No newline at end of file
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Patient, Visit
 
@@ -18,6 +19,19 @@ class PatientSerializer(serializers.ModelSerializer):
 
 class VisitSimulationInputSerializer(serializers.Serializer):
     """Serializer dla danych wejściowych do symulacji tworzącej wizytę"""
-    duration_sec = serializers.IntegerField(min_value=1, required=False, default=300, help_text="Długość symulacji w sekundach (domyślnie 300)")
+    duration_sec = serializers.IntegerField(
+        min_value=1, max_value=settings.STRESS_CLASSIFICATION['SIMULATION_MAX_DURATION_SEC'],
+        required=False, default=300,
+        help_text="Długość symulacji w sekundach (domyślnie 300; dłuższe symulacje - zadanie w tle)"
+    )
     # opcjonalnie można podać datę wizyty w ISO lub zostanie użyta teraz
     visit_date = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class VisitSimulationJobInputSerializer(VisitSimulationInputSerializer):
+    """Serializer dla symulacji wizyty wykonywanej w tle (wyższy limit długości)"""
+    duration_sec = serializers.IntegerField(
+        min_value=1, max_value=settings.STRESS_CLASSIFICATION['JOB_SIMULATION_MAX_DURATION_SEC'],
+        required=False, default=300,
+        help_text="Długość symulacji w sekundach (domyślnie 300)"
+    )
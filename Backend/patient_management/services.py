@@ -2,21 +2,32 @@
 Serwisy do symulacji sesji i analizy AI
 """
 import os
-from typing import List, Dict, Any, Tuple
+from datetime import datetime
+from typing import List, Dict, Any, Tuple, Callable, Optional
 from openai import OpenAI
 import numpy as np
+from django.db import transaction
+from django.utils import timezone
 from stress_classification.data_simulator import generate_simulated_data
 from stress_classification.views import get_stress_service
+from .models import Patient, Visit
+
+
+# Poziom stresu punktu timeline (skala 1-10) dla klas: Baseline, Stress, Amusement, Meditation
+TIMELINE_CLASS_NAMES = ['Baseline', 'Stress', 'Amusement', 'Meditation']
+TIMELINE_STRESS_LEVELS = np.array([2, 3, 1, 1], dtype=np.int64)
 
 
 def create_session_simulation(
-    duration_sec: int = 300
+    duration_sec: int = 300,
+    progress: Optional[Callable[[float], None]] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Generuje symulowane dane sesji używając generate_simulated_data i klasyfikacji stresu.
     
     Args:
         duration_sec: Długość symulacji w sekundach (domyślnie 300)
+        progress: Opcjonalny callback postępu (0.0-1.0) - zadania w tle
     
     Returns:
         Tuple zawierający:
@@ -25,48 +36,35 @@ def create_session_simulation(
     """
     # Generuj symulowane dane biometryczne
     acc, bvp, eda, temp = generate_simulated_data(duration_sec=duration_sec)
+    if progress is not None:
+        progress(0.2)
     
-    # Użyj serwisu klasyfikacji stresu do analizy danych
+    # Użyj serwisu klasyfikacji stresu do analizy danych (segmenty jako kolumny - bez obiektów)
     stress_service = get_stress_service()
-    classification_result = stress_service.classify(acc, bvp, eda, temp)
-    
-    # Przetwórz wyniki klasyfikacji na format timeline_data
-    timeline = []
-    segments = classification_result.get('segments', [])
-    
-    # Mapowanie klas na nazwy
-    class_names = ['Baseline', 'Stress', 'Amusement', 'Meditation']
+    classification_result = stress_service.classify(
+        acc, bvp, eda, temp, columnar=True,
+        progress=(lambda fraction: progress(0.2 + 0.7 * fraction)) if progress is not None else None
+    )
     
     # Pobierz step_size z metadanych klasyfikacji
     metadata_classification = classification_result.get('metadata', {})
     step_size = metadata_classification.get('step_size_seconds', 10.0)  # Domyślnie 10.0 (STEP_SEC)
     
     # Przetwórz segmenty na timeline
-    for segment in segments:
-        timestamp = segment.get('time_seconds', 0)  # Użyj time_seconds z segmentu
-        class_id = segment.get('class_id', 0)  # Użyj class_id zamiast predicted_class
-        feeling = class_names[class_id] if class_id < len(class_names) else 'Baseline'
-        
-        # Użyj stress_level z segmentu jeśli dostępny, w przeciwnym razie oblicz
-        stress_level = segment.get('stress_level', 2)
-        if stress_level == 0:
-            # Mapuj stress_level na skalę 1-10
-            if feeling == 'Baseline':
-                stress_level = 2
-            elif feeling == 'Stress':
-                stress_level = 8
-            elif feeling == 'Amusement':
-                stress_level = 1
-            elif feeling == 'Meditation':
-                stress_level = 1
-            else:
-                stress_level = 2
-        
-        timeline.append({
-            "timestamp_seconds": int(timestamp),
+    segments = classification_result['segments']
+    class_ids = np.asarray(segments['class_id'], dtype=np.int64)
+    # Listy Pythona - timeline trafia do JSONField w bazie (serializacja biblioteką json)
+    timeline = [
+        {
+            "timestamp_seconds": timestamp,
             "stress_level": stress_level,
-            "feeling": feeling
-        })
+            "feeling": TIMELINE_CLASS_NAMES[class_id]
+        }
+        for timestamp, stress_level, class_id in zip(
+            np.asarray(segments['time_seconds']).tolist(), TIMELINE_STRESS_LEVELS[class_ids].tolist(),
+            class_ids.tolist()
+        )
+    ]
     
     # Oblicz procenty stanów na podstawie rzeczywistych danych
     total_points = len(timeline)
@@ -76,15 +74,10 @@ def create_session_simulation(
         amusement_percentage = 0.0
         meditation_percentage = 0.0
     else:
-        baseline_count = sum(1 for point in timeline if point['feeling'] == 'Baseline')
-        stress_count = sum(1 for point in timeline if point['feeling'] == 'Stress')
-        amusement_count = sum(1 for point in timeline if point['feeling'] == 'Amusement')
-        meditation_count = sum(1 for point in timeline if point['feeling'] == 'Meditation')
-        
-        baseline_percentage = (baseline_count / total_points) * 100.0
-        stress_percentage = (stress_count / total_points) * 100.0
-        amusement_percentage = (amusement_count / total_points) * 100.0
-        meditation_percentage = (meditation_count / total_points) * 100.0
+        counts = np.bincount(class_ids, minlength=len(TIMELINE_CLASS_NAMES)).tolist()
+        baseline_percentage, stress_percentage, amusement_percentage, meditation_percentage = (
+            (count / total_points) * 100.0 for count in counts
+        )
     
     # Przygotuj metadata
     metadata = {
@@ -99,6 +92,75 @@ def create_session_simulation(
     return timeline, metadata
 
 
+def create_simulated_visit(
+    patient: Patient,
+    duration_sec: int = 300,
+    visit_date: Optional[datetime] = None,
+    progress: Optional[Callable[[float], None]] = None
+) -> Tuple[Visit, List[Dict[str, Any]]]:
+    """
+    Tworzy wizytę pacjenta z symulowaną sesją (create_session_simulation) i zwraca ją wraz z timeline.
+    """
+    timeline_data, metadata = create_session_simulation(duration_sec=duration_sec, progress=progress)
+    
+    with transaction.atomic():
+        visit = Visit.objects.create(
+            patient=patient,
+            visit_date=visit_date or timezone.now(),
+            step_size=metadata['step_size'],
+            total_duration_seconds=metadata['total_duration_seconds'],
+            baseline_percentage=metadata['baseline_percentage'],
+            stress_percentage=metadata['stress_percentage'],
+            amusement_percentage=metadata['amusement_percentage'],
+            meditation_percentage=metadata['meditation_percentage'],
+            timeline_data=timeline_data
+        )
+        if progress is not None:
+            # Zadanie w tle anulowane w trakcie symulacji - wyjątek z callbacku wycofuje utworzenie wizyty
+            progress(1.0)
+    return visit, timeline_data
+
+
+def run_simulation_job(params: Dict[str, Any], inputs: Any, progress: Callable[[float], None]) -> Dict[str, Any]:
+    """
+    Obsługa zadania w tle symulacji wizyty (stress_classification.jobs) - wynik jak
+    w POST /api/visits/patient/{patient_id}/simulate/.
+    """
+    from .serializers import VisitSerializer
+    
+    try:
+        patient = Patient.objects.get(pk=params['patient_id'])
+    except Patient.DoesNotExist:
+        raise ValueError(f"Patient o ID {params['patient_id']} nie istnieje")
+    
+    visit_date = datetime.fromisoformat(params['visit_date']) if params.get('visit_date') else None
+    visit, timeline_data = create_simulated_visit(
+        patient, params['duration_sec'], visit_date, progress=progress.scaled(0.0, 0.95)
+    )
+    visit_data = VisitSerializer(visit).data
+    if params.get('columnar'):
+        visit_data.pop('timeline_data', None)
+        return {"visit": visit_data, "timeline": timeline_to_columns(timeline_data)}
+    return {"visit": visit_data, "timeline": timeline_data}
+
+
+def timeline_to_columns(timeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Zamienia timeline (lista punktów) na format kolumnowy: równoległe tablice
+    timestamp_seconds, class_id, stress_level oraz tabelę nazw stanów `classes`.
+    """
+    class_index = {name: class_id for class_id, name in enumerate(TIMELINE_CLASS_NAMES)}
+    return {
+        'timestamp_seconds': [point['timestamp_seconds'] for point in timeline],
+        'class_id': [class_index.get(point['feeling'], 0) for point in timeline],
+        'stress_level': [point['stress_level'] for point in timeline],
+        'classes': [
+            {'class_id': class_id, 'feeling': name, 'stress_level': int(TIMELINE_STRESS_LEVELS[class_id])}
+            for class_id, name in enumerate(TIMELINE_CLASS_NAMES)
+        ],
+    }
+
+
 def analyze_long_term_progress(visits_data: List[Dict[str, Any]]) -> str:
     """
     Analizuje długoterminowe postępy pacjenta na podstawie wszystkich wizyt i sesji.
@@ -5,6 +5,7 @@ from .views import (
     VisitViewSet, 
     PatientWithVisitsView,
     CreateSessionSimulationView,
+    CreateSessionSimulationJobView,
     AIAnalysisServiceView,
     StressClassDistributionView
 )
@@ -17,6 +18,7 @@ router.register(r'visits', VisitViewSet)
 urlpatterns = [
     # Specyficzne ścieżki muszą być przed routerem, aby uniknąć konfliktów
     path('visits/patient/<int:patient_id>/simulate/', CreateSessionSimulationView.as_view(), name='create-visit-simulation'),
+    path('visits/patient/<int:patient_id>/simulate/jobs/', CreateSessionSimulationJobView.as_view(), name='create-visit-simulation-job'),
     path('visits/<int:visit_id>/analyze/', AIAnalysisServiceView.as_view(), name='ai-analysis-service'),
     path('patients/<int:pk>/full/', PatientWithVisitsView.as_view(), name='patient-with-visits'),
     path('stress-class-distribution/', StressClassDistributionView.as_view(), name='stress-class-distribution'),
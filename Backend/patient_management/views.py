@@ -3,7 +3,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from rest_framework.settings import api_settings
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from django.contrib.auth import get_user_model
 from collections import defaultdict
@@ -15,9 +15,13 @@ from .serializers import (
     PatientSerializer,
     VisitSerializer,
     VisitSimulationInputSerializer,
+    VisitSimulationJobInputSerializer,
 )
-from .services import create_session_simulation, ai_analysis_service
-from django.utils import timezone
+from .services import create_simulated_visit, ai_analysis_service, timeline_to_columns
+from stress_classification.jobs import JobLimitExceeded, get_job_runner
+from stress_classification.models import ClassificationJob
+from stress_classification.renderers import ColumnarJSONRenderer, wants_columnar
+from stress_classification.serializers import ClassificationJobSerializer
 
 class PatientViewSet(viewsets.ModelViewSet):
     queryset = Patient.objects.all()
@@ -48,7 +52,8 @@ class CreateSessionSimulationView(APIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = VisitSimulationInputSerializer
-    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES  # JSON, formularz, multipart
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
     
     @extend_schema(
     summary="Utwórz wizytę z symulacją dla pacjenta",
@@ -61,7 +66,8 @@ class CreateSessionSimulationView(APIView):
         
         Parametry (opcjonalne w body):
     - visit_date: Data wizyty (opcjonalna)
-        - duration_sec: Długość symulacji w sekundach (domyślnie 300)
+        - duration_sec: Długość symulacji w sekundach (domyślnie 300, maks. SIMULATION_MAX_DURATION_SEC;
+          dłuższe symulacje: POST /api/visits/patient/{patient_id}/simulate/jobs/)
         
         Endpoint automatycznie:
         - Znajduje użytkownika po ID
@@ -70,6 +76,10 @@ class CreateSessionSimulationView(APIView):
         - Klasyfikuje stany emocjonalne używając modelu ML
         - Oblicza step_size, total_duration_seconds i procenty stanów
         - Zapisuje wszystko do bazy danych
+        
+        Format kolumnowy (`?format=columnar` lub `Accept: application/vnd.synaptis.columnar+json`):
+        timeline jako równoległe tablice timestamp_seconds, class_id, stress_level z tabelą
+        stanów `classes`; wizyta bez zduplikowanego pola timeline_data.
         """,
         request=VisitSimulationInputSerializer,
         responses={
@@ -95,31 +105,74 @@ class CreateSessionSimulationView(APIView):
         data = serializer.validated_data
         duration_sec = data.get('duration_sec', 300)
         
-        # Generuj timeline_data używając generate_simulated_data i klasyfikacji
-        timeline_data, metadata = create_session_simulation(duration_sec=duration_sec)
-
-        # Utwórz wizytę przypisaną do pacjenta
-        visit_date = data.get('visit_date') or timezone.now()
-        visit = Visit.objects.create(
-            patient=patient,
-            visit_date=visit_date,
-            step_size=metadata['step_size'],
-            total_duration_seconds=metadata['total_duration_seconds'],
-            baseline_percentage=metadata['baseline_percentage'],
-            stress_percentage=metadata['stress_percentage'],
-            amusement_percentage=metadata['amusement_percentage'],
-            meditation_percentage=metadata['meditation_percentage'],
-            timeline_data=timeline_data
-        )
+        # Generuj timeline_data (generate_simulated_data + klasyfikacja) i utwórz wizytę przypisaną do pacjenta
+        visit, timeline_data = create_simulated_visit(patient, duration_sec, data.get('visit_date'))
 
         # Zwróć wizytę wraz z timeline
         response_serializer = VisitSerializer(visit)
+        if wants_columnar(request):
+            visit_data = dict(response_serializer.data)
+            visit_data.pop('timeline_data', None)
+            return Response({
+                "visit": visit_data,
+                "timeline": timeline_to_columns(timeline_data)
+            }, status=status.HTTP_201_CREATED)
         return Response({
             "visit": response_serializer.data,
             "timeline": timeline_data
         }, status=status.HTTP_201_CREATED)
 
 
+class CreateSessionSimulationJobView(APIView):
+    """
+    Symulacja wizyty wykonywana w tle (zadanie w lokalnej puli procesów).
+    Stan i wynik: GET /api/stress-classification/jobs/{job_id}/.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    
+    @extend_schema(
+        summary="Zleć symulację wizyty w tle",
+        description="""
+        Parametry jak w POST /api/visits/patient/{patient_id}/simulate/ (duration_sec do
+        JOB_SIMULATION_MAX_DURATION_SEC). Zwraca zadanie (id, status, postęp); po zakończeniu
+        wynik zadania ma postać odpowiedzi endpointu synchronicznego (z `?format=columnar` - kolumnową).
+        """,
+        request=VisitSimulationJobInputSerializer,
+        responses={
+            202: ClassificationJobSerializer,
+            404: {'description': 'Pacjent nie istnieje'},
+            429: {'description': 'Przekroczony limit aktywnych zadań użytkownika'},
+        }
+    )
+    def post(self, request, patient_id):
+        if not Patient.objects.filter(pk=patient_id).exists():
+            return Response(
+                {"detail": f"Patient o ID {patient_id} nie istnieje"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        serializer = VisitSimulationJobInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        visit_date = data.get('visit_date')
+        params = {
+            'patient_id': patient_id,
+            'duration_sec': data.get('duration_sec', 300),
+            'visit_date': visit_date.isoformat() if visit_date else None,
+            'columnar': wants_columnar(request),
+        }
+        try:
+            job = get_job_runner().submit(request.user, ClassificationJob.KIND_SIMULATION, params)
+        except JobLimitExceeded as e:
+            return Response({"detail": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        return Response(ClassificationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class AIAnalysisServiceView(APIView):
     """
     Endpoint do generowania analizy AI dla sesji.
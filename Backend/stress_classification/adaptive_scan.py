@@ -0,0 +1,106 @@
+"""
+Skanowanie zgrubne z doprecyzowaniem (coarse-to-fine) dla długich nagrań.
+
+W długim nagraniu większość kroków 10 s leży w długich odcinkach jednego stanu. Zamiast
+predykcji każdego okna model klasyfikuje najpierw okna zgrubne - co `coarse_stride` kroków
+(3 kroki = 30 s, okna bez nakładania) oraz ostatnie okno nagrania. Przerwa między dwoma
+kolejnymi oknami zgrubnymi jest:
+
+- doprecyzowywana (predykcja wszystkich okien w przerwie), gdy klasy okien zgrubnych się
+  różnią albo pewność (max prawdopodobieństwa) któregoś z nich jest niższa niż `min_confidence`,
+- wypełniana wynikiem najbliższego okna zgrubnego w pozostałych przypadkach.
+
+`inferred` oznacza okna, dla których model wykonał predykcję; pozostałe są wypełnione.
+Okna przychodzą blokami w kolejności nagrania (`push`), jak w przetwarzaniu blokowym -
+okna po ostatnim oknie zgrubnym bloku czekają na następny blok.
+"""
+from typing import Callable, Optional
+
+import numpy as np
+
+# Poziomy szczegółowości: None - każde okno; `refine=False` - tylko okna zgrubne (przegląd)
+FIDELITY_TIERS = {
+    'full': None,
+    'adaptive': {'coarse_stride': 3, 'refine': True, 'min_confidence': 0.6},
+    'overview': {'coarse_stride': 3, 'refine': False, 'min_confidence': 0.0},
+}
+DEFAULT_FIDELITY = 'full'
+
+
+class AdaptiveScan:
+    """Wyniki skanowania zgrubnego z doprecyzowaniem dla `num_windows` okien nagrania."""
+
+    def __init__(self, predict: Callable[[np.ndarray], tuple], num_windows: int, num_classes: int,
+                 coarse_stride: int, refine: bool = True, min_confidence: float = 0.0):
+        if coarse_stride < 1:
+            raise ValueError("coarse_stride musi być dodatnie")
+        self.predict = predict
+        self.num_windows = num_windows
+        self.coarse_stride = coarse_stride
+        self.refine = refine
+        self.min_confidence = min_confidence
+
+        self.predictions = np.empty(num_windows, dtype=np.int64)
+        self.probabilities = np.empty((num_windows, num_classes), dtype=np.float32)
+        self.inferred = np.zeros(num_windows, dtype=bool)
+
+        self._received = 0                      # liczba okien otrzymanych w blokach
+        self._last_coarse: Optional[int] = None  # indeks ostatniego okna zgrubnego
+        self._pending = None                    # okna po ostatnim oknie zgrubnym
+
+    @property
+    def done(self) -> int:
+        """Liczba rozstrzygniętych okien (od początku nagrania)."""
+        return self._received - (0 if self._pending is None else len(self._pending))
+
+    def push(self, X_block: np.ndarray) -> None:
+        """Przetwarza kolejny blok okien (N, kroki, kanały)."""
+        if self._received + len(X_block) > self.num_windows:
+            raise ValueError("Więcej okien niż zadeklarowano")
+        first = self.done
+        self._received += len(X_block)
+        if self._pending is not None and len(self._pending):
+            X_block = np.concatenate([self._pending, X_block])
+        indices = np.arange(first, first + len(X_block))
+
+        coarse = np.flatnonzero((indices % self.coarse_stride == 0) | (indices == self.num_windows - 1))
+        if len(coarse):
+            self._store(indices[coarse], *self.predict(X_block[coarse]))
+
+        anchors = indices[coarse].tolist()
+        if self._last_coarse is not None:
+            anchors.insert(0, self._last_coarse)
+
+        refined = []
+        for left, right in zip(anchors, anchors[1:]):
+            if right - left < 2:
+                continue
+            if self.refine and self._needs_refinement(left, right):
+                refined.extend(range(left + 1, right))
+            else:
+                self._fill(left, right)
+        if refined:
+            refined = np.asarray(refined)
+            self._store(refined, *self.predict(X_block[refined - first]))
+
+        if anchors:
+            self._last_coarse = anchors[-1]
+        # Kopia - widok trzymałby w pamięci cały blok
+        self._pending = X_block[self._last_coarse + 1 - first:].copy()
+
+    def _store(self, indices: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> None:
+        self.predictions[indices] = predictions
+        self.probabilities[indices] = probabilities
+        self.inferred[indices] = True
+
+    def _needs_refinement(self, left: int, right: int) -> bool:
+        if self.predictions[left] != self.predictions[right]:
+            return True
+        return min(self.probabilities[left].max(), self.probabilities[right].max()) < self.min_confidence
+
+    def _fill(self, left: int, right: int) -> None:
+        """Okna między dwoma oknami zgrubnymi dostają wynik bliższego z nich (remis - wcześniejszego)."""
+        gap = np.arange(left + 1, right)
+        source = np.where(gap - left <= right - gap, left, right)
+        self.predictions[gap] = self.predictions[source]
+        self.probabilities[gap] = self.probabilities[source]
@@ -1,4 +1,10 @@
 from django.contrib import admin
+from .models import ClassificationJob
 
-# Na razie puste
 
+@admin.register(ClassificationJob)
+class ClassificationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'kind', 'status', 'progress', 'created_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['user__email']
+    readonly_fields = ['created_at', 'updated_at', 'started_at', 'finished_at']
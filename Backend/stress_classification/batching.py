@@ -0,0 +1,167 @@
+"""
+Mikro-batching zapytań do modelu klasyfikacji stresu.
+
+Okna z równoległych żądań (klasyfikacja, symulacje wizyt, sesje strumieniowe)
+trafiają do wspólnej kolejki. Wątek roboczy zbiera je we wspólne batche -
+do osiągnięcia maksymalnego rozmiaru lub upływu maksymalnego czasu oczekiwania
+najstarszego żądania - wykonuje jeden forward pass i odsyła każdemu żądaniu
+jego wycinek wyników.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class _InferenceRequest:
+    """Okna jednego żądania oczekujące w kolejce (mogą być dzielone między batche)."""
+
+    def __init__(self, X, num_classes):
+        self.X = X
+        self.cursor = 0
+        self.remaining = len(X)
+        self.predictions = np.empty(len(X), dtype=np.int64)
+        self.probabilities = np.empty((len(X), num_classes), dtype=np.float32)
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.error = None
+
+
+class InferenceScheduler:
+    """
+    Harmonogram wspólnych batchy dla modelu.
+
+    `forward(X)` przyjmuje znormalizowane okna (N, kroki_czasowe, kanały)
+    i zwraca (predykcje, prawdopodobieństwa) dla całego batcha.
+    """
+
+    def __init__(self, forward, num_classes, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self._forward = forward
+        self._num_classes = num_classes
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = deque()
+        self._queued_windows = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+        # Statystyki
+        self._num_requests = 0
+        self._num_batches = 0
+        self._num_windows = 0
+        self._largest_batch = 0
+        self._largest_queue_depth = 0
+
+    def submit(self, X):
+        """Dodaje okna do kolejki i czeka na wyniki (predykcje, prawdopodobieństwa)."""
+        request = _InferenceRequest(X, self._num_classes)
+        if len(X) == 0:
+            return request.predictions, request.probabilities
+
+        with self._condition:
+            self._ensure_worker()
+            self._queue.append(request)
+            self._queued_windows += len(X)
+            self._num_requests += 1
+            self._largest_queue_depth = max(self._largest_queue_depth, self._queued_windows)
+            self._condition.notify()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.predictions, request.probabilities
+
+    def stats(self):
+        """Zwraca statystyki kolejki i rozmiarów batchy."""
+        with self._condition:
+            return {
+                'queue_depth_windows': self._queued_windows,
+                'queue_depth_requests': len(self._queue),
+                'max_queue_depth_windows': self._largest_queue_depth,
+                'requests': self._num_requests,
+                'batches': self._num_batches,
+                'windows': self._num_windows,
+                'mean_batch_size': self._num_windows / self._num_batches if self._num_batches else 0.0,
+                'max_batch_size_seen': self._largest_batch,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+            }
+
+    def _ensure_worker(self):
+        # Wątek startuje leniwie - dopiero w procesie, który faktycznie obsługuje żądania
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='stress-inference-scheduler', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        """Czeka na pełny batch lub termin najstarszego żądania i zdejmuje okna z kolejki."""
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while self._queued_windows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            pieces = []
+            size = 0
+            while self._queue and size < self.max_batch_size:
+                request = self._queue[0]
+                take = min(len(request.X) - request.cursor, self.max_batch_size - size)
+                pieces.append((request, request.cursor, take))
+                request.cursor += take
+                size += take
+                if request.cursor == len(request.X):
+                    self._queue.popleft()
+
+            self._queued_windows -= size
+            self._num_batches += 1
+            self._num_windows += size
+            self._largest_batch = max(self._largest_batch, size)
+            return pieces
+
+    def _run(self):
+        while True:
+            pieces = self._next_batch()
+            if len(pieces) == 1:
+                request, start, take = pieces[0]
+                batch = request.X[start:start + take]
+            else:
+                batch = np.concatenate([request.X[start:start + take] for request, start, take in pieces])
+
+            try:
+                predictions, probabilities = self._forward(batch)
+            except Exception as e:
+                logger.error(f"Błąd podczas wspólnego batcha predykcji: {e}", exc_info=True)
+                self._fail(pieces, e)
+                continue
+
+            offset = 0
+            for request, start, take in pieces:
+                request.predictions[start:start + take] = predictions[offset:offset + take]
+                request.probabilities[start:start + take] = probabilities[offset:offset + take]
+                offset += take
+                request.remaining -= take
+                if request.remaining == 0:
+                    request.done.set()
+
+    def _fail(self, pieces, error):
+        with self._condition:
+            for request, _, _ in pieces:
+                if request in self._queue:
+                    self._queue.remove(request)
+                    self._queued_windows -= len(request.X) - request.cursor
+                request.error = error
+                request.done.set()
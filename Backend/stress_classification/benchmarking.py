@@ -0,0 +1,49 @@
+"""
+Pomiary czasu i pamięci wspólne dla komend benchmarków (`management/commands/benchmark_*`, `check_*`).
+"""
+import ctypes
+import gc
+import time
+
+import numpy as np
+
+
+def measure_times(run, repeats, warmup=0):
+    """Czasy (s) `repeats` wywołań `run()` po `warmup` niemierzonych wywołaniach rozgrzewki."""
+    for _ in range(warmup):
+        run()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def best_time(run, repeats):
+    """Najkrótszy czas wykonania `run()` z `repeats` powtórzeń (s)."""
+    return float(measure_times(run, repeats).min())
+
+
+def read_memory_kb():
+    """Zwraca (VmRSS, VmHWM) procesu w kB."""
+    values = {}
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                name, value = line.split(':')
+                values[name] = int(value.split()[0])
+    return values['VmRSS'], values['VmHWM']
+
+
+def reset_peak_rss():
+    """
+    Zwalnia nieużywaną pamięć sterty i zeruje licznik szczytowego RSS (VmHWM) procesu - Linux >= 4.0.
+
+    Bez `malloc_trim` kolejny pomiar korzystałby z pamięci zwolnionej przez poprzedni
+    i przyrost RSS byłby zaniżony.
+    """
+    gc.collect()
+    ctypes.CDLL('libc.so.6').malloc_trim(0)
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
@@ -22,7 +22,7 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
         duration_sec: Długość symulacji w sekundach
         
     Returns:
-        Tuple (acc, bvp, eda, temp) - numpy arrays z danymi
+        Tuple (acc, bvp, eda, temp) - numpy arrays float32 z danymi
     """
     # Generuj dane dla każdego sygnału z odpowiednią częstotliwością próbkowania
     t_acc = np.linspace(0, duration_sec, int(ACC_RATE * duration_sec))
@@ -32,9 +32,11 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
     
     # ACC - akcelerometr (3 osie: x, y, z)
     # Symuluj ruch z różnymi poziomami aktywności
-    acc_x = 0.5 + 0.3 * np.sin(2 * np.pi * 0.1 * t_acc) + 0.1 * np.random.randn(len(t_acc))
-    acc_y = 0.3 + 0.2 * np.cos(2 * np.pi * 0.15 * t_acc) + 0.1 * np.random.randn(len(t_acc))
-    acc_z = 0.8 + 0.4 * np.sin(2 * np.pi * 0.12 * t_acc) + 0.1 * np.random.randn(len(t_acc))
+    # Osie zapisywane od razu do bufora float32 (N, 3) - bez osobnych tablic float64 i column_stack
+    acc = np.empty((len(t_acc), 3), dtype=np.float32)
+    acc[:, 0] = 0.5 + 0.3 * np.sin(2 * np.pi * 0.1 * t_acc) + 0.1 * np.random.randn(len(t_acc))
+    acc[:, 1] = 0.3 + 0.2 * np.cos(2 * np.pi * 0.15 * t_acc) + 0.1 * np.random.randn(len(t_acc))
+    acc[:, 2] = 0.8 + 0.4 * np.sin(2 * np.pi * 0.12 * t_acc) + 0.1 * np.random.randn(len(t_acc))
     
     # Dodaj okresy zwiększonej aktywności (stres)
     stress_periods = [
@@ -44,11 +46,8 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
     
     for start, end in stress_periods:
         mask = (t_acc >= start) & (t_acc <= end)
-        acc_x[mask] += 0.5 * np.random.randn(np.sum(mask))
-        acc_y[mask] += 0.5 * np.random.randn(np.sum(mask))
-        acc_z[mask] += 0.5 * np.random.randn(np.sum(mask))
-    
-    acc = np.column_stack([acc_x, acc_y, acc_z])
+        for axis in range(3):
+            acc[mask, axis] += 0.5 * np.random.randn(np.sum(mask))
     
     # BVP - Blood Volume Pulse
     # Symuluj puls z podstawową częstotliwością ~1 Hz (60 bpm)
@@ -66,7 +65,7 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
         bvp[mask] += 0.1 * np.random.randn(np.sum(mask))
     
     bvp += 0.05 * np.random.randn(len(t_bvp))
-    bvp = np.clip(bvp, 0, 1)  # Normalizuj do [0, 1]
+    bvp = np.clip(bvp, 0, 1).astype(np.float32)  # Normalizuj do [0, 1]
     
     # EDA - Electrodermal Activity
     # Symuluj bazową aktywność z okresowymi skokami (stres)
@@ -80,7 +79,7 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
         eda[mask] += 0.1 * np.random.randn(np.sum(mask))
     
     eda += 0.05 * np.random.randn(len(t_eda))
-    eda = np.clip(eda, 0, 1)
+    eda = np.clip(eda, 0, 1).astype(np.float32)
     
     # TEMP - Temperatura
     # Symuluj stabilną temperaturę z małymi wahaniami
@@ -93,7 +92,7 @@ def generate_simulated_data(duration_sec: int = DEFAULT_DURATION_SEC) -> Tuple[n
         temp[mask] += 0.1 * np.random.randn(np.sum(mask))
     
     temp += 0.1 * np.random.randn(len(t_temp))
-    temp = np.clip(temp, 35.0, 38.0)
+    temp = np.clip(temp, 35.0, 38.0).astype(np.float32)
     
     return acc, bvp, eda, temp
 
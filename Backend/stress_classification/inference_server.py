@@ -0,0 +1,257 @@
+"""
+Lokalny serwer inferencji - pula procesów z załadowanym modelem za gniazdem Unix.
+
+Proces nadrzędny tworzy gniazdo i uruchamia (fork) procesy robocze, które ładują
+model raz i przyjmują połączenia z tego samego gniazda (jak workery gunicorna).
+Wątki w procesie roboczym obsługują połączenia równolegle, a okna trafiają do
+wspólnych batchy (`InferenceScheduler`). Rdzenie CPU są dzielone między procesy
+jawnie - każdy proces ma własną liczbę wątków intra-op PyTorch / ONNX Runtime.
+
+Protokół (jedno połączenie na żądanie, ramki `multiprocessing.connection`):
+    żądanie:   nagłówek JSON {"shape": [N, kroki, kanały]}, okna float32
+    odpowiedź: nagłówek JSON {"ok": true} lub {"error": ..., "type": ...},
+               predykcje int64 (N,), prawdopodobieństwa float32 (N, klasy)
+"""
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Connection
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Wątki obsługujące połączenia w jednym procesie roboczym
+DEFAULT_CONNECTION_THREADS = 16
+LISTEN_BACKLOG = 128
+# Maksymalny czas oczekiwania klienta na odpowiedź serwera (s)
+DEFAULT_CLIENT_TIMEOUT_SEC = 60
+# Proces, który zakończył się przed załadowaniem modelu, jest uruchamiany ponownie z rosnącym
+# opóźnieniem; po tylu kolejnych nieudanych startach serwer kończy działanie
+MAX_STARTUP_FAILURES = 5
+MAX_RESPAWN_DELAY_SEC = 30
+
+
+class InferenceServerError(RuntimeError):
+    """Procesy inferencji nie mogą się uruchomić (np. błąd ładowania modelu)."""
+
+
+def available_cpus():
+    """Zwraca liczbę rdzeni dostępnych dla procesu (z uwzględnieniem affinity/cgroup)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def split_threads(num_workers=None, threads_per_worker=None):
+    """
+    Dzieli rdzenie między procesy inferencji.
+
+    Domyślnie jeden proces na dwa rdzenie (co najmniej jeden), a wątki intra-op
+    to równy podział wszystkich rdzeni między procesy.
+    """
+    cpus = available_cpus()
+    if not num_workers:
+        num_workers = max(1, cpus // 2)
+    if not threads_per_worker:
+        threads_per_worker = max(1, cpus // num_workers)
+    return num_workers, threads_per_worker
+
+
+class InferenceClient:
+    """Klient serwera inferencji używany przez `StressClassificationService.predict`."""
+
+    def __init__(self, socket_path, num_classes, timeout=DEFAULT_CLIENT_TIMEOUT_SEC):
+        self.socket_path = str(socket_path)
+        self.num_classes = num_classes
+        self.timeout = timeout
+
+    def predict(self, X_segments):
+        """Wysyła okna (N, kroki, kanały) do serwera i zwraca (predykcje, prawdopodobieństwa)."""
+        X = np.ascontiguousarray(X_segments, dtype=np.float32)
+        predictions = np.empty(len(X), dtype=np.int64)
+        probabilities = np.empty((len(X), self.num_classes), dtype=np.float32)
+        if len(X) == 0:
+            return predictions, probabilities
+
+        with Client(self.socket_path, family='AF_UNIX') as conn:
+            conn.send_bytes(json.dumps({'shape': list(X.shape)}).encode())
+            conn.send_bytes(X)
+
+            # Zawieszony proces inferencji nie może blokować wątku workera WWW bez końca
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Serwer inferencji nie odpowiedział w ciągu {self.timeout:g} s")
+            header = json.loads(conn.recv_bytes())
+            if 'error' in header:
+                error_type = ValueError if header.get('type') == 'ValueError' else RuntimeError
+                raise error_type(header['error'])
+
+            # Płaski widok - recv_bytes_into liczy rozmiar bufora po pierwszym wymiarze
+            conn.recv_bytes_into(predictions)
+            conn.recv_bytes_into(probabilities.reshape(-1))
+
+        return predictions, probabilities
+
+
+class InferenceServer:
+    """
+    Pula procesów inferencji nasłuchujących na wspólnym gnieździe Unix.
+
+    `service_factory(threads)` tworzy (w procesie roboczym, po fork) serwis
+    klasyfikacji z `threads` wątkami intra-op; model jest ładowany przed
+    przyjęciem pierwszego połączenia.
+    """
+
+    def __init__(self, socket_path, service_factory, num_workers=None, threads_per_worker=None,
+                 connection_threads=DEFAULT_CONNECTION_THREADS):
+        self.socket_path = str(socket_path)
+        self.service_factory = service_factory
+        self.num_workers, self.threads_per_worker = split_threads(num_workers, threads_per_worker)
+        self.connection_threads = connection_threads
+
+        self._socket = None
+        self._workers = {}          # slot -> (proces, zdarzenie "model załadowany")
+        self._startup_failures = {}  # slot -> liczba kolejnych nieudanych startów
+        self._next_spawn = {}       # slot -> najwcześniejszy czas ponownego uruchomienia (monotonic)
+        self._stopping = False
+        self._context = multiprocessing.get_context('fork')
+
+    def serve_forever(self):
+        """
+        Tworzy gniazdo, uruchamia procesy robocze i odtwarza te, które się zakończyły.
+
+        Zgłasza `InferenceServerError`, gdy proces roboczy `MAX_STARTUP_FAILURES` razy z rzędu
+        zakończy się przed załadowaniem modelu.
+        """
+        self._bind()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        logger.info(f"Serwer inferencji: {self.socket_path}, procesy: {self.num_workers}, "
+                    f"wątki intra-op na proces: {self.threads_per_worker}")
+        try:
+            while not self._stopping:
+                for slot in range(self.num_workers):
+                    self._check_worker(slot)
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
+
+    def _bind(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._socket.listen(LISTEN_BACKLOG)
+
+    def _check_worker(self, slot):
+        """Uruchamia proces w pustym slocie; zakończony przed załadowaniem modelu - z opóźnieniem."""
+        if slot in self._workers:
+            worker, ready = self._workers[slot]
+            if ready.is_set():
+                self._startup_failures[slot] = 0
+            if worker.is_alive():
+                return
+            del self._workers[slot]
+            if ready.is_set():
+                logger.warning(f"Proces inferencji {worker.pid} zakończył się "
+                               f"(kod {worker.exitcode}) - uruchamiam ponownie")
+            else:
+                failures = self._startup_failures.get(slot, 0) + 1
+                self._startup_failures[slot] = failures
+                if failures >= MAX_STARTUP_FAILURES:
+                    raise InferenceServerError(f"Proces inferencji nie uruchomił się {failures} razy z rzędu "
+                                               f"(ostatni kod {worker.exitcode})")
+                delay = min(0.5 * 2 ** failures, MAX_RESPAWN_DELAY_SEC)
+                logger.error(f"Proces inferencji {worker.pid} zakończył się przed załadowaniem modelu "
+                             f"(kod {worker.exitcode}) - ponowna próba za {delay:g} s")
+                self._next_spawn[slot] = time.monotonic() + delay
+
+        if time.monotonic() >= self._next_spawn.get(slot, 0):
+            self._workers[slot] = self._spawn_worker()
+
+    def _spawn_worker(self):
+        ready = self._context.Event()
+        worker = self._context.Process(target=self._worker_main, args=(ready,),
+                                       name='stress-inference-worker', daemon=True)
+        worker.start()
+        return worker, ready
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _shutdown(self):
+        for worker, _ in self._workers.values():
+            if worker.is_alive():
+                worker.terminate()
+        for worker, _ in self._workers.values():
+            worker.join(timeout=5)
+        self._socket.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _worker_main(self, ready):
+        # Proces roboczy kończy się na SIGTERM od procesu nadrzędnego
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        service = self.service_factory(self.threads_per_worker)
+        service.load_model()
+        ready.set()
+        logger.info(f"Proces inferencji {os.getpid()} gotowy ({service.loaded_format})")
+
+        threads = [
+            threading.Thread(target=self._accept_loop, args=(service,), daemon=True)
+            for _ in range(self.connection_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _accept_loop(self, service):
+        while True:
+            client, _ = self._socket.accept()
+            with Connection(client.detach()) as conn:
+                try:
+                    self._handle(service, conn)
+                except (EOFError, OSError) as e:
+                    logger.warning(f"Przerwane połączenie z klientem inferencji: {e}")
+                except Exception as e:
+                    # Wątek obsługi połączeń nie może się zakończyć z powodu jednego żądania
+                    logger.error(f"Błąd obsługi połączenia inferencji: {e}", exc_info=True)
+
+    def _handle(self, service, conn):
+        # Obie ramki są odbierane przed dekodowaniem - klient czeka na odpowiedź dopiero po wysłaniu okien
+        header, payload = conn.recv_bytes(), conn.recv_bytes()
+        try:
+            shape = json.loads(header)['shape']
+            X = np.frombuffer(payload, dtype=np.float32).reshape(shape)
+            if X.ndim != 3:
+                raise ValueError(f"Oczekiwano okien (N, kroki, kanały), otrzymano kształt {list(X.shape)}")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Nieprawidłowe żądanie inferencji: {e!r}")
+            self._send_error(conn, ValueError(f"Nieprawidłowe żądanie inferencji: {e!r}"))
+            return
+
+        try:
+            predictions, probabilities = service.predict(X)
+        except Exception as e:
+            logger.error(f"Błąd predykcji w procesie inferencji: {e}", exc_info=True)
+            self._send_error(conn, e)
+            return
+
+        conn.send_bytes(json.dumps({'ok': True}).encode())
+        conn.send_bytes(np.ascontiguousarray(predictions, dtype=np.int64))
+        conn.send_bytes(np.ascontiguousarray(probabilities, dtype=np.float32))
+
+    @staticmethod
+    def _send_error(conn, error):
+        conn.send_bytes(json.dumps({'error': str(error), 'type': type(error).__name__}).encode())
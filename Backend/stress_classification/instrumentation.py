@@ -0,0 +1,174 @@
+"""
+Pomiary etapów klasyfikacji: czas i szczytowa pamięć alokowana na etap, liczniki okien i batchy.
+
+Pomiar obejmuje jedno wywołanie `classify` (`measure()`); kod pipeline'u oznacza etapy przez
+`stage('resampling')` i liczniki przez `count('batches')`, a aktywny pomiar jest odczytywany
+z `contextvars`. Bez aktywnego pomiaru `stage` zwraca wspólny pusty kontekst, a `count`
+kończy się na odczycie ContextVar - narzut wyłączonych pomiarów jest pomijalny.
+
+Pamięć (`trace_memory=True`, tryb `memory`) mierzy `tracemalloc`: alokacje NumPy i Pythona
+(bez tensorów PyTorch). `tracemalloc` spowalnia alokacje i jest globalny dla procesu - przy
+równoległych klasyfikacjach szczyt etapu obejmuje też alokacje innych wątków.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Tryby pomiarów serwisu: 'off' - tylko na żądanie (bez pamięci), 'timings' - czas każdej
+# klasyfikacji, 'memory' - czas i szczytowa pamięć (tracemalloc)
+INSTRUMENTATION_MODES = ('off', 'timings', 'memory')
+
+logger = logging.getLogger(__name__)
+
+_active = contextvars.ContextVar('stress_classification_measurement', default=None)
+_NULL_STAGE = nullcontext()
+
+# tracemalloc jest globalny - włączony, dopóki trwa choć jeden pomiar pamięci
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+class Measurement:
+    """Czasy, szczytowa pamięć i liczniki etapów jednej klasyfikacji."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self.total_seconds = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        """Etap pipeline'u; wielokrotne wywołania (np. dla kolejnych bloków) są sumowane."""
+        if self.trace_memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - start_memory
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), peak)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        """Wynik w formacie `metadata.timings` (czasy w ms)."""
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {'ms': round(entry['seconds'] * 1000, 3), 'calls': entry['calls']}
+            if 'peak_bytes' in entry:
+                stages[name]['peak_bytes'] = entry['peak_bytes']
+        return {
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'stages': stages,
+            'counters': dict(self.counters),
+            'memory': self.trace_memory,
+        }
+
+
+def stage(name):
+    """Kontekst etapu aktywnego pomiaru (pusty, gdy pomiar nie trwa)."""
+    measurement = _active.get()
+    if measurement is None:
+        return _NULL_STAGE
+    return measurement.stage(name)
+
+
+def count(name, value=1):
+    """Zwiększa licznik aktywnego pomiaru (bez aktywnego pomiaru nic nie robi)."""
+    measurement = _active.get()
+    if measurement is not None:
+        measurement.count(name, value)
+
+
+@contextmanager
+def measure(trace_memory=False):
+    """Włącza pomiar etapów w bieżącym kontekście (wątku / zadaniu) i zwraca `Measurement`."""
+    global _tracing_users
+    measurement = Measurement(trace_memory)
+    if trace_memory:
+        with _tracing_lock:
+            if _tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracing_users += 1
+
+    token = _active.set(measurement)
+    start = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        measurement.total_seconds = time.perf_counter() - start
+        _active.reset(token)
+        if trace_memory:
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0:
+                    tracemalloc.stop()
+
+
+def maybe_measure(enabled, trace_memory=False):
+    """`measure()` albo pusty kontekst (zwraca None), gdy pomiar jest wyłączony."""
+    return measure(trace_memory) if enabled else nullcontext()
+
+
+def log_measurement(measurement, **fields):
+    """Jedna linia logu JSON z wynikiem pomiaru (pole `stress_timings` rekordu dla handlerów strukturalnych)."""
+    record = {'event': 'classify_timings', **fields, **measurement.as_dict()}
+    logger.info(json.dumps(record, separators=(',', ':')), extra={'stress_timings': record})
+
+
+class InstrumentationStats:
+    """Zagregowane liczniki pomiarów w procesie (GET /api/stress-classification/stats/)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._classifications = 0
+        self._total_seconds = 0.0
+        self._stages = {}
+        self._counters = {}
+
+    def record(self, measurement):
+        with self._lock:
+            self._classifications += 1
+            self._total_seconds += measurement.total_seconds
+            for name, entry in measurement.stages.items():
+                totals = self._stages.setdefault(name, {'seconds': 0.0, 'max_seconds': 0.0, 'calls': 0})
+                totals['seconds'] += entry['seconds']
+                totals['max_seconds'] = max(totals['max_seconds'], entry['seconds'])
+                totals['calls'] += entry['calls']
+                if 'peak_bytes' in entry:
+                    totals['max_peak_bytes'] = max(totals.get('max_peak_bytes', 0), entry['peak_bytes'])
+            for name, value in measurement.counters.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def stats(self):
+        """Liczba zmierzonych klasyfikacji, czasy etapów (suma, średnia, maksimum w ms) i sumy liczników."""
+        with self._lock:
+            count = self._classifications
+            stages = {}
+            for name, totals in self._stages.items():
+                stages[name] = {
+                    'total_ms': totals['seconds'] * 1000,
+                    'mean_ms': totals['seconds'] * 1000 / count if count else 0.0,
+                    'max_ms': totals['max_seconds'] * 1000,
+                    'calls': totals['calls'],
+                }
+                if 'max_peak_bytes' in totals:
+                    stages[name]['max_peak_bytes'] = totals['max_peak_bytes']
+            return {
+                'classifications': count,
+                'total_ms': self._total_seconds * 1000,
+                'mean_ms': self._total_seconds * 1000 / count if count else 0.0,
+                'stages': stages,
+                'counters': dict(self._counters),
+            }
@@ -0,0 +1,15 @@
+"""
+Inicjalizacja procesów roboczych puli zadań w tle (`jobs.py`).
+
+Proces `spawn` odtwarza inicjalizator przed pierwszym zadaniem, zanim Django jest
+skonfigurowane (moduł `__main__` gunicorna ani `manage.py` nie wywołuje `django.setup()`
+przy imporcie) - dlatego ten moduł nie importuje modeli ani innych modułów aplikacji.
+"""
+
+
+def init_worker(threads):
+    """Konfiguracja Django i wątków PyTorch przed pierwszym zadaniem procesu roboczego."""
+    import django
+    import torch
+    django.setup()
+    torch.set_num_threads(threads)
@@ -0,0 +1,307 @@
+"""
+Zadania w tle - klasyfikacja i symulacja wizyt poza cyklem żądania HTTP.
+
+Zadanie to wiersz `ClassificationJob` oraz wywołanie w lokalnej puli procesów
+(`ProcessPoolExecutor`, bez zewnętrznego brokera). Proces roboczy sam zapisuje
+status, postęp i wynik w bazie, więc stan zadania może odczytać dowolny worker WWW.
+
+- Obsługa zadania to funkcja `handler(params, inputs, progress)` wskazana ścieżką
+  (`JOB_HANDLERS`) - moduły aplikacji są importowane dopiero w procesie roboczym.
+- `progress(fraction)` zapisuje postęp i jednocześnie wykrywa anulowanie
+  (aktualizacja warunkowa po statusie) - wtedy zgłasza `JobCancelled`.
+- Limit aktywnych zadań na użytkownika jest sprawdzany pod blokadą wiersza użytkownika.
+- Pula odświeża `updated_at` zadań czekających w jej kolejce, więc za osierocone
+  (`expire_stale_jobs`) uznawane są tylko zadania, których pula już nie istnieje.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .inference_server import split_threads
+from .job_worker import init_worker
+from .models import ClassificationJob
+
+logger = logging.getLogger(__name__)
+
+# Obsługa zadań według rodzaju (ścieżki importu - rozwiązywane w procesie roboczym)
+JOB_HANDLERS = {
+    ClassificationJob.KIND_CLASSIFICATION: 'stress_classification.jobs.run_classification_job',
+    ClassificationJob.KIND_SIMULATION: 'patient_management.services.run_simulation_job',
+}
+
+# Odstęp między odczytami stanu zadania przy long-pollingu (s)
+POLL_INTERVAL_SEC = 0.25
+
+# Maksymalny odstęp między odświeżeniami zadań oczekujących w kolejce puli (s)
+QUEUE_HEARTBEAT_SEC = 60
+
+
+class JobCancelled(Exception):
+    """Zadanie zostało anulowane w trakcie wykonywania."""
+
+
+class JobLimitExceeded(Exception):
+    """Użytkownik ma już maksymalną liczbę aktywnych zadań."""
+
+
+def _config():
+    return getattr(settings, 'STRESS_CLASSIFICATION', {})
+
+
+class JobProgress:
+    """Callback postępu dla obsługi zadania (wywoływany w procesie roboczym)."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def __call__(self, fraction):
+        updated = ClassificationJob.objects.filter(
+            pk=self.job_id, status=ClassificationJob.STATUS_RUNNING
+        ).update(progress=min(max(float(fraction), 0.0), 1.0), updated_at=timezone.now())
+        if not updated:
+            raise JobCancelled()
+
+    def scaled(self, start, end):
+        """Callback dla etapu zajmującego zakres [start, end] całego zadania."""
+        return lambda fraction: self(start + (end - start) * fraction)
+
+
+class JobRunner:
+    """Lokalna pula procesów wykonująca zadania (jedna na proces WWW, tworzona leniwie)."""
+
+    def __init__(self, num_workers=None):
+        self.num_workers, self.threads_per_worker = split_threads(num_workers or None)
+        self._executor = None
+        self._lock = threading.Lock()
+        # Zadania przekazane do puli, których wykonanie się nie zakończyło (odświeżane przez wątek heartbeat)
+        self._queued = set()
+        self._heartbeat = None
+
+    def submit(self, user, kind, params, inputs=None):
+        """
+        Zapisuje zadanie i przekazuje je do puli procesów.
+
+        `params` trafiają do bazy (JSON), `inputs` (np. tablice sygnałów) tylko do procesu roboczego.
+        """
+        limit = _config().get('JOB_MAX_ACTIVE_PER_USER', 2)
+        with transaction.atomic():
+            # Blokada wiersza użytkownika - równoległe zgłoszenia tego samego użytkownika czekają
+            get_user_model().objects.select_for_update().filter(pk=user.pk).first()
+            # Zadania osierocone (np. po restarcie procesu WWW) nie blokują limitu
+            expire_stale_jobs(ClassificationJob.objects.filter(user=user))
+            active = ClassificationJob.objects.filter(
+                user=user, status__in=ClassificationJob.ACTIVE_STATUSES
+            ).count()
+            if active >= limit:
+                raise JobLimitExceeded(f"Limit aktywnych zadań na użytkownika: {limit}")
+            job = ClassificationJob.objects.create(user=user, kind=kind, params=params)
+
+        try:
+            future = self._get_executor().submit(_run_job, job.pk, JOB_HANDLERS[kind], params, inputs)
+        except BrokenProcessPool:
+            self._reset_executor()
+            future = self._get_executor().submit(_run_job, job.pk, JOB_HANDLERS[kind], params, inputs)
+        self._track(job.pk)
+        future.add_done_callback(lambda f: self._on_done(job.pk, f))
+        return job
+
+    def _track(self, job_id):
+        """Dodaje zadanie do odświeżanych przez heartbeat (wątek startuje przy pierwszym zadaniu w kolejce)."""
+        interval = heartbeat_interval()
+        with self._lock:
+            self._queued.add(job_id)
+            if interval and self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, args=(interval,),
+                                                   name='job-queue-heartbeat', daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._queued:
+                    self._heartbeat = None
+                    return
+            try:
+                close_old_connections()
+                self.touch_queued_jobs()
+            except Exception as e:
+                logger.warning(f"Nie udało się odświeżyć zadań w kolejce: {e}")
+
+    def touch_queued_jobs(self):
+        """Odświeża `updated_at` zadań oczekujących w kolejce puli - nie są uznawane za osierocone."""
+        with self._lock:
+            job_ids = list(self._queued)
+        if not job_ids:
+            return 0
+        return ClassificationJob.objects.filter(
+            pk__in=job_ids, status=ClassificationJob.STATUS_PENDING
+        ).update(updated_at=timezone.now())
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn - procesy robocze nie dziedziczą połączeń z bazą ani wątków procesu WWW
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_worker,
+                    initargs=(self.threads_per_worker,),
+                )
+                logger.info(f"Pula zadań: {self.num_workers} proc. x {self.threads_per_worker} wątków")
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # Uszkodzona pula - bez czekania na zadania (ich status ustawia _on_done)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            self._queued.discard(job_id)
+        # Błędy obsługi są zapisywane w procesie roboczym; tu trafiają awarie samej puli
+        error = future.exception() if not future.cancelled() else None
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            self._reset_executor()
+        logger.error(f"Zadanie {job_id} przerwane: {error}")
+        ClassificationJob.objects.filter(pk=job_id, status__in=ClassificationJob.ACTIVE_STATUSES).update(
+            status=ClassificationJob.STATUS_FAILED, error=f"Awaria procesu roboczego: {error}",
+            finished_at=timezone.now(), updated_at=timezone.now()
+        )
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Zwraca pulę zadań procesu (tworzoną przy pierwszym zgłoszeniu)."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(_config().get('JOB_WORKERS', 0))
+    return _runner
+
+
+def cancel_job(job):
+    """Anuluje oczekujące lub trwające zadanie; zwraca True, jeśli status został zmieniony."""
+    now = timezone.now()
+    return bool(ClassificationJob.objects.filter(
+        pk=job.pk, status__in=ClassificationJob.ACTIVE_STATUSES
+    ).update(status=ClassificationJob.STATUS_CANCELLED, finished_at=now, updated_at=now))
+
+
+def heartbeat_interval():
+    """Odstęp odświeżania zadań w kolejce (s) - wyraźnie krótszy niż `JOB_STALE_SEC`; None bez wygasania."""
+    stale_sec = _config().get('JOB_STALE_SEC', 600)
+    return min(QUEUE_HEARTBEAT_SEC, stale_sec / 3) if stale_sec else None
+
+
+def expire_stale_jobs(jobs):
+    """
+    Oznacza jako błąd aktywne zadania z `jobs` bez aktualizacji przez `JOB_STALE_SEC`.
+
+    Trwające zadanie przestało raportować postęp; oczekujące nie jest już odświeżane przez
+    pulę (`touch_queued_jobs`) - proces WWW, który był jej właścicielem, zrestartował się.
+    Zwraca liczbę oznaczonych zadań.
+    """
+    stale_sec = _config().get('JOB_STALE_SEC', 600)
+    if not stale_sec:
+        return 0
+    now = timezone.now()
+    stale = jobs.filter(updated_at__lt=now - timedelta(seconds=stale_sec))
+    expired = stale.filter(status=ClassificationJob.STATUS_RUNNING).update(
+        status=ClassificationJob.STATUS_FAILED, error="Proces roboczy przestał odpowiadać",
+        finished_at=now, updated_at=now
+    )
+    expired += stale.filter(status=ClassificationJob.STATUS_PENDING).update(
+        status=ClassificationJob.STATUS_FAILED, error="Zadanie nie zostało uruchomione (restart procesu WWW "
+                                                      "lub awaria puli procesów)",
+        finished_at=now, updated_at=now
+    )
+    return expired
+
+
+def refresh_job(job):
+    """Odczytuje stan zadania; zadanie bez aktualizacji przez `JOB_STALE_SEC` jest oznaczane jako błąd."""
+    if job.is_active and expire_stale_jobs(ClassificationJob.objects.filter(pk=job.pk)):
+        logger.warning(f"Zadanie {job.pk} ({job.status}) bez aktualizacji przez JOB_STALE_SEC - oznaczone jako błąd")
+    job.refresh_from_db()
+    return job
+
+
+def wait_for_job(job, timeout):
+    """Long-polling: czeka do `timeout` s na zmianę statusu lub postępu zadania."""
+    deadline = time.monotonic() + timeout
+    observed = (job.status, job.progress)
+    while job.is_active and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL_SEC)
+        refresh_job(job)
+        if (job.status, job.progress) != observed:
+            break
+    return job
+
+
+def _run_job(job_id, handler_path, params, inputs):
+    """Wykonuje zadanie w procesie roboczym i zapisuje wynik lub błąd."""
+    now = timezone.now()
+    started = ClassificationJob.objects.filter(pk=job_id, status=ClassificationJob.STATUS_PENDING).update(
+        status=ClassificationJob.STATUS_RUNNING, started_at=now, updated_at=now
+    )
+    if not started:
+        return  # Anulowane przed rozpoczęciem
+
+    running = ClassificationJob.objects.filter(pk=job_id, status=ClassificationJob.STATUS_RUNNING)
+    try:
+        result = import_string(handler_path)(params, inputs, JobProgress(job_id))
+    except JobCancelled:
+        logger.info(f"Zadanie {job_id} anulowane")
+        return
+    except Exception as e:
+        logger.error(f"Błąd zadania {job_id}: {e}", exc_info=not isinstance(e, ValueError))
+        now = timezone.now()
+        running.update(status=ClassificationJob.STATUS_FAILED, error=str(e), finished_at=now, updated_at=now)
+        return
+
+    now = timezone.now()
+    running.update(status=ClassificationJob.STATUS_SUCCEEDED, progress=1.0, result=result,
+                   finished_at=now, updated_at=now)
+
+
+def run_classification_job(params, inputs, progress):
+    """Obsługa zadania klasyfikacji - parametry jak w POST /api/stress-classification/."""
+    from datetime import datetime
+
+    from .data_simulator import generate_simulated_data
+    from .views import get_stress_service
+
+    if inputs is None:
+        acc, bvp, eda, temp = generate_simulated_data()
+    else:
+        acc, bvp, eda, temp = inputs
+    start_timestamp = params.get('start_timestamp')
+    return get_stress_service().classify(
+        acc, bvp, eda, temp,
+        datetime.fromisoformat(start_timestamp) if start_timestamp else None,
+        sampling_rates=params.get('sampling_rates'),
+        columnar=params.get('columnar', False),
+        progress=progress,
+        fidelity=params.get('fidelity', 'full'),
+        timings=params.get('timings', False),
+        cache=inputs is not None,
+    )
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from stress_classification.adaptive_scan import FIDELITY_TIERS
+from stress_classification.data_simulator import TEMP_RATE, generate_simulated_data
+from stress_classification.ml_service import StressClassificationService
+
+
+def simulate_state_changes(duration_sec, period_sec):
+    """
+    Symulowane nagranie ze zmianami stanu: co drugi odcinek `period_sec` ma obniżoną temperaturę skóry.
+
+    Sygnały z `generate_simulated_data` klasyfikowane są jako jedna klasa - przesunięcie
+    temperatury zmienia klasę, więc nagranie ma granice stanów do doprecyzowania.
+    """
+    acc, bvp, eda, temp = generate_simulated_data(duration_sec=duration_sec)
+    t_temp = np.arange(len(temp)) / TEMP_RATE
+    temp = temp - 6.0 * ((t_temp // period_sec) % 2 == 1)
+    return acc, bvp, eda, temp
+
+
+class Command(BaseCommand):
+    help = ("Porównuje poziomy szczegółowości classify (full / adaptive / overview): czas, liczbę "
+            "predykcji modelu i zgodność klas z predykcją każdego okna")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[3600, 8 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 1 h, 8 h)")
+        parser.add_argument('--period-sec', type=int, default=1200,
+                            help="Długość odcinka jednego stanu w nagraniu (domyślnie: 1200 s)")
+        parser.add_argument('--model-format', default='eager', help="Format modelu (domyślnie: eager)")
+
+    def handle(self, *args, **options):
+        np.random.seed(0)
+        service = StressClassificationService(model_format=options['model_format'])
+        service.load_model()
+        # Rozgrzewka - jednorazowe alokacje PyTorch przy pierwszym forward passie
+        service.scan_signals(*generate_simulated_data(duration_sec=120))
+
+        self.stdout.write(f"Format modelu: {service.loaded_format}, odcinek stanu: {options['period_sec']} s")
+        self.stdout.write(f"{'nagranie':>9} {'poziom':<9} {'okna':>6} {'predykcje':>10} {'zgodność [%]':>13} "
+                          f"{'granice':>8} {'czas [s]':>9}")
+
+        for duration_sec in options['durations']:
+            signals = simulate_state_changes(duration_sec, options['period_sec'])
+            reference = None
+            for fidelity in FIDELITY_TIERS:
+                start = time.perf_counter()
+                predictions, probabilities, inferred = service.scan_signals(*signals, fidelity=fidelity)
+                elapsed = time.perf_counter() - start
+                if reference is None:
+                    reference = predictions
+                agreement = (predictions == reference).mean() * 100
+                changes = int((np.diff(predictions) != 0).sum())
+                self.stdout.write(f"{duration_sec / 3600:>8.2f}h {fidelity:<9} {len(predictions):>6} "
+                                  f"{int(inferred.sum()):>10} {agreement:>13.2f} {changes:>8} {elapsed:>9.2f}")
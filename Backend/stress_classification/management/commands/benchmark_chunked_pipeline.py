@@ -0,0 +1,59 @@
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from stress_classification.benchmarking import read_memory_kb, reset_peak_rss
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import StressClassificationService
+
+
+class Command(BaseCommand):
+    help = ("Porównuje szczytowy przyrost RSS i czas classify: całe nagranie naraz "
+            "(preprocess_signals + predict) vs przetwarzanie blokowe (predict_signals)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[300, 3600, 8 * 3600, 24 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 5 min, 1 h, 8 h, 24 h)")
+        parser.add_argument('--chunk-sec', type=int, default=600,
+                            help="Długość kawałka nagrania w przetwarzaniu blokowym (domyślnie: 600)")
+
+    def handle(self, *args, **options):
+        service = StressClassificationService(model_format='eager', chunk_sec=options['chunk_sec'])
+        service.load_model()
+
+        paths = {
+            'blokowo': lambda signals: service.predict_signals(*signals),
+            'całość': lambda signals: service.predict(service.preprocess_signals(*signals)),
+        }
+
+        self.stdout.write(f"Kawałek: {options['chunk_sec']} s")
+        self.stdout.write(f"{'nagranie':>9} {'wejście [MB]':>13} {'ścieżka':<8} {'przyrost RSS [MB]':>18} {'czas [s]':>9}")
+        np.random.seed(0)
+        # Rozgrzewka - jednorazowe alokacje PyTorch przy pierwszym forward passie
+        warmup = generate_simulated_data(duration_sec=120)
+        for run in paths.values():
+            run(warmup)
+
+        for duration_sec in options['durations']:
+            signals = generate_simulated_data(duration_sec=duration_sec)
+            input_mb = sum(np.asarray(data).nbytes for data in signals) / 2 ** 20
+
+            for name, run in paths.items():
+                # Bufor wejściowy modelu z poprzedniego pomiaru nie może zaniżać przyrostu
+                service._buffers = threading.local()
+                reset_peak_rss()
+                baseline, _ = read_memory_kb()
+                start = time.perf_counter()
+                run(signals)
+                elapsed = time.perf_counter() - start
+                _, peak = read_memory_kb()
+                self.stdout.write(f"{duration_sec / 3600:>8.2f}h {input_mb:>13.1f} {name:<8} "
+                                  f"{(peak - baseline) / 1024:>18.1f} {elapsed:>9.2f}")
+
+            reference = service.predict(service.preprocess_signals(*signals))
+            chunked = service.predict_signals(*signals)
+            if not np.array_equal(reference[0], chunked[0]) or not np.allclose(reference[1], chunked[1], atol=1e-6):
+                self.stdout.write(self.style.WARNING(f"Wyniki ścieżek różnią się ({duration_sec} s)"))
+            del signals, reference, chunked
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from stress_classification.benchmarking import read_memory_kb, reset_peak_rss
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import StressClassificationService
+from stress_classification.parsers import SIGNAL_NAMES, validate_signal_arrays
+from stress_classification.serializers import SignalsSerializer
+
+
+class Command(BaseCommand):
+    help = ("Mierzy szczytowy przyrost RSS jednej klasyfikacji od wejścia sygnałów do wyniku: "
+            "symulacja, żądanie binarne (<f4 / <f8) i żądanie JSON (walidacja SignalArrayField)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[3600, 8 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 1 h, 8 h)")
+        parser.add_argument('--skip-json', action='store_true',
+                            help="Pomiń żądanie JSON (listy Pythona dla długich nagrań zajmują dużo pamięci)")
+
+    def handle(self, *args, **options):
+        service = StressClassificationService(model_format='eager')
+        service.load_model()
+
+        def classify(arrays):
+            return service.classify(arrays['acc'], arrays['bvp'], arrays['eda'], arrays['temp'])
+
+        def decode_binary(bodies):
+            # Jak BinarySignalParser: widoki na treść żądania, potem walidacja i konwersja
+            return validate_signal_arrays({
+                name: np.frombuffer(body, dtype=dtype).reshape(shape)
+                for name, (body, dtype, shape) in bodies.items()
+            })
+
+        def decode_json(payload):
+            serializer = SignalsSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            return serializer.validated_data
+
+        np.random.seed(0)
+        # Rozgrzewka - jednorazowe alokacje PyTorch i SciPy
+        classify(dict(zip(SIGNAL_NAMES, generate_simulated_data(duration_sec=120))))
+
+        self.stdout.write(f"{'nagranie':>9} {'wejście':<12} {'przyrost RSS [MB]':>18} {'czas [s]':>9}")
+        for duration_sec in options['durations']:
+            signals = dict(zip(SIGNAL_NAMES, generate_simulated_data(duration_sec=duration_sec)))
+            paths = {
+                'symulacja': (None, lambda _: classify(
+                    dict(zip(SIGNAL_NAMES, generate_simulated_data(duration_sec=duration_sec))))),
+            }
+            for dtype in ('<f4', '<f8'):
+                bodies = {name: (np.ascontiguousarray(data, dtype=dtype).tobytes(), dtype, np.shape(data))
+                          for name, data in signals.items()}
+                paths[f'binarne {dtype}'] = (bodies, lambda bodies: classify(decode_binary(bodies)))
+            if not options['skip_json']:
+                payload = {name: np.asarray(data).tolist() for name, data in signals.items()}
+                paths['JSON'] = (payload, lambda payload: classify(decode_json(payload)))
+
+            for name, (request, run) in paths.items():
+                # Bufor wejściowy modelu z poprzedniego pomiaru nie może zaniżać przyrostu
+                service._buffers = threading.local()
+                reset_peak_rss()
+                baseline, _ = read_memory_kb()
+                start = time.perf_counter()
+                run(request)
+                elapsed = time.perf_counter() - start
+                _, peak = read_memory_kb()
+                self.stdout.write(f"{duration_sec / 3600:>8.2f}h {name:<12} {(peak - baseline) / 1024:>18.1f} "
+                                  f"{elapsed:>9.2f}")
+            del paths
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.instrumentation import INSTRUMENTATION_MODES
+from stress_classification.ml_service import StressClassificationService
+
+
+class Command(BaseCommand):
+    help = ("Mierzy narzut pomiarów etapów classify (tryby off / timings / memory) i wypisuje "
+            "czasy, szczytową pamięć etapów oraz liczniki okien i batchy")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[3600, 8 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 1 h, 8 h)")
+        parser.add_argument('--model-format', default='eager', help="Format modelu (domyślnie: eager)")
+        parser.add_argument('--repeats', type=int, default=5, help="Liczba powtórzeń pomiaru czasu")
+
+    def handle(self, *args, **options):
+        np.random.seed(0)
+        services = {}
+        for mode in INSTRUMENTATION_MODES:
+            services[mode] = StressClassificationService(model_format=options['model_format'],
+                                                         instrumentation=mode)
+            services[mode].load_model()
+            # Rozgrzewka - jednorazowe alokacje PyTorch przy pierwszym forward passie
+            services[mode].classify(*generate_simulated_data(duration_sec=120))
+
+        self.stdout.write(f"Format modelu: {services['off'].loaded_format}")
+        for duration_sec in options['durations']:
+            signals = generate_simulated_data(duration_sec=duration_sec)
+            self.stdout.write(f"\nNagranie {duration_sec / 3600:.2f} h")
+            self.stdout.write(f"{'tryb':<8} {'classify [s]':>13} {'narzut [%]':>11}")
+
+            # Tryby na przemian - wolniejsze z czasem CPU nie obciąża jednego trybu
+            times = {mode: [] for mode in INSTRUMENTATION_MODES}
+            for _ in range(options['repeats']):
+                for mode, service in services.items():
+                    start = time.perf_counter()
+                    service.classify(*signals)
+                    times[mode].append(time.perf_counter() - start)
+            baseline = min(times['off'])
+            for mode in INSTRUMENTATION_MODES:
+                best = min(times[mode])
+                self.stdout.write(f"{mode:<8} {best:>13.3f} {(best / baseline - 1) * 100:>11.1f}")
+
+            timings = services['memory'].classify(*signals, timings=True)['metadata']['timings']
+            self.stdout.write(f"{'etap':<14} {'czas [ms]':>10} {'wywołania':>10} {'szczyt [MB]':>12}")
+            for name, entry in timings['stages'].items():
+                self.stdout.write(f"{name:<14} {entry['ms']:>10.1f} {entry['calls']:>10} "
+                                  f"{entry.get('peak_bytes', 0) / 2 ** 20:>12.1f}")
+            self.stdout.write("liczniki: " + ", ".join(f"{name}={value}"
+                                                       for name, value in timings['counters'].items()))
@@ -0,0 +1,113 @@
+import io
+from datetime import date, datetime, timezone
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from patient_management.models import Patient, Visit
+from patient_management.views import PatientViewSet, StressClassDistributionView
+from stress_classification.benchmarking import measure_times
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import STEP_SEC, WINDOW_SEC
+from stress_classification.views import get_stress_service
+
+
+class Rollback(Exception):
+    """Wycofanie danych testowych po pomiarach."""
+
+
+class Command(BaseCommand):
+    help = ("Porównuje przepustowość JSONRenderer/JSONParser (json) i ORJSONRenderer/ORJSONParser (orjson) "
+            "dla najcięższych endpointów")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=20,
+                            help="Liczba tymczasowych pacjentów (domyślnie: 20)")
+        parser.add_argument('--visits', type=int, default=5,
+                            help="Liczba wizyt na pacjenta (domyślnie: 5)")
+        parser.add_argument('--visit-duration', type=int, default=3600,
+                            help="Długość wizyty w sekundach - długość timeline_data (domyślnie: 3600)")
+        parser.add_argument('--segments', type=int, default=2878,
+                            help="Liczba segmentów wyniku klasyfikacji (domyślnie: 2878 - 8 h)")
+        parser.add_argument('--repeats', type=int, default=10,
+                            help="Liczba pomiarów (domyślnie: 10)")
+
+    def handle(self, *args, **options):
+        self.repeats = options['repeats']
+        self.stdout.write(f"{'endpoint':<32} {'rozmiar [B]':>12} {'json [ms]':>10} {'orjson [ms]':>12} {'zysk':>6}")
+
+        try:
+            with transaction.atomic():
+                self._benchmark_patient_endpoints(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self._benchmark_classification(options['segments'])
+        self._benchmark_parser()
+
+    def _benchmark_patient_endpoints(self, options):
+        user = get_user_model().objects.create_user(email='benchmark-json@example.com', password=None)
+        timeline = [
+            {'timestamp_seconds': t, 'stress_level': int(level), 'feeling': 'Baseline'}
+            for t, level in zip(range(0, options['visit_duration'], STEP_SEC),
+                                np.random.default_rng(0).integers(1, 4, options['visit_duration']))
+        ]
+        for i in range(options['patients']):
+            patient = Patient.objects.create(first_name='Jan', last_name=f'Test{i}', dob=date(1990, 1, 1),
+                                             gender='M', pesel=f'{90000000000 + i}')
+            Visit.objects.bulk_create([
+                Visit(patient=patient, visit_date=datetime(2025, 1, 1, 10, tzinfo=timezone.utc),
+                      step_size=STEP_SEC, total_duration_seconds=options['visit_duration'], baseline_percentage=40.0,
+                      stress_percentage=30.0, amusement_percentage=20.0, meditation_percentage=10.0,
+                      timeline_data=timeline)
+                for _ in range(options['visits'])
+            ])
+
+        factory = APIRequestFactory()
+        endpoints = {
+            'GET /patients/ (wizyty+timeline)': (PatientViewSet, {'actions': {'get': 'list'}}),
+            'GET /stress-class-distribution/': (StressClassDistributionView, {}),
+        }
+        for label, (view_class, view_kwargs) in endpoints.items():
+            def request_with(renderer_class):
+                view = view_class.as_view(**view_kwargs, renderer_classes=[renderer_class])
+                request = factory.get('/', HTTP_ACCEPT='application/json')
+                force_authenticate(request, user=user)
+                response = view(request)
+                response.render()
+                return response.content
+            self._compare(label, lambda: request_with(JSONRenderer), lambda: request_with(ORJSONRenderer))
+
+    def _benchmark_classification(self, num_segments):
+        service = get_stress_service()
+        np.random.seed(0)
+        acc, bvp, eda, temp = generate_simulated_data(duration_sec=(num_segments - 1) * STEP_SEC + WINDOW_SEC)
+        predictions, probabilities = service.predict(service.preprocess_signals(acc, bvp, eda, temp))
+        start_timestamp = datetime(2025, 1, 1, 10)
+        results = service.analyze_stress_level(predictions, probabilities, start_timestamp)
+
+        for label, columnar in ((f'klasyfikacja {num_segments} segm.', False),
+                                (f'klasyfikacja {num_segments} kolumn.', True)):
+            output = service.generate_json_output(predictions, probabilities, results, start_timestamp, columnar)
+            self._compare(label, lambda: JSONRenderer().render(output), lambda: ORJSONRenderer().render(output))
+
+    def _benchmark_parser(self):
+        np.random.seed(0)
+        acc, bvp, eda, temp = generate_simulated_data(duration_sec=3600)
+        body = ORJSONRenderer().render({'use_simulation': False, 'acc': acc, 'bvp': bvp, 'eda': eda, 'temp': temp})
+        self._compare('parsowanie żądania 1 h', lambda: JSONParser().parse(io.BytesIO(body)),
+                      lambda: ORJSONParser().parse(io.BytesIO(body)), size=len(body))
+
+    def _compare(self, label, legacy_run, fast_run, size=None):
+        legacy, fast = (np.median(measure_times(run, self.repeats, warmup=1)) for run in (legacy_run, fast_run))
+        if size is None:
+            size = len(fast_run())
+        self.stdout.write(f"{label:<32} {size:>12} {legacy * 1e3:>10.1f} {fast * 1e3:>12.1f} {legacy / fast:>5.1f}x")
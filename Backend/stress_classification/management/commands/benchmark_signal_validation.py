@@ -0,0 +1,82 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+
+from stress_classification.benchmarking import measure_times
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.serializers import SignalsSerializer
+
+
+class LegacySignalsSerializer(serializers.Serializer):
+    """Poprzednia walidacja sygnałów: ListField(child=FloatField()) element po elemencie."""
+
+    acc = serializers.ListField(
+        child=serializers.ListField(child=serializers.FloatField(), min_length=3, max_length=3),
+        required=False
+    )
+    bvp = serializers.ListField(child=serializers.FloatField(), required=False)
+    eda = serializers.ListField(child=serializers.FloatField(), required=False)
+    temp = serializers.ListField(child=serializers.FloatField(), required=False)
+
+
+# Niepoprawne dane - błędy obu serializerów muszą być takie same
+INVALID_PAYLOADS = {
+    'tekst zamiast liczby': {'bvp': [0.1, 'abc', 0.3]},
+    'null w sygnale': {'eda': [0.1, None]},
+    'wiersz ACC z 2 wartościami': {'acc': [[0.1, 0.2, 0.3], [0.1, 0.2]]},
+    'wiersz ACC z 4 wartościami': {'acc': [[0.1, 0.2, 0.3, 0.4]]},
+    'ACC jako lista liczb': {'acc': [0.1, 0.2, 0.3]},
+    'lista list zamiast liczb': {'temp': [[36.6], [36.7]]},
+    'tekst zamiast listy': {'temp': '36.6'},
+    'słownik zamiast listy': {'bvp': {'a': 1}},
+}
+
+
+class Command(BaseCommand):
+    help = "Porównuje czas walidacji sygnałów JSON (SignalArrayField vs ListField(FloatField)) i zgodność błędów"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=int, default=3600,
+                            help="Długość symulowanego nagrania w sekundach (domyślnie: 3600)")
+        parser.add_argument('--repeats', type=int, default=5,
+                            help="Liczba pomiarów (domyślnie: 5)")
+
+    def handle(self, *args, **options):
+        mismatches = 0
+        for name, payload in INVALID_PAYLOADS.items():
+            legacy, current = LegacySignalsSerializer(data=payload), SignalsSerializer(data=payload)
+            legacy.is_valid()
+            current.is_valid()
+            if legacy.errors != current.errors:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(
+                    f"Różne błędy ({name}): {legacy.errors} != {current.errors}"))
+        self.stdout.write(f"Zgodność błędów: {len(INVALID_PAYLOADS) - mismatches}/{len(INVALID_PAYLOADS)}")
+
+        np.random.seed(0)
+        acc, bvp, eda, temp = generate_simulated_data(duration_sec=options['duration'])
+        payload = {'acc': acc.tolist(), 'bvp': bvp.tolist(), 'eda': eda.tolist(), 'temp': temp.tolist()}
+        num_values = acc.size + bvp.size + eda.size + temp.size
+        self.stdout.write(f"Nagranie {options['duration']} s: {num_values} liczb")
+
+        def legacy_run():
+            serializer = LegacySignalsSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            return {key: np.array(value) for key, value in serializer.validated_data.items()}
+
+        def current_run():
+            serializer = SignalsSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            return serializer.validated_data
+
+        reference, result = legacy_run(), current_run()
+        if not all(np.array_equal(reference[key], result[key]) for key in reference):
+            self.stdout.write(self.style.WARNING("Zwalidowane tablice różnią się"))
+
+        timings = {}
+        for label, run in (('ListField', legacy_run), ('SignalArrayField', current_run)):
+            timings[label] = np.median(measure_times(run, options['repeats']))
+            self.stdout.write(f"{label:<17} mediana: {timings[label] * 1e3:9.1f} ms")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Przyspieszenie: {timings['ListField'] / timings['SignalArrayField']:.0f}x"))
@@ -0,0 +1,62 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import torch
+from django.core.management.base import BaseCommand
+
+from stress_classification.benchmarking import measure_times
+from stress_classification.ml_service import StressClassificationService, quantize_model, script_model
+from stress_classification.onnx_backend import OnnxRuntimeModel, export_onnx
+
+
+class Command(BaseCommand):
+    help = "Porównuje opóźnienie inferencji modelu klasyfikacji stresu (eager vs TorchScript vs int8 vs ONNX Runtime) na CPU"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 512],
+                            help="Rozmiary batchy (domyślnie: 1 32 512)")
+        parser.add_argument('--repeats', type=int, default=50,
+                            help="Liczba pomiarów dla każdego rozmiaru batcha (domyślnie: 50)")
+        parser.add_argument('--threads', type=int, default=None,
+                            help="Liczba wątków intra-op PyTorch (domyślnie: ustawienie PyTorch)")
+
+    def handle(self, *args, **options):
+        if options['threads']:
+            torch.set_num_threads(options['threads'])
+
+        service = StressClassificationService(model_format='eager')
+        service.load_model()
+        eager = service.model.cpu()
+        models = {
+            'eager': eager,
+            'torchscript': script_model(eager),
+            'quantized': quantize_model(service._build_eager_model(service._get_model_path()).cpu()),
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                onnx_path = export_onnx(service._build_eager_model(service._get_model_path()),
+                                        Path(tmp_dir) / 'model.onnx', num_channels=6, seq_len=120)
+                models['onnx'] = OnnxRuntimeModel(onnx_path, intra_op_threads=options['threads'] or 0)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Pomijam ONNX Runtime: {e}"))
+
+        self.stdout.write(f"Wątki PyTorch: {torch.get_num_threads()}, ONNX Runtime: {options['threads'] or 'domyślnie'}")
+        self.stdout.write(f"{'batch':>6} {'model':<12} {'mediana [ms]':>13} {'p90 [ms]':>10} {'okna/s':>10}")
+
+        rng = np.random.default_rng(0)
+        for batch_size in options['batch_sizes']:
+            inputs = torch.from_numpy(rng.standard_normal((batch_size, 6, 120), dtype=np.float32))
+            for name, model in models.items():
+                timings = self._measure(model, inputs, options['repeats'])
+                median = np.median(timings)
+                self.stdout.write(
+                    f"{batch_size:>6} {name:<12} {median * 1e3:>13.3f} "
+                    f"{np.percentile(timings, 90) * 1e3:>10.3f} {batch_size / median:>10.0f}"
+                )
+
+    def _measure(self, model, inputs, repeats):
+        with torch.inference_mode():
+            # Rozgrzewka (optymalizacje grafu TorchScript wykonują się przy pierwszych wywołaniach)
+            return measure_times(lambda: model(inputs), repeats, warmup=5)
@@ -0,0 +1,68 @@
+import numpy as np
+import torch
+from django.core.management.base import BaseCommand
+from torch.utils.data import DataLoader
+
+from stress_classification.benchmarking import measure_times
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import STEP_SEC, WINDOW_SEC, StressClassificationService, normalize_data
+
+
+def legacy_predict(model, X_normalized, batch_size=32):
+    """Poprzednia ścieżka predict: DataLoader po tensorze okien i listy wyników z .extend."""
+    dataloader = DataLoader(torch.from_numpy(X_normalized).float().permute(0, 2, 1),
+                            batch_size=batch_size, shuffle=False)
+    all_predictions = []
+    all_probabilities = []
+    with torch.no_grad():
+        for inputs in dataloader:
+            outputs = model(inputs)
+            probabilities = torch.softmax(outputs, dim=1)
+            _, predicted = torch.max(outputs.data, 1)
+            all_predictions.extend(predicted.cpu().numpy())
+            all_probabilities.extend(probabilities.cpu().numpy())
+    return np.array(all_predictions), np.array(all_probabilities)
+
+
+class Command(BaseCommand):
+    help = "Porównuje czas predict (ciągły tensor, inference_mode) z poprzednią ścieżką DataLoader"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segments', type=int, nargs='+', default=[521, 2878],
+                            help="Liczby segmentów nagrań (domyślnie: 521 - sesja results.json, 2878 - 8 h)")
+        parser.add_argument('--repeats', type=int, default=20,
+                            help="Liczba pomiarów dla każdego nagrania (domyślnie: 20)")
+        parser.add_argument('--threads', type=int, default=None,
+                            help="Liczba wątków intra-op PyTorch (domyślnie: ustawienie PyTorch)")
+
+    def handle(self, *args, **options):
+        if options['threads']:
+            torch.set_num_threads(options['threads'])
+
+        service = StressClassificationService(model_format='eager')
+        service.load_model()
+        # Poprzednia ścieżka: model bez wbudowanej normalizacji i osobny przebieg normalize_data
+        legacy = StressClassificationService(model_format='eager', fold_normalization=False)
+        legacy.load_model()
+
+        self.stdout.write(f"Wątki PyTorch: {torch.get_num_threads()}")
+        self.stdout.write(f"{'segmenty':>9} {'ścieżka':<10} {'mediana [ms]':>13} {'p90 [ms]':>10}")
+
+        np.random.seed(0)
+        for num_segments in options['segments']:
+            duration_sec = (num_segments - 1) * STEP_SEC + WINDOW_SEC
+            X_segments = service.preprocess_signals(*generate_simulated_data(duration_sec=duration_sec))
+            X_normalized = normalize_data(X_segments, legacy.mean, legacy.std)
+
+            paths = {
+                'dataloader': lambda: legacy_predict(legacy.model, X_normalized),
+                'predict': lambda: service.predict(X_segments),
+            }
+            reference, current = paths['dataloader'](), paths['predict']()
+            if not np.array_equal(reference[0], current[0]) or not np.allclose(reference[1], current[1], atol=1e-5):
+                self.stdout.write(self.style.WARNING("Wyniki ścieżek różnią się"))
+
+            for name, run in paths.items():
+                timings = measure_times(run, options['repeats'], warmup=1)
+                self.stdout.write(f"{len(X_segments):>9} {name:<10} {np.median(timings) * 1e3:>13.2f} "
+                                  f"{np.percentile(timings, 90) * 1e3:>10.2f}")
@@ -0,0 +1,67 @@
+import numpy as np
+import torch
+from django.core.management.base import BaseCommand, CommandError
+
+from stress_classification.benchmarking import best_time
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import StressClassificationService, normalize_data
+
+# Maksymalna różnica prawdopodobieństw modelu z wbudowaną normalizacją względem normalize_data + model
+FOLDING_TOLERANCE = 1e-5
+
+
+class Command(BaseCommand):
+    help = ("Sprawdza równoważność normalizacji wbudowanej w pierwszą konwolucję (NormalizedInputConv1d) "
+            "z osobnym przebiegiem normalize_data: wyjście konwolucji, prawdopodobieństwa i czas predict")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[600, 8 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 10 min, 8 h)")
+        parser.add_argument('--model-format', default='eager', choices=['eager', 'quantized'],
+                            help="Format modelu (wbudowanie dotyczy eager i modelu kwantyzowanego przy ładowaniu)")
+        parser.add_argument('--repeats', type=int, default=5, help="Liczba powtórzeń pomiaru czasu")
+
+    def handle(self, *args, **options):
+        np.random.seed(0)
+        reference = StressClassificationService(model_format=options['model_format'], fold_normalization=False)
+        folded = StressClassificationService(model_format=options['model_format'])
+        reference.load_model()
+        folded.load_model()
+        if not folded.normalization_folded:
+            raise CommandError(f"Model {folded.loaded_format} nie obsługuje wbudowania normalizacji "
+                               f"(zapisany artefakt TorchScript?)")
+
+        self.stdout.write(f"Format modelu: {folded.loaded_format}, tolerancja: {FOLDING_TOLERANCE:g}")
+        self.stdout.write(f"{'nagranie':>9} {'okna':>6} {'max |Δconv|':>12} {'max |Δp|':>10} {'różne klasy':>12} "
+                          f"{'normalize [ms]':>15} {'predict [ms]':>13} {'wbudowana [ms]':>15}")
+
+        failures = []
+        for duration_sec in options['durations']:
+            X_segments = reference.preprocess_signals(*generate_simulated_data(duration_sec=duration_sec))
+
+            # Wyjście pierwszej konwolucji: conv(normalize(x)) vs NormalizedInputConv1d(x)
+            with torch.inference_mode():
+                raw = torch.from_numpy(np.ascontiguousarray(X_segments.transpose(0, 2, 1)))
+                normalized = torch.from_numpy(np.ascontiguousarray(
+                    normalize_data(X_segments, reference.mean, reference.std).transpose(0, 2, 1), dtype=np.float32))
+                conv_diff = float((reference.model.cnn_layers[0](normalized)
+                                   - folded.model.cnn_layers[0](raw)).abs().max())
+
+            ref_predictions, ref_probabilities = reference.predict(X_segments)
+            predictions, probabilities = folded.predict(X_segments)
+            max_diff = float(np.abs(probabilities - ref_probabilities).max())
+            mismatches = int((predictions != ref_predictions).sum())
+
+            normalize_ms = best_time(lambda: normalize_data(X_segments, reference.mean, reference.std),
+                                     options['repeats']) * 1000
+            reference_ms = best_time(lambda: reference.predict(X_segments), options['repeats']) * 1000
+            folded_ms = best_time(lambda: folded.predict(X_segments), options['repeats']) * 1000
+            self.stdout.write(f"{duration_sec / 3600:>8.2f}h {len(X_segments):>6} {conv_diff:>12.2e} "
+                              f"{max_diff:>10.2e} {mismatches:>12} {normalize_ms:>15.1f} {reference_ms:>13.1f} "
+                              f"{folded_ms:>15.1f}")
+            if max_diff > FOLDING_TOLERANCE or mismatches:
+                failures.append(f"{duration_sec} s: max |Δp| {max_diff:.2e}, różne klasy {mismatches}")
+
+        if failures:
+            raise CommandError("Wbudowana normalizacja przekracza tolerancję: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Wbudowana normalizacja równoważna normalize_data"))
@@ -0,0 +1,81 @@
+import numpy as np
+import torch
+from django.core.management.base import BaseCommand, CommandError
+
+from stress_classification.benchmarking import best_time
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import BATCH_SIZE, STEP_SEC, TARGET_RATE, StressClassificationService
+from stress_classification.overlap_inference import (
+    EDGE_SAMPLES, EXACT_TOLERANCE, OVERLAP_METHODS, windows_to_recording,
+)
+
+
+class Command(BaseCommand):
+    help = ("Porównuje predykcję okno po oknie z overlap inference (tryby exact i shared): "
+            "zgodność prawdopodobieństw i czas części CNN oraz całej predykcji")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[600, 3600, 8 * 3600],
+                            help="Długości nagrań w sekundach (domyślnie: 10 min, 1 h, 8 h)")
+        parser.add_argument('--model-format', default='eager', choices=['eager', 'quantized', 'torchscript'],
+                            help="Format modelu (overlap inference nie obsługuje ONNX)")
+        parser.add_argument('--repeats', type=int, default=3, help="Liczba powtórzeń pomiaru czasu")
+
+    def handle(self, *args, **options):
+        np.random.seed(0)
+        reference = StressClassificationService(model_format=options['model_format'])
+        services = {
+            mode: StressClassificationService(model_format=options['model_format'], overlap_inference=mode)
+            for mode in ('exact', 'shared')
+        }
+        for service in [reference, *services.values()]:
+            service.load_model()
+        if services['exact'].overlap_inference_active == 'off':
+            raise CommandError(f"Model {reference.loaded_format} nie obsługuje overlap inference "
+                               f"(artefakt sprzed eksportu metod {', '.join(OVERLAP_METHODS)}?)")
+        model = reference.model
+        step_samples = STEP_SEC * TARGET_RATE
+
+        self.stdout.write(f"Format modelu: {reference.loaded_format}, tolerancja exact: {EXACT_TOLERANCE:g}")
+        self.stdout.write(f"{'nagranie':>9} {'okna':>6} {'tryb':<10} {'max |Δp|':>10} {'różne klasy':>12} "
+                          f"{'CNN [ms]':>9} {'predykcja [ms]':>15}")
+
+        failures = []
+        for duration_sec in options['durations']:
+            X_segments = reference.preprocess_signals(*generate_simulated_data(duration_sec=duration_sec))
+            num_windows = len(X_segments)
+            ref_predictions, ref_probabilities = reference.predict(X_segments)
+
+            # Czas części CNN mierzony na surowych oknach - normalizacja nie zmienia kosztu
+            windows = torch.from_numpy(np.ascontiguousarray(X_segments.transpose(0, 2, 1), dtype=np.float32))
+            recording = torch.from_numpy(np.ascontiguousarray(
+                windows_to_recording(X_segments, step_samples).T, dtype=np.float32)).unsqueeze(0)
+
+            def cnn_per_window():
+                for start in range(0, num_windows, BATCH_SIZE):
+                    model.cnn_features(windows[start:start + BATCH_SIZE])
+
+            with torch.inference_mode():
+                cnn_ms = best_time(cnn_per_window, options['repeats']) * 1000
+                shared_cnn_ms = best_time(lambda: model.cnn_features(recording), options['repeats']) * 1000
+                # Tryb exact: dodatkowo skrajne kroki cech z początków i końców okien
+                edges = torch.cat([windows[:, :, :EDGE_SAMPLES], windows[:, :, -EDGE_SAMPLES:]])
+                edges_ms = best_time(lambda: model.cnn_features(edges), options['repeats']) * 1000
+            mode_cnn_ms = {'exact': shared_cnn_ms + edges_ms, 'shared': shared_cnn_ms}
+            predict_ms = best_time(lambda: reference.predict(X_segments), options['repeats']) * 1000
+            self.stdout.write(f"{duration_sec / 3600:>8.2f}h {num_windows:>6} {'okno/okno':<10} {'-':>10} {'-':>12} "
+                              f"{cnn_ms:>9.1f} {predict_ms:>15.1f}")
+
+            for mode, service in services.items():
+                predictions, probabilities = service.predict_consecutive(X_segments)
+                max_diff = float(np.abs(probabilities - ref_probabilities).max())
+                mismatches = int((predictions != ref_predictions).sum())
+                predict_ms = best_time(lambda: service.predict_consecutive(X_segments), options['repeats']) * 1000
+                self.stdout.write(f"{duration_sec / 3600:>8.2f}h {num_windows:>6} {mode:<10} {max_diff:>10.2e} "
+                                  f"{mismatches:>12} {mode_cnn_ms[mode]:>9.1f} {predict_ms:>15.1f}")
+                if mode == 'exact' and (max_diff > EXACT_TOLERANCE or mismatches):
+                    failures.append(f"{duration_sec} s: max |Δp| {max_diff:.2e}, różne klasy {mismatches}")
+
+        if failures:
+            raise CommandError("Tryb exact przekracza tolerancję: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Tryb exact zgodny z predykcją okno po oknie"))
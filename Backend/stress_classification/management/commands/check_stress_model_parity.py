@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from stress_classification.data_simulator import generate_simulated_data
+from stress_classification.ml_service import STEP_SEC, WINDOW_SEC, CLASS_NAMES, StressClassificationService
+
+# Sesja referencyjna dołączona do repozytorium (wynik klasyfikacji nagrania WESAD)
+DEFAULT_SESSION_PATH = Path(settings.BASE_DIR).parent / 'MachineLearningService' / 'results.json'
+
+
+class Command(BaseCommand):
+    help = ("Porównuje predykcje wybranego formatu modelu z modelem float (eager PyTorch): "
+            "zgodność klas i dryf prawdopodobieństw")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['quantized', 'onnx', 'torchscript'], default='quantized',
+                            help="Porównywany format modelu (domyślnie: quantized)")
+        parser.add_argument('--session', type=Path, default=DEFAULT_SESSION_PATH,
+                            help="Plik results.json sesji - wyznacza długość nagrania (domyślnie: "
+                                 "MachineLearningService/results.json)")
+        parser.add_argument('--duration', type=int, default=None,
+                            help="Długość nagrania w sekundach (zamiast długości sesji z --session)")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Ziarno generatora symulowanych danych (domyślnie: 0)")
+        parser.add_argument('--min-agreement', type=float, default=None,
+                            help="Minimalna zgodność klas w procentach - poniżej komenda kończy się błędem")
+
+    def handle(self, *args, **options):
+        duration_sec = options['duration'] or self._session_duration(options['session'])
+
+        # results.json zawiera tylko wyniki (bez surowych sygnałów), więc porównanie odbywa się
+        # na symulowanym nagraniu o tej samej długości i liczbie segmentów
+        np.random.seed(options['seed'])
+        acc, bvp, eda, temp = generate_simulated_data(duration_sec=duration_sec)
+
+        reference = StressClassificationService(model_format='eager')
+        candidate = StressClassificationService(model_format=options['format'])
+        try:
+            reference.load_model()
+            candidate.load_model()
+        except (FileNotFoundError, ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        X_segments = reference.preprocess_signals(acc, bvp, eda, temp)
+        ref_predictions, ref_probabilities = reference.predict(X_segments)
+        predictions, probabilities = candidate.predict(X_segments)
+
+        agreement = float(np.mean(predictions == ref_predictions)) * 100
+        drift = np.abs(probabilities - ref_probabilities)
+
+        self.stdout.write(f"Format: {candidate.loaded_format} vs eager")
+        self.stdout.write(f"Nagranie: {duration_sec} s, segmenty: {len(X_segments)}")
+        self.stdout.write(f"Zgodność klas: {agreement:.2f}% "
+                          f"({int(np.sum(predictions != ref_predictions))} różnych segmentów)")
+        self.stdout.write(f"Dryf prawdopodobieństw: max {drift.max():.2e}, średnio {drift.mean():.2e}")
+        for class_id, name in enumerate(CLASS_NAMES):
+            self.stdout.write(f"  {name:<11} max {drift[:, class_id].max():.2e}, "
+                              f"liczba segmentów: {int(np.sum(ref_predictions == class_id))} -> "
+                              f"{int(np.sum(predictions == class_id))}")
+
+        if options['min_agreement'] is not None and agreement < options['min_agreement']:
+            raise CommandError(f"Zgodność klas {agreement:.2f}% poniżej progu {options['min_agreement']}%")
+
+    def _session_duration(self, session_path):
+        """Wyznacza długość nagrania z metadanych sesji (segmenty co STEP_SEC, okno WINDOW_SEC)."""
+        if not session_path.exists():
+            raise CommandError(f"Plik sesji nie znaleziony: {session_path} (podaj --session lub --duration)")
+
+        with open(session_path) as f:
+            metadata = json.load(f)['metadata']
+        return (metadata['num_segments'] - 1) * STEP_SEC + WINDOW_SEC
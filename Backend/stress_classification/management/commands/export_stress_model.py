@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from stress_classification.ml_service import StressClassificationService
+
+
+class Command(BaseCommand):
+    help = ("Eksportuje model klasyfikacji stresu do zoptymalizowanego artefaktu "
+            "(TorchScript, skwantyzowany int8 lub ONNX) obok pliku .pth")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=['torchscript', 'quantized', 'onnx'],
+            default='torchscript',
+            help="Format eksportowanego modelu (domyślnie: torchscript)"
+        )
+        parser.add_argument(
+            '--if-stale',
+            action='store_true',
+            help="Eksportuj tylko, jeśli artefakt nie istnieje, jest starszy niż wagi .pth lub parametry "
+                 "normalizacji albo (TorchScript) ma inne ustawienie FOLD_NORMALIZATION lub brak metod overlap "
+                 "inference"
+        )
+
+    def handle(self, *args, **options):
+        # TorchScript z normalizacją wbudowaną zgodnie z konfiguracją serwisu (STRESS_FOLD_NORMALIZATION)
+        config = getattr(settings, 'STRESS_CLASSIFICATION', {})
+        service = StressClassificationService(model_format='eager',
+                                              fold_normalization=config.get('FOLD_NORMALIZATION', True))
+        exporters = {
+            'torchscript': ("TorchScript", service._get_torchscript_path, service._torchscript_is_current,
+                            service.export_torchscript),
+            'quantized': ("skwantyzowany (int8)", service._get_quantized_path,
+                          lambda: service._artifact_is_current(service._get_quantized_path()), service.export_quantized),
+            'onnx': ("ONNX", service._get_onnx_path,
+                     lambda: service._artifact_is_current(service._get_onnx_path()), service.export_onnx),
+        }
+        label, get_path, is_current, export = exporters[options['format']]
+
+        if options['if_stale'] and is_current():
+            self.stdout.write(f"Model {label} jest aktualny: {get_path()}")
+            return
+
+        try:
+            path = export()
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Zapisano model {label}: {path}"))
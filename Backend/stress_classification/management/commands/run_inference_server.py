@@ -0,0 +1,58 @@
+import logging
+
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from stress_classification.inference_server import InferenceServer, InferenceServerError
+from stress_classification.ml_service import MODEL_FORMATS, StressClassificationService
+
+
+class Command(BaseCommand):
+    help = ("Uruchamia pulę procesów inferencji klasyfikacji stresu za gniazdem Unix "
+            "(model ładowany raz na proces, współdzielony przez wszystkie workery gunicorna)")
+
+    def add_arguments(self, parser):
+        config = getattr(settings, 'STRESS_CLASSIFICATION', {})
+        parser.add_argument('--socket', default=config.get('INFERENCE_SOCKET') or None,
+                            help="Ścieżka gniazda Unix (domyślnie: STRESS_INFERENCE_SOCKET)")
+        parser.add_argument('--workers', type=int, default=config.get('INFERENCE_WORKERS', 0),
+                            help="Liczba procesów inferencji (0 = jeden na dwa rdzenie)")
+        parser.add_argument('--threads-per-worker', type=int,
+                            default=config.get('INFERENCE_THREADS_PER_WORKER', 0),
+                            help="Wątki intra-op PyTorch / ONNX Runtime na proces (0 = rdzenie / procesy)")
+        parser.add_argument('--format', choices=MODEL_FORMATS, default=config.get('MODEL_FORMAT', 'auto'),
+                            help="Format modelu (domyślnie: STRESS_MODEL_FORMAT)")
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError("Podaj --socket lub ustaw STRESS_INFERENCE_SOCKET")
+
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(levelname)s %(message)s')
+        config = getattr(settings, 'STRESS_CLASSIFICATION', {})
+        model_format = options['format']
+
+        def service_factory(threads):
+            # Wywoływane w procesie roboczym (po fork) - wątki ustawiane przed pierwszą operacją PyTorch
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+            return StressClassificationService(
+                batching=True,
+                max_batch_size=config.get('MAX_BATCH_SIZE', 256),
+                max_wait_ms=config.get('MAX_WAIT_MS', 2.0),
+                model_format=model_format,
+                onnx_threads=threads,
+                fold_normalization=config.get('FOLD_NORMALIZATION', True),
+            )
+
+        server = InferenceServer(
+            options['socket'], service_factory,
+            num_workers=options['workers'],
+            threads_per_worker=options['threads_per_worker'],
+        )
+        self.stdout.write(f"Serwer inferencji: {options['socket']} ({server.num_workers} proc. x "
+                          f"{server.threads_per_worker} wątków, format: {model_format})")
+        try:
+            server.serve_forever()
+        except InferenceServerError as e:
+            raise CommandError(str(e))
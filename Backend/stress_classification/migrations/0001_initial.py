@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-18 07:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import stress_classification.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassificationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('classification', 'Klasyfikacja stresu'), ('simulation', 'Symulacja wizyty')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('succeeded', 'Zakończone'), ('failed', 'Błąd'), ('cancelled', 'Anulowane')], default='pending', max_length=20)),
+                ('progress', models.FloatField(default=0.0, help_text='Postęp zadania (0.0-1.0)')),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Parametry zadania (bez surowych sygnałów)')),
+                ('result', models.JSONField(blank=True, encoder=stress_classification.models.ResultJSONEncoder, help_text='Wynik zadania po zakończeniu', null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Ostatnia zmiana statusu lub postępu')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classification_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'status'], name='stress_clas_user_id_267a5b_idx')],
+            },
+        ),
+    ]
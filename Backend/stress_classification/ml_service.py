@@ -2,16 +2,37 @@
 Microservice do klasyfikacji stresu używający wytrenowanego modelu CNN-LSTM.
 """
 import numpy as np
-import pandas as pd
-from scipy import signal
 from collections import Counter
 import torch
 import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
+import json
+import logging
 import os
+import threading
+
+from .adaptive_scan import DEFAULT_FIDELITY, FIDELITY_TIERS, AdaptiveScan
+from .batching import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, InferenceScheduler
+from .inference_server import DEFAULT_CLIENT_TIMEOUT_SEC, InferenceClient
+from .instrumentation import (
+    INSTRUMENTATION_MODES, InstrumentationStats, count, log_measurement, maybe_measure, stage,
+)
+from .onnx_backend import OnnxRuntimeModel, export_onnx
+from .overlap_inference import (
+    OVERLAP_METHODS, OVERLAP_MODES, overlap_forward, supports_overlap_inference, windows_to_recording,
+)
+from .preprocessing import (
+    DEFAULT_CHUNK_SEC,
+    aligned_length,
+    combine_signals,
+    count_windows,
+    iter_signal_windows,
+    resolve_sampling_rates,
+    segment_data,
+)
+from .result_cache import ResultCache, compute_cache_key, file_fingerprint
 
 # --- KONFIGURACJA PRZETWARZANIA ---
 TARGET_RATE = 4    # Hz - Docelowa częstotliwość próbkowania
@@ -19,10 +40,20 @@ WINDOW_SEC = 30    # Sekundy - Długość okna czasowego
 STEP_SEC = 10      # Sekundy - Przesunięcie okna (overlap: 20 sekund)
 
 # --- KONFIGURACJA MODELU ---
-BATCH_SIZE = 32
+BATCH_SIZE = 128  # Rozmiar wycinka okien w jednym forward passie
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 NUM_CLASSES = 4  # 0: Baseline, 1: Stress, 2: Amusement, 3: Meditation
 
+# Format modelu: 'auto' - TorchScript jeśli wyeksportowany i aktualny, inaczej eager PyTorch;
+# 'quantized' - dynamiczna kwantyzacja int8 warstw LSTM/Linear (tylko CPU, opcjonalnie);
+# 'onnx' - wyeksportowany model uruchamiany przez ONNX Runtime na CPU
+MODEL_FORMATS = ('auto', 'eager', 'torchscript', 'quantized', 'onnx')
+
+# Metadane eksportu zapisywane w artefakcie TorchScript (`_extra_files`)
+TORCHSCRIPT_METADATA = 'stress_model.json'
+
+logger = logging.getLogger(__name__)
+
 # Nazwy klas
 CLASS_NAMES = ['Baseline', 'Stress', 'Amusement', 'Meditation']
 CLASS_DESCRIPTIONS = {
@@ -53,29 +84,52 @@ CLASS_DESCRIPTIONS = {
 }
 
 
-def resample_signal(df_signal, original_rate, target_rate):
-    """Unifikuje częstotliwość próbkowania (downsampling) za pomocą SciPy resample."""
-    if original_rate == target_rate:
-        return df_signal
-    
-    num_samples_target = int(len(df_signal) * (target_rate / original_rate))
-    resampled_data = signal.resample(df_signal, num_samples_target)
-    return pd.DataFrame(resampled_data, columns=df_signal.columns)
+# Tablice do wektorowego mapowania predykcji na opisy klas
+CLASS_NAME_ARRAY = np.array(CLASS_NAMES, dtype=object)
+STRESS_LEVEL_ARRAY = np.array([CLASS_DESCRIPTIONS[i]['stress_level'] for i in range(NUM_CLASSES)], dtype=np.int64)
+LEVEL_NAME_ARRAY = np.array([CLASS_DESCRIPTIONS[i]['level_name'] for i in range(NUM_CLASSES)], dtype=object)
+
+# Tabela opisów klas w formacie kolumnowym (segmenty odwołują się do niej przez class_id)
+CLASS_TABLE = [
+    {
+        'class_id': i,
+        'class_name': CLASS_DESCRIPTIONS[i]['name'],
+        'description': CLASS_DESCRIPTIONS[i]['description'],
+        'stress_level': CLASS_DESCRIPTIONS[i]['stress_level'],
+        'level_name': CLASS_DESCRIPTIONS[i]['level_name'],
+    }
+    for i in range(NUM_CLASSES)
+]
 
 
-def segment_data(df_combined, target_rate, window_sec, step_sec):
-    """Segmentuje dane na okna czasowe."""
-    window_samples = window_sec * target_rate
-    step_samples = step_sec * target_rate
+def isoformat_offsets(start: datetime, offsets_seconds: np.ndarray) -> np.ndarray:
+    """
+    Zwraca `(start + timedelta(seconds=s)).isoformat()` dla tablicy przesunięć - wektorowo.
+    
+    Przesunięcia są całkowite, więc mikrosekundy i strefa czasowa są wspólne dla wszystkich
+    wartości; gdy przesunięcie strefy zmienia się w zakresie (np. zmiana czasu), używana
+    jest arytmetyka datetime dla każdej wartości.
+    """
+    offsets_seconds = np.asarray(offsets_seconds, dtype=np.int64)
+    if len(offsets_seconds) == 0:
+        return np.empty(0, dtype=object)
     
-    segments = []
+    if start.tzinfo is not None:
+        first = start + timedelta(seconds=int(offsets_seconds.min()))
+        last = start + timedelta(seconds=int(offsets_seconds.max()))
+        if first.utcoffset() != last.utcoffset():
+            return np.array([(start + timedelta(seconds=s)).isoformat() for s in offsets_seconds.tolist()],
+                            dtype=object)
     
-    for start in range(0, len(df_combined) - window_samples + 1, step_samples):
-        end = start + window_samples
-        data_segment = df_combined.iloc[start:end].values
-        segments.append(data_segment)
+    # Czas lokalny (ścienny) jak w arytmetyce datetime + timedelta
+    local_start = np.datetime64(start.replace(tzinfo=None), 'us')
+    unit = 'us' if start.microsecond else 's'
+    timestamps = np.datetime_as_string(local_start + offsets_seconds.astype('timedelta64[s]'), unit=unit)
     
-    return np.array(segments)
+    suffix = start.isoformat()[len(start.replace(tzinfo=None).isoformat()):]
+    if suffix:
+        timestamps = np.char.add(timestamps, suffix)
+    return timestamps
 
 
 def normalize_data(X, mean, std):
@@ -83,27 +137,14 @@ def normalize_data(X, mean, std):
     num_channels = X.shape[-1]
     X_flat = X.reshape(-1, num_channels)
     
-    # Normalizacja używając zapisanych parametrów
-    X_normalized = (X_flat - mean) / std
+    # Normalizacja używając zapisanych parametrów (w typie danych - float32 bez promocji do float64)
+    dtype = X_flat.dtype if np.issubdtype(X_flat.dtype, np.floating) else np.float64
+    X_normalized = (X_flat - np.asarray(mean, dtype=dtype)) / np.asarray(std, dtype=dtype)
     X_normalized = X_normalized.reshape(X.shape)
     
     return X_normalized
 
 
-class WESADDataset(Dataset):
-    """Niestandardowy Dataset dla przetworzonych danych WESAD."""
-    def __init__(self, X):
-        # X: (próbki, kroki_czasowe, kanały) -> (N, 120, 6)
-        # Przekształcamy do (próbki, kanały, kroki_czasowe), co jest standardem dla CNN
-        self.X = torch.from_numpy(X).float().permute(0, 2, 1) 
-        
-    def __len__(self):
-        return len(self.X)
-
-    def __getitem__(self, idx):
-        return self.X[idx]
-
-
 class CNNLSTMClassifier(nn.Module):
     """Łączona architektura CNN-LSTM dla szeregów czasowych."""
     
@@ -138,22 +179,176 @@ class CNNLSTMClassifier(nn.Module):
         )
 
     def forward(self, x):
-        x = self.cnn_layers(x)
+        x = self.cnn_features(x)
         x = x.transpose(1, 2)
-        lstm_out, (hn, cn) = self.lstm(x)
+        return self.sequence_logits(x)
+    
+    # Osobne etapy modelu dla overlap inference (overlap_inference.py) - @torch.jit.export, więc
+    # pozostają dostępne także w wyeksportowanym modelu TorchScript
+    @torch.jit.export
+    def cnn_features(self, x: torch.Tensor) -> torch.Tensor:
+        """Mapa cech części konwolucyjnej (N, kanały_cech, kroki) dla wejścia (N, kanały, T)."""
+        return self.cnn_layers(x)
+    
+    @torch.jit.export
+    def sequence_logits(self, features: torch.Tensor) -> torch.Tensor:
+        """Logity LSTM + klasyfikatora dla sekwencji cech (N, kroki, kanały_cech)."""
+        lstm_out, (hn, cn) = self.lstm(features)
         final_state = hn[-1]
-        logits = self.classifier(final_state)
-        return logits
+        return self.classifier(final_state)
+
+
+class NormalizedInputConv1d(nn.Module):
+    """
+    Conv1d z wbudowaną normalizacją Z-Score wejścia: conv((x - mean) / std) liczone na surowym x.
+    
+    Normalizacja jest afiniczna na kanał, więc wagi to W / std, a bias b - sum(W * mean / std).
+    Zerowe dopełnienie (padding) oryginalnej warstwy działa w przestrzeni znormalizowanej, czyli
+    odpowiada surowej wartości `mean` - pierwsze i ostatnie `padding` pozycje wyjścia dostają
+    stałą poprawkę za wagi trafiające w dopełnienie (`left_correction`, `right_correction`).
+    """
+    
+    def __init__(self, conv: nn.Conv1d, mean: np.ndarray, std: np.ndarray):
+        super().__init__()
+        if conv.stride != (1,) or conv.dilation != (1,) or conv.groups != 1 or conv.padding_mode != 'zeros':
+            raise ValueError("Wbudowanie normalizacji wymaga Conv1d ze stride=1, dilation=1, groups=1 i zerowym dopełnieniem")
+        padding = conv.padding[0]
+        kernel_size = conv.kernel_size[0]
+        
+        weight = conv.weight.detach().double()
+        bias = conv.bias.detach().double() if conv.bias is not None else torch.zeros(conv.out_channels, dtype=torch.float64)
+        scale = torch.as_tensor(1.0 / np.asarray(std, dtype=np.float64), device=weight.device)
+        shift = torch.as_tensor(np.asarray(mean, dtype=np.float64), device=weight.device) * scale
+        
+        self.conv = nn.Conv1d(conv.in_channels, conv.out_channels, kernel_size, padding=padding).to(conv.weight.device)
+        # Wkład stałej mean / std dla każdego kroku jądra (out, kernel)
+        shifted = (weight * shift[None, :, None]).sum(dim=1)
+        with torch.no_grad():
+            self.conv.weight.copy_(weight * scale[None, :, None])
+            self.conv.bias.copy_(bias - shifted.sum(dim=1))
+        
+        # Poprawki pozycji brzegowych: pozycja j od początku / końca trafia w dopełnienie
+        # krokami jądra [0, padding - j) / [kernel_size - padding + j, kernel_size)
+        self.padding = padding
+        self.register_buffer('left_correction', torch.stack(
+            [shifted[:, :padding - j].sum(dim=1) for j in range(padding)], dim=1).float()
+            if padding else torch.zeros(conv.out_channels, 0))
+        self.register_buffer('right_correction', torch.stack(
+            [shifted[:, kernel_size - padding + j:].sum(dim=1) for j in range(padding)], dim=1).float()
+            if padding else torch.zeros(conv.out_channels, 0))
+    
+    def forward(self, x):
+        out = self.conv(x)
+        if self.padding:
+            out[:, :, :self.padding] += self.left_correction
+            out[:, :, -self.padding:] += self.right_correction.flip(1)
+        return out
+
+
+def fold_normalization(model: nn.Module, mean: np.ndarray, std: np.ndarray) -> nn.Module:
+    """Zastępuje pierwszą warstwę `cnn_layers` warstwą `NormalizedInputConv1d` - model przyjmuje surowe okna."""
+    model.cnn_layers[0] = NormalizedInputConv1d(model.cnn_layers[0], mean, std)
+    return model
+
+
+def supports_normalization_folding(model) -> bool:
+    """Czy model to moduł PyTorch (eager lub skwantyzowany w locie) z Conv1d na początku `cnn_layers`."""
+    return (isinstance(model, nn.Module) and not isinstance(model, torch.jit.ScriptModule)
+            and isinstance(getattr(model, 'cnn_layers', None), nn.Sequential)
+            and isinstance(model.cnn_layers[0], nn.Conv1d))
+
+
+def script_model(model: nn.Module) -> torch.jit.ScriptModule:
+    """
+    Kompiluje model do TorchScript, zamraża wagi i optymalizuje graf pod inferencję na CPU.
+    
+    Metody `OVERLAP_METHODS` są zachowywane - model TorchScript obsługuje overlap inference.
+    """
+    model.eval()
+    frozen = torch.jit.freeze(torch.jit.script(model), preserved_attrs=list(OVERLAP_METHODS))
+    return torch.jit.optimize_for_inference(frozen, other_methods=list(OVERLAP_METHODS))
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """
+    Dynamiczna kwantyzacja int8 warstw LSTM i Linear (wagi int8, aktywacje kwantyzowane w locie).
+
+    Warstwy konwolucyjne zostają w float32 - kwantyzacja dynamiczna obejmuje tylko LSTM/Linear.
+    Działa wyłącznie na CPU.
+    """
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
 
 
 class StressClassificationService:
     """Serwis do klasyfikacji stresu."""
     
-    def __init__(self):
+    def __init__(self, batching: bool = False, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, model_format: str = 'auto',
+                 onnx_threads: int = 0, inference_socket: Optional[str] = None,
+                 result_cache: Optional[ResultCache] = None, chunk_sec: float = DEFAULT_CHUNK_SEC,
+                 overlap_inference: str = 'off', fold_normalization: bool = True,
+                 instrumentation: str = 'off', inference_timeout: float = DEFAULT_CLIENT_TIMEOUT_SEC):
+        if model_format not in MODEL_FORMATS:
+            raise ValueError(f"Nieznany format modelu: {model_format} (dostępne: {', '.join(MODEL_FORMATS)})")
+        if overlap_inference not in OVERLAP_MODES:
+            raise ValueError(f"Nieznany tryb overlap_inference: {overlap_inference} "
+                             f"(dostępne: {', '.join(OVERLAP_MODES)})")
+        if instrumentation not in INSTRUMENTATION_MODES:
+            raise ValueError(f"Nieznany tryb instrumentation: {instrumentation} "
+                             f"(dostępne: {', '.join(INSTRUMENTATION_MODES)})")
+        
+        self.model_format = model_format
+        self.onnx_threads = onnx_threads
+        self.loaded_format = None
         self.model = None
         self.mean = None
         self.std = None
         self.model_loaded = False
+        self._load_lock = threading.Lock()
+        self._model_version = None
+        
+        # Bufor wejściowy modelu ponownie używany między wywołaniami (osobny dla każdego wątku)
+        self._buffers = threading.local()
+        
+        # Cache wyników classify (klucz: skrót nagrania + parametry + wersja modelu)
+        self.result_cache = result_cache
+        
+        # Długość kawałka nagrania w przetwarzaniu blokowym classify (s)
+        self.chunk_sec = chunk_sec
+        
+        # Wspólna część konwolucyjna dla kolejnych okien nagrania ('off', 'exact', 'shared' - overlap_inference.py)
+        # - tryb żądany; faktycznie używany po załadowaniu modelu: `overlap_inference_active`
+        self.overlap_inference = overlap_inference
+        
+        # Normalizacja Z-Score wbudowana przy ładowaniu w pierwszą konwolucję (NormalizedInputConv1d) -
+        # predict podaje modelowi surowe okna; TorchScript - wbudowana przy eksporcie (export_torchscript),
+        # ONNX/zapisany model int8 - normalizacja osobno
+        self.fold_normalization = fold_normalization
+        self.normalization_folded = False
+        
+        # Pomiary etapów classify ('off' - tylko na żądanie `timings=True`, 'timings', 'memory' -
+        # instrumentation.py); zagregowane wyniki w `instrumentation_stats`
+        self.instrumentation = instrumentation
+        self.instrumentation_stats = InstrumentationStats()
+        
+        # Zdalna inferencja: predykcje wykonuje pula procesów serwera inferencji (run_inference_server),
+        # a ten proces nie ładuje modelu
+        self.inference_client = None
+        if inference_socket:
+            self.inference_client = InferenceClient(inference_socket, NUM_CLASSES, timeout=inference_timeout)
+            self.loaded_format = 'remote'
+            if overlap_inference != 'off':
+                logger.warning(f"overlap_inference={overlap_inference} nie działa z serwerem inferencji "
+                               f"- predykcja okno po oknie")
+        
+        # Mikro-batching: okna z równoległych żądań trafiają do wspólnych forward passów
+        self.scheduler = None
+        if batching and self.inference_client is None:
+            self.scheduler = InferenceScheduler(
+                self._forward, NUM_CLASSES,
+                max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+            )
         
     def _get_model_path(self):
         """Zwraca ścieżkę do modelu z folderu cnn w serwisie."""
@@ -161,111 +356,430 @@ class StressClassificationService:
         model_path = base_dir / 'cnn' / 'stress_classifier_multi_subject.pth'
         return model_path
     
+    def _get_torchscript_path(self):
+        """Zwraca ścieżkę do wyeksportowanego modelu TorchScript (obok pliku .pth)."""
+        return self._get_model_path().with_suffix('.torchscript.pt')
+    
+    def _get_quantized_path(self):
+        """Zwraca ścieżkę do zapisanego modelu skwantyzowanego int8 (TorchScript, obok pliku .pth)."""
+        return self._get_model_path().with_suffix('.quantized.pt')
+    
+    def _get_onnx_path(self):
+        """Zwraca ścieżkę do modelu wyeksportowanego do ONNX (obok pliku .pth)."""
+        return self._get_model_path().with_suffix('.onnx')
+    
+    def _artifact_is_current(self, artifact_path):
+        """Sprawdza, czy artefakt istnieje i nie jest starszy od wag .pth ani parametrów normalizacji."""
+        if not artifact_path.exists():
+            return False
+        sources = [path for path in (self._get_model_path(), self._get_norm_params_path()) if path.exists()]
+        return all(artifact_path.stat().st_mtime >= path.stat().st_mtime for path in sources)
+    
+    def _torchscript_is_current(self):
+        """
+        Sprawdza, czy artefakt TorchScript jest aktualny, wyeksportowany z tym samym `fold_normalization`
+        i z metodami overlap inference (`OVERLAP_METHODS`).
+        """
+        scripted_path = self._get_torchscript_path()
+        if not self._artifact_is_current(scripted_path):
+            return False
+        model, metadata = self._read_torchscript(scripted_path)
+        return (metadata.get('normalization_folded', False) == self.fold_normalization
+                and supports_overlap_inference(model))
+    
     def _get_norm_params_path(self):
         """Zwraca ścieżkę do parametrów normalizacji z folderu cnn w serwisie."""
         base_dir = Path(__file__).resolve().parent
         norm_path = base_dir / 'cnn' / 'normalization_params.npz'
         return norm_path
     
+    @property
+    def model_version(self) -> str:
+        """
+        Wersja modelu - skrót wag .pth i parametrów normalizacji oraz faktycznie załadowany format,
+        tryb overlap i folding (model jest ładowany przy pierwszym odczycie).
+        """
+        if self._model_version is None:
+            if self.inference_client is None:
+                self.load_model()
+            fingerprint = file_fingerprint(self._get_model_path(), self._get_norm_params_path())
+            version = f"{self.loaded_format}:{fingerprint}"
+            if self.overlap_inference_active == 'shared':
+                # Wyniki przybliżone - osobne wpisy cache
+                version += ':overlap-shared'
+            if self.normalization_folded:
+                # Normalizacja wbudowana w wagi - inne zaokrąglenia float32, osobne wpisy cache
+                version += ':folded'
+            self._model_version = version
+        return self._model_version
+    
+    @property
+    def overlap_inference_active(self) -> str:
+        """
+        Faktycznie używany tryb overlap inference - 'off', gdy predykcje wykonuje serwer inferencji
+        albo załadowany model nie obsługuje `OVERLAP_METHODS` (ONNX, starszy artefakt TorchScript).
+        """
+        if self.overlap_inference == 'off' or self.inference_client is not None:
+            return 'off'
+        self.load_model()
+        return self.overlap_inference if supports_overlap_inference(self.model) else 'off'
+    
     def load_model(self):
-        """Ładuje model i parametry normalizacji."""
+        """Ładuje model i parametry normalizacji (bezpieczne przy wielu wątkach)."""
         if self.model_loaded:
             return
         
+        with self._load_lock:
+            if not self.model_loaded:
+                self._load_model()
+    
+    def _load_model(self):
         model_path = self._get_model_path()
-        norm_path = self._get_norm_params_path()
         
         if not model_path.exists():
             raise FileNotFoundError(f"Model nie znaleziony: {model_path}")
         
+        self.mean, self.std = self._load_norm_params()
+        
+        scripted = self._load_torchscript_artifact()
+        
+        if self.model_format == 'quantized':
+            self.model = self._load_quantized_model(model_path)
+            self.loaded_format = 'quantized'
+        elif self.model_format == 'onnx':
+            onnx_path = self._get_onnx_path()
+            if not onnx_path.exists():
+                raise FileNotFoundError(
+                    f"Model ONNX nie znaleziony: {onnx_path} (uruchom: python manage.py export_stress_model --format onnx)"
+                )
+            self.model = OnnxRuntimeModel(onnx_path, intra_op_threads=self.onnx_threads)
+            self.loaded_format = 'onnx'
+        elif scripted is not None:
+            # Normalizację wbudowuje eksport (`export_torchscript`) - metadane artefaktu
+            self.model, self.normalization_folded = scripted
+            self.loaded_format = 'torchscript'
+        else:
+            self.model = self._build_eager_model(model_path)
+            self.loaded_format = 'eager'
+        
+        if self.fold_normalization and supports_normalization_folding(self.model):
+            self.model = fold_normalization(self.model, self.mean, self.std)
+            self.normalization_folded = True
+        
+        self.model.eval()
+        self.model_loaded = True
+        
+        if self.overlap_inference != 'off' and not supports_overlap_inference(self.model):
+            logger.warning(f"overlap_inference={self.overlap_inference} wymaga modelu z metodami "
+                           f"{', '.join(OVERLAP_METHODS)} (załadowano {self.loaded_format}; artefakt TorchScript - "
+                           f"uruchom: python manage.py export_stress_model) - predykcja okno po oknie")
+    
+    def _load_norm_params(self):
+        """Wczytuje parametry normalizacji Z-Score (mean, std) z pliku .npz."""
+        norm_path = self._get_norm_params_path()
         if not norm_path.exists():
             raise FileNotFoundError(f"Parametry normalizacji nie znalezione: {norm_path}")
         
-        # Ładowanie parametrów normalizacji
         norm_params = np.load(norm_path)
-        self.mean = norm_params['mean']
-        self.std = norm_params['std']
+        return norm_params['mean'], norm_params['std']
+    
+    @staticmethod
+    def _read_torchscript(scripted_path):
+        """Ładuje artefakt TorchScript i metadane jego eksportu (puste dla artefaktów bez metadanych)."""
+        extra_files = {TORCHSCRIPT_METADATA: ''}
+        model = torch.jit.load(str(scripted_path), map_location=DEVICE, _extra_files=extra_files)
+        return model, json.loads(extra_files[TORCHSCRIPT_METADATA] or '{}')
+    
+    def _load_torchscript_artifact(self):
+        """
+        Zwraca (model, czy normalizacja wbudowana) z artefaktu TorchScript albo None - wtedy model eager.
+        
+        'torchscript' - zawsze artefakt (brak pliku = błąd). 'auto' - tylko na CPU (graf jest
+        optymalizowany pod CPU), gdy artefakt jest aktualny i wyeksportowany z tym samym `fold_normalization`.
+        """
+        scripted_path = self._get_torchscript_path()
+        if self.model_format == 'torchscript':
+            if not scripted_path.exists():
+                raise FileNotFoundError(
+                    f"Model TorchScript nie znaleziony: {scripted_path} (uruchom: python manage.py export_stress_model)"
+                )
+            model, metadata = self._read_torchscript(scripted_path)
+            folded = metadata.get('normalization_folded', False)
+            if folded != self.fold_normalization:
+                logger.warning(f"Model TorchScript wyeksportowany z fold_normalization={folded} - ustawienie "
+                               f"fold_normalization={self.fold_normalization} pominięte")
+            return model, folded
         
-        # Inicjalizacja modelu
+        if self.model_format != 'auto' or DEVICE.type != 'cpu' or not scripted_path.exists():
+            return None
+        if not self._artifact_is_current(scripted_path):
+            logger.warning("Model TorchScript jest starszy niż wagi .pth lub parametry normalizacji - "
+                           "używam modelu eager")
+            return None
+        model, metadata = self._read_torchscript(scripted_path)
+        if metadata.get('normalization_folded', False) != self.fold_normalization:
+            logger.warning(f"Model TorchScript wyeksportowany z innym ustawieniem fold_normalization (oczekiwano "
+                           f"{self.fold_normalization}) - używam modelu eager (uruchom: python manage.py "
+                           f"export_stress_model)")
+            return None
+        return model, self.fold_normalization
+    
+    def _build_eager_model(self, model_path):
+        """Tworzy model CNN-LSTM w PyTorch i ładuje wagi ze state_dict."""
         num_channels = 6
         seq_len = 120
         
-        self.model = CNNLSTMClassifier(
+        model = CNNLSTMClassifier(
             num_channels=num_channels,
             seq_len=seq_len,
             num_classes=NUM_CLASSES
         ).to(DEVICE)
         
         # Ładowanie wag modelu
-        self.model.load_state_dict(torch.load(model_path, map_location=DEVICE))
-        self.model.eval()
-        self.model_loaded = True
+        model.load_state_dict(torch.load(model_path, map_location=DEVICE))
+        model.eval()
+        return model
+    
+    def _load_quantized_model(self, model_path):
+        """Ładuje zapisany model int8, a gdy go brak (lub jest nieaktualny) - kwantyzuje wagi przy starcie."""
+        if DEVICE.type != 'cpu':
+            raise ValueError("Model skwantyzowany (int8) działa tylko na CPU")
+        
+        quantized_path = self._get_quantized_path()
+        if self._artifact_is_current(quantized_path):
+            return torch.jit.load(str(quantized_path), map_location=DEVICE)
+        
+        if quantized_path.exists():
+            logger.warning("Model skwantyzowany jest starszy niż wagi .pth - kwantyzuję przy ładowaniu")
+        return quantize_model(self._build_eager_model(model_path))
+    
+    def export_torchscript(self) -> Path:
+        """
+        Eksportuje zamrożony, zoptymalizowany model TorchScript obok pliku .pth.
+        
+        Przy `fold_normalization` normalizacja jest wbudowywana przed kompilacją (zamrożonego
+        grafu nie da się już zmodyfikować); informacja o tym trafia do metadanych artefaktu.
+        """
+        model_path = self._get_model_path()
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model nie znaleziony: {model_path}")
+        
+        model = self._build_eager_model(model_path)
+        if self.fold_normalization:
+            model = fold_normalization(model, *self._load_norm_params())
+        metadata = {'normalization_folded': self.fold_normalization}
+        
+        scripted_path = self._get_torchscript_path()
+        torch.jit.save(script_model(model), str(scripted_path),
+                       _extra_files={TORCHSCRIPT_METADATA: json.dumps(metadata)})
+        return scripted_path
     
-    def preprocess_signals(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray) -> np.ndarray:
-        """Przetwarza surowe sygnały i zwraca dane gotowe do klasyfikacji."""
-        # Konwersja do DataFrame
-        if acc.shape[1] != 3:
-            raise ValueError("ACC powinien mieć 3 kolumny (x, y, z)")
-        
-        df_acc = pd.DataFrame(acc, columns=['ACC_x', 'ACC_y', 'ACC_z'])
-        df_bvp = pd.DataFrame(bvp, columns=['BVP'])
-        df_eda = pd.DataFrame(eda, columns=['EDA'])
-        df_temp = pd.DataFrame(temp, columns=['TEMP'])
-        
-        # Downsampling do 4 Hz (zakładamy oryginalne częstotliwości)
-        df_acc_resampled = resample_signal(df_acc, 32, TARGET_RATE)
-        df_bvp_resampled = resample_signal(df_bvp, 64, TARGET_RATE)
-        df_eda_resampled = resample_signal(df_eda, 4, TARGET_RATE)
-        df_temp_resampled = resample_signal(df_temp, 4, TARGET_RATE)
-
-        # Ujednolicanie długości i połączenie
-        min_len = min(len(df_acc_resampled), len(df_bvp_resampled), 
-                     len(df_eda_resampled), len(df_temp_resampled))
-        
-        df_combined = pd.concat([
-            df_acc_resampled.iloc[:min_len],
-            df_bvp_resampled.iloc[:min_len],
-            df_eda_resampled.iloc[:min_len],
-            df_temp_resampled.iloc[:min_len]
-        ], axis=1)
+    def export_quantized(self) -> Path:
+        """Eksportuje model skwantyzowany dynamicznie (int8) jako TorchScript obok pliku .pth."""
+        model_path = self._get_model_path()
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model nie znaleziony: {model_path}")
+        
+        quantized_path = self._get_quantized_path()
+        quantized = quantize_model(self._build_eager_model(model_path).cpu())
+        torch.jit.save(torch.jit.script(quantized), str(quantized_path))
+        return quantized_path
+    
+    def export_onnx(self) -> Path:
+        """Eksportuje model do ONNX (zmienny rozmiar batcha) obok pliku .pth."""
+        model_path = self._get_model_path()
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model nie znaleziony: {model_path}")
+        
+        return export_onnx(self._build_eager_model(model_path), self._get_onnx_path(),
+                           num_channels=6, seq_len=WINDOW_SEC * TARGET_RATE)
+    
+    def preprocess_signals(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
+                           sampling_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Przetwarza surowe sygnały i zwraca wszystkie okna gotowe do klasyfikacji.
+        
+        Całe nagranie jest przetwarzane naraz - `classify` używa przetwarzania blokowego (`predict_signals`).
+        """
+        # Resampling do 4 Hz (z częstotliwości urządzenia) i połączenie kanałów w jeden bufor (T, 6)
+        combined = combine_signals(acc, bvp, eda, temp, TARGET_RATE, sampling_rates)
 
         # Segmentacja danych
-        X_segments = segment_data(df_combined, TARGET_RATE, WINDOW_SEC, STEP_SEC)
+        X_segments = segment_data(combined, TARGET_RATE, WINDOW_SEC, STEP_SEC)
         
         if len(X_segments) == 0:
             raise ValueError(f"Za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
         
         return X_segments
     
+    def predict_signals(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
+                        sampling_rates: Optional[Dict[str, float]] = None,
+                        progress: Optional[Callable[[float], None]] = None) -> tuple:
+        """
+        Przetwarzanie blokowe: resampling, segmentacja i predykcja kolejnymi kawałkami nagrania.
+        
+        Stan filtrów resamplingu i nakładanie okien (20 s) przechodzą przez granice kawałków
+        (`iter_signal_windows`), więc wynik jest taki sam jak `predict(preprocess_signals(...))`,
+        a pamięć pośrednia (float32 po resamplingu, znormalizowane okna, bufor wejściowy modelu)
+        zależy od `chunk_sec`, nie od długości nagrania. `progress(fraction)` - po każdym bloku.
+        """
+        num_windows = count_windows(aligned_length(acc, bvp, eda, temp, TARGET_RATE, sampling_rates),
+                                    TARGET_RATE, WINDOW_SEC, STEP_SEC)
+        if num_windows == 0:
+            raise ValueError(f"Za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
+        
+        predictions = np.empty(num_windows, dtype=np.int64)
+        probabilities = np.empty((num_windows, NUM_CLASSES), dtype=np.float32)
+        done = 0
+        for X_block in iter_signal_windows(acc, bvp, eda, temp, TARGET_RATE, WINDOW_SEC, STEP_SEC,
+                                           sampling_rates, self.chunk_sec):
+            count('blocks')
+            block_predictions, block_probabilities = self.predict_consecutive(X_block)
+            predictions[done:done + len(X_block)] = block_predictions
+            probabilities[done:done + len(X_block)] = block_probabilities
+            done += len(X_block)
+            if progress is not None:
+                progress(done / num_windows)
+        
+        return predictions, probabilities
+    
+    def scan_signals(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
+                     sampling_rates: Optional[Dict[str, float]] = None, fidelity: str = DEFAULT_FIDELITY,
+                     progress: Optional[Callable[[float], None]] = None) -> tuple:
+        """
+        Przetwarzanie blokowe z wybranym poziomem szczegółowości (`FIDELITY_TIERS`).
+        
+        Zwraca (predykcje, prawdopodobieństwa, inferred) - `inferred[i]` mówi, czy model
+        wykonał predykcję okna i, czy wynik wypełniono z sąsiedniego okna (adaptive_scan.py).
+        Dla 'full' wszystkie okna są przewidywane (`predict_signals`).
+        """
+        if fidelity not in FIDELITY_TIERS:
+            raise ValueError(f"Nieznany poziom szczegółowości: {fidelity} (dostępne: {', '.join(FIDELITY_TIERS)})")
+        tier = FIDELITY_TIERS[fidelity]
+        if tier is None:
+            predictions, probabilities = self.predict_signals(acc, bvp, eda, temp, sampling_rates, progress)
+            return predictions, probabilities, np.ones(len(predictions), dtype=bool)
+        
+        num_windows = count_windows(aligned_length(acc, bvp, eda, temp, TARGET_RATE, sampling_rates),
+                                    TARGET_RATE, WINDOW_SEC, STEP_SEC)
+        if num_windows == 0:
+            raise ValueError(f"Za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
+        
+        scan = AdaptiveScan(self.predict, num_windows, NUM_CLASSES, **tier)
+        for X_block in iter_signal_windows(acc, bvp, eda, temp, TARGET_RATE, WINDOW_SEC, STEP_SEC,
+                                           sampling_rates, self.chunk_sec):
+            count('blocks')
+            scan.push(X_block)
+            if progress is not None:
+                progress(scan.done / num_windows)
+        
+        return scan.predictions, scan.probabilities, scan.inferred
+    
+    def predict_consecutive(self, X_segments: np.ndarray) -> tuple:
+        """
+        Predykcja dla kolejnych okien jednego nagrania (przesuniętych o STEP_SEC).
+        
+        Przy włączonym `overlap_inference` część konwolucyjna modelu jest liczona raz dla
+        ciągłego fragmentu nagrania zamiast dla każdego okna osobno; gdy tryb nie jest aktywny
+        (`overlap_inference_active` - serwer inferencji, ONNX) i dla pojedynczego okna - jak `predict`.
+        """
+        if len(X_segments) < 2 or self.overlap_inference_active == 'off':
+            return self.predict(X_segments)
+        
+        return self._forward_overlapping(X_segments)
+    
     def predict(self, X_segments: np.ndarray) -> tuple:
         """Wykonuje predykcje dla segmentów."""
+        count('inferred_segments', len(X_segments))
+        if self.inference_client is not None:
+            count('remote_calls')
+            with stage('forward'):
+                return self.inference_client.predict(X_segments)
+        
         if not self.model_loaded:
             self.load_model()
         
-        # Normalizacja
-        X_normalized = normalize_data(X_segments, self.mean, self.std)
+        # Normalizacja (pomijana, gdy jest wbudowana w pierwszą konwolucję modelu)
+        with stage('normalization'):
+            X_normalized = self._normalize(X_segments)
+        
+        if self.scheduler is not None:
+            # Batche schedulera są wspólne dla żądań - liczone w statystykach schedulera
+            count('scheduler_submits')
+            with stage('forward'):
+                return self.scheduler.submit(X_normalized)
         
-        # Tworzenie datasetu i dataloadera
-        dataset = WESADDataset(X_normalized)
-        dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=False)
+        with stage('forward'):
+            return self._forward(X_normalized)
+    
+    def _normalize(self, X: np.ndarray) -> np.ndarray:
+        """Wejście modelu: okna bez zmian przy wbudowanej normalizacji, inaczej `normalize_data`."""
+        if self.normalization_folded:
+            return X
+        return normalize_data(X, self.mean, self.std)
+    
+    def _get_input_buffer(self, num_windows: int, num_channels: int, seq_len: int) -> torch.Tensor:
+        """Zwraca bufor wejściowy (N, kanały, kroki) wątku - nowa alokacja tylko, gdy obecny jest za mały."""
+        buffer = getattr(self._buffers, 'inputs', None)
+        if buffer is None or len(buffer) < num_windows or buffer.shape[1:] != (num_channels, seq_len):
+            buffer = torch.empty((num_windows, num_channels, seq_len), dtype=torch.float32, device=DEVICE)
+            self._buffers.inputs = buffer
+        return buffer[:num_windows]
+    
+    def _forward(self, X_normalized: np.ndarray) -> tuple:
+        """
+        Predykcja dla znormalizowanych okien (N, kroki_czasowe, kanały) - przy wbudowanej
+        normalizacji (`normalization_folded`) okna są surowe.
         
-        # Predykcja
-        all_predictions = []
-        all_probabilities = []
+        Okna są kopiowane jednym wywołaniem do ciągłego bufora float32 (N, kanały, kroki_czasowe),
+        a model przetwarza go w wycinkach po BATCH_SIZE okien; wyniki trafiają do
+        prealokowanych tablic predykcji i prawdopodobieństw.
+        """
+        num_windows = len(X_normalized)
+        predictions = np.empty(num_windows, dtype=np.int64)
+        probabilities = np.empty((num_windows, NUM_CLASSES), dtype=np.float32)
+        if num_windows == 0:
+            return predictions, probabilities
         
-        with torch.no_grad():
-            for inputs in dataloader:
-                inputs = inputs.to(DEVICE)
-                outputs = self.model(inputs)
-                
-                # Oblicz prawdopodobieństwa (softmax)
-                probabilities = torch.softmax(outputs, dim=1)
-                _, predicted = torch.max(outputs.data, 1)
-                
-                all_predictions.extend(predicted.cpu().numpy())
-                all_probabilities.extend(probabilities.cpu().numpy())
-        
-        return np.array(all_predictions), np.array(all_probabilities)
+        inputs = self._get_input_buffer(num_windows, X_normalized.shape[2], X_normalized.shape[1])
+        # (N, kroki, kanały) -> (N, kanały, kroki) z konwersją do float32 w jednej kopii; na CPU przez
+        # NumPy - surowe okna (wbudowana normalizacja) to widok tylko do odczytu z segment_data
+        if inputs.device.type == 'cpu':
+            np.copyto(inputs.numpy(), np.asarray(X_normalized).transpose(0, 2, 1), casting='same_kind')
+        else:
+            inputs.copy_(torch.from_numpy(np.ascontiguousarray(X_normalized)).permute(0, 2, 1))
+        
+        predictions_out = torch.from_numpy(predictions)
+        probabilities_out = torch.from_numpy(probabilities)
+        with torch.inference_mode():
+            for start in range(0, num_windows, BATCH_SIZE):
+                end = min(start + BATCH_SIZE, num_windows)
+                count('batches')
+                outputs = self.model(inputs[start:end])
+                probabilities_out[start:end] = torch.softmax(outputs, dim=1)
+                predictions_out[start:end] = torch.argmax(outputs, dim=1)
+        
+        return predictions, probabilities
+    
+    def _forward_overlapping(self, X_segments: np.ndarray) -> tuple:
+        """Predykcja kolejnych okien ze wspólną mapą cech CNN (`overlap_forward`)."""
+        step_samples = STEP_SEC * TARGET_RATE
+        count('inferred_segments', len(X_segments))
+        with stage('segmentation'):
+            recording = windows_to_recording(X_segments, step_samples)
+        with stage('normalization'):
+            recording = self._normalize(recording)
+        count('batches', -(-len(X_segments) // BATCH_SIZE))
+        
+        with stage('forward'), torch.inference_mode():
+            # (T, kanały) -> (1, kanały, T) float32
+            inputs = torch.from_numpy(np.ascontiguousarray(recording.T, dtype=np.float32)).unsqueeze(0).to(DEVICE)
+            outputs = overlap_forward(self.model, inputs, len(X_segments), WINDOW_SEC * TARGET_RATE,
+                                      step_samples, mode=self.overlap_inference, batch_size=BATCH_SIZE)
+            probabilities = torch.softmax(outputs, dim=1).cpu().numpy()
+            predictions = torch.argmax(outputs, dim=1).cpu().numpy()
+        
+        return predictions, probabilities
     
     def analyze_stress_level(self, predictions: np.ndarray, probabilities: np.ndarray, 
                             start_timestamp: Optional[datetime] = None) -> Dict:
@@ -303,67 +817,140 @@ class StressClassificationService:
         
         return {
             'num_segments': num_segments,
-            'dominant_class': int(dominant_class),
+            'dominant_class': dominant_class,
             'dominant_class_name': CLASS_NAMES[dominant_class],
-            'dominant_percentage': float(dominant_percentage),
-            'class_distribution': {int(k): int(v) for k, v in class_counts.items()},
-            'mean_probabilities': {CLASS_NAMES[i]: float(mean_probs[i]) for i in range(4)},
-            'stress_segments': int(stress_segments),
-            'stress_percentage': float(stress_percentage),
+            'dominant_percentage': dominant_percentage,
+            'class_distribution': dict(class_counts),
+            'mean_probabilities': {CLASS_NAMES[i]: mean_probs[i] for i in range(4)},
+            'stress_segments': stress_segments,
+            'stress_percentage': stress_percentage,
             'overall_stress_level': overall_stress_level,
-            'stress_value': int(stress_value),
-            'total_time_seconds': int(num_segments * STEP_SEC)
+            'stress_value': stress_value,
+            'total_time_seconds': num_segments * STEP_SEC
         }
     
-    def generate_json_output(self, predictions: np.ndarray, probabilities: np.ndarray, 
-                           results: Dict, start_timestamp: Optional[datetime] = None) -> Dict:
-        """Generuje strukturę JSON z wynikami klasyfikacji dla frontendu."""
+    def build_segment_columns(self, predictions: np.ndarray, probabilities: np.ndarray,
+                              start_timestamp: datetime, first_index: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Liczy kolumny wyników segmentów jednym wektorowym przebiegiem (bez pętli po segmentach).
         
-        # Jeśli nie podano timestampu, użyj aktualnego czasu
-        if start_timestamp is None:
-            start_timestamp = datetime.now()
+        Zwraca tablice: timestamp, timestamp_end, time_seconds, class_id, class_name,
+        stress_level, stress_level_name, confidence oraz macierz probabilities (N, 4).
+        """
+        predictions = np.asarray(predictions, dtype=np.int64)
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(len(predictions), NUM_CLASSES)
+        time_seconds = (first_index + np.arange(len(predictions), dtype=np.int64)) * STEP_SEC
         
-        # Generuj listę wszystkich segmentów z timestampami
-        segments = []
-        stress_moments = []
+        return {
+            'timestamp': isoformat_offsets(start_timestamp, time_seconds),
+            'timestamp_end': isoformat_offsets(start_timestamp, time_seconds + WINDOW_SEC),
+            'time_seconds': time_seconds,
+            'class_id': predictions,
+            'class_name': CLASS_NAME_ARRAY[predictions],
+            'stress_level': STRESS_LEVEL_ARRAY[predictions],
+            'stress_level_name': LEVEL_NAME_ARRAY[predictions],
+            'confidence': probabilities[np.arange(len(predictions)), predictions],
+            'probabilities': probabilities,
+        }
+    
+    def build_segments(self, predictions: np.ndarray, probabilities: np.ndarray,
+                       start_timestamp: datetime, first_index: int = 0) -> tuple:
+        """
+        Buduje listę segmentów z timestampami oraz listę momentów stresu.
         
-        for i in range(len(predictions)):
-            segment_start_time = start_timestamp + timedelta(seconds=i * STEP_SEC)
-            segment_end_time = segment_start_time + timedelta(seconds=WINDOW_SEC)
-            
-            predicted_class = int(predictions[i])
-            class_name = CLASS_NAMES[predicted_class]
-            stress_level = CLASS_DESCRIPTIONS[predicted_class]['stress_level']
-            
-            segment_data = {
-                'timestamp': segment_start_time.isoformat(),
-                'timestamp_end': segment_end_time.isoformat(),
-                'time_seconds': i * STEP_SEC,
+        `first_index` to numer pierwszego segmentu w nagraniu (używany przy
+        klasyfikacji strumieniowej, gdzie segmenty przychodzą partiami).
+        Wartości są liczone wektorowo (`build_segment_columns`), a słowniki
+        powstają dopiero na końcu - z gotowych list Pythona.
+        """
+        columns = self.build_segment_columns(predictions, probabilities, start_timestamp, first_index)
+        
+        # Słowniki prawdopodobieństw są współdzielone przez segment i moment stresu
+        probability_dicts = [dict(zip(CLASS_NAMES, row)) for row in columns['probabilities'].tolist()]
+        
+        segments = [
+            {
+                'timestamp': timestamp,
+                'timestamp_end': timestamp_end,
+                'time_seconds': time_seconds,
                 'duration_seconds': WINDOW_SEC,
-                'class_id': predicted_class,
+                'class_id': class_id,
                 'class_name': class_name,
                 'stress_level': stress_level,
-                'stress_level_name': CLASS_DESCRIPTIONS[predicted_class]['level_name'],
-                'probabilities': {
-                    CLASS_NAMES[j]: float(probabilities[i][j]) for j in range(4)
-                },
-                'confidence': float(probabilities[i][predicted_class])
+                'stress_level_name': level_name,
+                'probabilities': probs,
+                'confidence': confidence
             }
-            segments.append(segment_data)
-            
-            # Jeśli to segment ze stresem, dodaj do stress_moments
-            if predicted_class == 1:  # Stress
-                stress_moments.append({
-                    'timestamp': segment_start_time.isoformat(),
-                    'timestamp_end': segment_end_time.isoformat(),
-                    'time_seconds': i * STEP_SEC,
-                    'duration_seconds': WINDOW_SEC,
-                    'stress_level': stress_level,
-                    'confidence': float(probabilities[i][predicted_class]),
-                    'probabilities': {
-                        CLASS_NAMES[j]: float(probabilities[i][j]) for j in range(4)
-                    }
-                })
+            for timestamp, timestamp_end, time_seconds, class_id, class_name, stress_level, level_name, probs, confidence
+            in zip(columns['timestamp'].tolist(), columns['timestamp_end'].tolist(),
+                   columns['time_seconds'].tolist(), columns['class_id'].tolist(),
+                   columns['class_name'].tolist(), columns['stress_level'].tolist(),
+                   columns['stress_level_name'].tolist(), probability_dicts,
+                   columns['confidence'].tolist())
+        ]
+        
+        # Momenty stresu - segmenty klasy 1 (Stress)
+        stress_moments = [
+            {
+                'timestamp': segments[i]['timestamp'],
+                'timestamp_end': segments[i]['timestamp_end'],
+                'time_seconds': segments[i]['time_seconds'],
+                'duration_seconds': WINDOW_SEC,
+                'stress_level': segments[i]['stress_level'],
+                'confidence': segments[i]['confidence'],
+                'probabilities': segments[i]['probabilities']
+            }
+            for i in np.flatnonzero(columns['class_id'] == 1).tolist()
+        ]
+        
+        return segments, stress_moments
+    
+    def build_columnar_segments(self, predictions: np.ndarray, probabilities: np.ndarray) -> tuple:
+        """
+        Buduje segmenty w formacie kolumnowym: równoległe tablice zamiast listy obiektów.
+        
+        Nazwy klas i poziomy stresu są w tabeli `classes` (CLASS_TABLE), a timestampy
+        wynikają z `metadata.start_timestamp` + `time_seconds`. Momenty stresu to
+        indeksy segmentów klasy 1 (Stress). Kolumny są tablicami NumPy - renderer
+        orjson serializuje je bez konwersji na listy Pythona.
+        """
+        predictions = np.asarray(predictions, dtype=np.int64)
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(len(predictions), NUM_CLASSES)
+        
+        segments = {
+            'time_seconds': np.arange(len(predictions), dtype=np.int64) * STEP_SEC,
+            'class_id': predictions,
+            'confidence': probabilities[np.arange(len(predictions)), predictions],
+            'probabilities': probabilities,
+        }
+        stress_moments = {
+            'segment_index': np.flatnonzero(predictions == 1),
+        }
+        return segments, stress_moments
+    
+    def generate_json_output(self, predictions: np.ndarray, probabilities: np.ndarray, 
+                           results: Dict, start_timestamp: Optional[datetime] = None,
+                           columnar: bool = False, fidelity: str = DEFAULT_FIDELITY,
+                           inferred: Optional[np.ndarray] = None) -> Dict:
+        """
+        Generuje strukturę JSON z wynikami klasyfikacji dla frontendu.
+        
+        `columnar=True` - segmenty jako równoległe tablice (`build_columnar_segments`)
+        z tabelą opisów klas; metadane, podsumowanie i statystyki są takie same.
+        Poza poziomem 'full' segmenty mają pole `inferred` (predykcja modelu vs wynik
+        wypełniony z sąsiedniego okna), a metadane - `fidelity` i liczby obu rodzajów okien.
+        Liczby mogą być skalarami / tablicami NumPy - serializuje je renderer API (orjson).
+        """
+        
+        # Jeśli nie podano timestampu, użyj aktualnego czasu
+        if start_timestamp is None:
+            start_timestamp = datetime.now()
+        
+        # Generuj listę wszystkich segmentów z timestampami
+        if columnar:
+            segments, stress_moments = self.build_columnar_segments(predictions, probabilities)
+        else:
+            segments, stress_moments = self.build_segments(predictions, probabilities, start_timestamp)
         
         # Statystyki rozkładu klas
         class_statistics = []
@@ -373,9 +960,9 @@ class StressClassificationService:
             class_statistics.append({
                 'class_id': class_id,
                 'class_name': CLASS_NAMES[class_id],
-                'count': int(count),
-                'percentage': float(percentage),
-                'mean_probability': float(results['mean_probabilities'][CLASS_NAMES[class_id]])
+                'count': count,
+                'percentage': percentage,
+                'mean_probability': results['mean_probabilities'][CLASS_NAMES[class_id]]
             })
         
         # Struktura JSON
@@ -392,38 +979,119 @@ class StressClassificationService:
             'summary': {
                 'overall_stress_level': results['overall_stress_level'],
                 'overall_stress_value': results['stress_value'],
-                'stress_percentage': float(results['stress_percentage']),
+                'stress_percentage': results['stress_percentage'],
                 'stress_segments_count': results['stress_segments'],
                 'dominant_class': results['dominant_class_name'],
-                'dominant_class_percentage': float(results['dominant_percentage'])
+                'dominant_class_percentage': results['dominant_percentage']
             },
             'statistics': {
                 'class_distribution': class_statistics,
-                'mean_probabilities': {
-                    CLASS_NAMES[i]: float(results['mean_probabilities'][CLASS_NAMES[i]]) 
-                    for i in range(4)
-                }
+                'mean_probabilities': results['mean_probabilities']
             },
             'segments': segments,
             'stress_moments': stress_moments
         }
+        if columnar:
+            json_output['metadata']['format'] = 'columnar'
+            json_output['classes'] = CLASS_TABLE
+        
+        if fidelity != DEFAULT_FIDELITY and inferred is not None:
+            inferred = np.asarray(inferred, dtype=bool)
+            num_inferred = int(inferred.sum())
+            json_output['metadata'].update({
+                'fidelity': fidelity,
+                'inferred_segments': num_inferred,
+                'filled_segments': len(inferred) - num_inferred,
+            })
+            if columnar:
+                segments['inferred'] = inferred
+            else:
+                for segment, flag in zip(segments, inferred.tolist()):
+                    segment['inferred'] = flag
         
         return json_output
     
     def classify(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
-                start_timestamp: Optional[datetime] = None) -> Dict:
-        """Główna metoda klasyfikacji - przetwarza sygnały i zwraca JSON z wynikami."""
-        # Przetwarzanie sygnałów
-        X_segments = self.preprocess_signals(acc, bvp, eda, temp)
+                start_timestamp: Optional[datetime] = None,
+                sampling_rates: Optional[Dict[str, float]] = None,
+                columnar: bool = False,
+                progress: Optional[Callable[[float], None]] = None,
+                fidelity: str = DEFAULT_FIDELITY,
+                timings: bool = False,
+                cache: bool = True) -> Dict:
+        """
+        Główna metoda klasyfikacji - przetwarza sygnały i zwraca JSON z wynikami.
         
-        # Predykcja
-        predictions, probabilities = self.predict(X_segments)
+        `columnar=True` zwraca segmenty w formacie kolumnowym (patrz `generate_json_output`).
+        `fidelity` - poziom szczegółowości (`FIDELITY_TIERS`): 'full' przewiduje każde okno,
+        'adaptive' i 'overview' skanują zgrubnie (adaptive_scan.py).
+        `progress(fraction)` jest wywoływany po kolejnych etapach (zadania w tle) - wyjątek
+        zgłoszony w callbacku przerywa klasyfikację.
+        `timings=True` dodaje `metadata.timings` - czasy (i w trybie 'memory' szczytową pamięć)
+        etapów oraz liczniki okien i batchy; pomiary nie trafiają do cache wyników.
+        `cache=False` pomija cache wyników (np. losowe dane symulacji - klucz nigdy się nie powtórzy).
+        """
+        measured = timings or self.instrumentation != 'off'
+        with maybe_measure(measured, trace_memory=self.instrumentation == 'memory') as measurement:
+            json_output, cache_hit = self._classify(acc, bvp, eda, temp, start_timestamp, sampling_rates,
+                                                    columnar, progress, fidelity, cache)
+        if measurement is None:
+            return json_output
+        
+        self.instrumentation_stats.record(measurement)
+        log_measurement(measurement, model_version=self.model_version, fidelity=fidelity, cache_hit=cache_hit)
+        if timings:
+            # Cache przechowuje zserializowaną kopię wyniku - pomiary do niego nie trafiają
+            json_output['metadata']['timings'] = measurement.as_dict()
+        return json_output
+    
+    def _classify(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
+                  start_timestamp: Optional[datetime], sampling_rates: Optional[Dict[str, float]],
+                  columnar: bool, progress: Optional[Callable[[float], None]], fidelity: str,
+                  cache: bool = True) -> tuple:
+        """Etapy `classify`; zwraca (wynik JSON, czy wynik pochodzi z cache)."""
+        # Bez timestampu wynik zależy od chwili wywołania (datetime.now()), więc nie jest cache'owany
+        cache_key = None
+        if self.result_cache is not None and cache and start_timestamp is not None:
+            with stage('cache_lookup'):
+                cache_key = self.result_cache_key(acc, bvp, eda, temp, start_timestamp, sampling_rates, columnar,
+                                                  fidelity)
+                cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+        
+        # Przetwarzanie sygnałów i predykcja (blokowo - pamięć ograniczona długością kawałka)
+        predictions, probabilities, inferred = self.scan_signals(
+            acc, bvp, eda, temp, sampling_rates, fidelity,
+            progress=None if progress is None else lambda fraction: progress(0.9 * fraction)
+        )
         
         # Analiza wyników
-        results = self.analyze_stress_level(predictions, probabilities, start_timestamp)
+        with stage('analysis'):
+            results = self.analyze_stress_level(predictions, probabilities, start_timestamp)
         
         # Generowanie JSON
-        json_output = self.generate_json_output(predictions, probabilities, results, start_timestamp)
+        with stage('json_output'):
+            json_output = self.generate_json_output(predictions, probabilities, results, start_timestamp,
+                                                    columnar, fidelity, inferred)
         
-        return json_output
+        if cache_key is not None:
+            self.result_cache.put(cache_key, json_output)
+        
+        return json_output, False
+    
+    def result_cache_key(self, acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray,
+                         start_timestamp: datetime, sampling_rates: Optional[Dict[str, float]] = None,
+                         columnar: bool = False, fidelity: str = DEFAULT_FIDELITY) -> str:
+        """Klucz cache wyniku: surowe sygnały, timestamp, częstotliwości, wersja modelu, konfiguracja okien,
+        format i poziom szczegółowości."""
+        return compute_cache_key(
+            [acc, bvp, eda, temp],
+            start_timestamp=start_timestamp.isoformat(),
+            sampling_rates={name: float(rate) for name, rate in resolve_sampling_rates(sampling_rates).items()},
+            model_version=self.model_version,
+            window=[TARGET_RATE, WINDOW_SEC, STEP_SEC],
+            columnar=bool(columnar),
+            fidelity=fidelity,
+        )
 
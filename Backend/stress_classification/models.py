@@ -1,4 +1,68 @@
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Na razie nie potrzebujemy modeli, ale Django wymaga tego pliku
 
+class ResultJSONEncoder(DjangoJSONEncoder):
+    """Encoder wyników klasyfikacji - skalary i tablice NumPy jako liczby / listy."""
+
+    def default(self, o):
+        if isinstance(o, (np.ndarray, np.generic)):
+            return o.tolist()
+        return super().default(o)
+
+
+class ClassificationJob(models.Model):
+    """
+    Zadanie wykonywane w tle przez lokalną pulę procesów (klasyfikacja lub symulacja wizyty).
+
+    Proces roboczy aktualizuje status i postęp bezpośrednio w tej tabeli; anulowanie to
+    zmiana statusu, którą proces roboczy wykrywa przy kolejnej aktualizacji postępu.
+    """
+    KIND_CLASSIFICATION = 'classification'
+    KIND_SIMULATION = 'simulation'
+    KIND_CHOICES = [
+        (KIND_CLASSIFICATION, 'Klasyfikacja stresu'),
+        (KIND_SIMULATION, 'Symulacja wizyty'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Oczekuje'),
+        (STATUS_RUNNING, 'W trakcie'),
+        (STATUS_SUCCEEDED, 'Zakończone'),
+        (STATUS_FAILED, 'Błąd'),
+        (STATUS_CANCELLED, 'Anulowane'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='classification_jobs', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.FloatField(default=0.0, help_text="Postęp zadania (0.0-1.0)")
+    params = models.JSONField(default=dict, blank=True, help_text="Parametry zadania (bez surowych sygnałów)")
+    result = models.JSONField(blank=True, null=True, encoder=ResultJSONEncoder, help_text="Wynik zadania po zakończeniu")
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Ostatnia zmiana statusu lub postępu")
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', 'status'])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.id} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
@@ -0,0 +1,64 @@
+"""
+Backend inferencji ONNX Runtime (CPU) dla modelu klasyfikacji stresu.
+
+Model eksportowany jest do pojedynczego pliku `.onnx` (natywny operator LSTM),
+a `OnnxRuntimeModel` udostępnia sesję ONNX Runtime z takim samym interfejsem
+wywołania jak model PyTorch, więc serwis nie rozróżnia backendów przy predykcji.
+"""
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+INPUT_NAME = 'input'
+OUTPUT_NAME = 'logits'
+ONNX_OPSET = 17
+
+
+def export_onnx(model: nn.Module, path: Path, num_channels: int, seq_len: int) -> Path:
+    """Eksportuje model do ONNX ze zmiennym rozmiarem batcha (wymaga pakietu onnx)."""
+    model.eval()
+    example = torch.zeros(1, num_channels, seq_len)
+    torch.onnx.export(
+        model.cpu(), (example,), str(path),
+        input_names=[INPUT_NAME],
+        output_names=[OUTPUT_NAME],
+        dynamic_axes={INPUT_NAME: {0: 'batch'}, OUTPUT_NAME: {0: 'batch'}},
+        opset_version=ONNX_OPSET,
+        dynamo=False,
+    )
+    return path
+
+
+class OnnxRuntimeModel:
+    """
+    Sesja ONNX Runtime na CPU wywoływana jak model PyTorch: tensor (N, kanały, kroki) -> logity.
+
+    `intra_op_threads` to liczba wątków wewnątrz operatorów (0 = liczba rdzeni fizycznych).
+    Operatory wykonywane są sekwencyjnie, bez aktywnego oczekiwania wątków (spinning),
+    żeby bezczynna pula nie zajmowała CPU wątkom serwera.
+    """
+
+    def __init__(self, path: Path, intra_op_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("Backend 'onnx' wymaga pakietu onnxruntime (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, inputs: torch.Tensor) -> torch.Tensor:
+        batch = np.ascontiguousarray(inputs.detach().cpu().numpy(), dtype=np.float32)
+        logits = self.session.run([OUTPUT_NAME], {INPUT_NAME: batch})[0]
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
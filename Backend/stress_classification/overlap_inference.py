@@ -0,0 +1,83 @@
+"""
+Predykcja nakładających się okien ze wspólną częścią konwolucyjną modelu.
+
+Okna 30 s z krokiem 10 s pokrywają się w 2/3, więc przy predykcji okno po oknie każda
+próbka przechodzi przez `cnn_layers` modelu `CNNLSTMClassifier` trzy razy. Tutaj
+`cnn_layers` są liczone raz dla ciągłego fragmentu nagrania, sekwencje cech okien są
+wycinkami wspólnej mapy cech, a LSTM i klasyfikator działają osobno dla każdego okna.
+
+Geometria (okno 120 próbek, krok 40): dwie warstwy MaxPool1d(2) dają krok cech 4 próbek,
+więc okno k to kolumny [10k, 10k + 28) wspólnej mapy. Kroki 1..26 są identyczne jak przy
+predykcji okno po oknie. Różnią się tylko skrajne kroki 0 i 27: w oknie wpływa na nie zerowe
+dopełnienie (padding=1) na granicach okna, a we wspólnej mapie - rzeczywiste sąsiednie próbki.
+
+- `exact` - skrajne kroki są liczone ponownie z `EDGE_SAMPLES` pierwszych i ostatnich próbek
+  każdego okna (z tym samym dopełnieniem); wynik jest zgodny z predykcją okno po oknie
+  (różnice wyłącznie zaokrągleń float32, `EXACT_TOLERANCE`),
+- `shared` - skrajne kroki pochodzą ze wspólnej mapy; najtańsze, wynik przybliżony
+  (tolerancja sprawdzana przez `python manage.py check_overlap_inference`).
+"""
+import numpy as np
+import torch
+from torch import nn
+
+OVERLAP_MODES = ('off', 'exact', 'shared')
+
+# Metody modelu (CNNLSTMClassifier, zachowywane także w eksporcie TorchScript) wykonujące osobno
+# część konwolucyjną i LSTM + klasyfikator
+OVERLAP_METHODS = ('cnn_features', 'sequence_logits')
+
+# Łączny krok warstw MaxPool1d w cnn_layers (próbki wejścia na krok cech)
+FEATURE_STRIDE = 4
+
+# Próbki z początku/końca okna wystarczające do dokładnego odtworzenia skrajnego kroku cech
+EDGE_SAMPLES = 16
+
+# Maksymalna różnica prawdopodobieństw trybu `exact` względem predykcji okno po oknie
+EXACT_TOLERANCE = 1e-5
+
+
+def supports_overlap_inference(model) -> bool:
+    """
+    Czy model udostępnia `OVERLAP_METHODS` - eager, skwantyzowany i TorchScript z `export_stress_model`;
+    nie ONNX ani artefakty TorchScript wyeksportowane bez tych metod.
+    """
+    return isinstance(model, nn.Module) and all(hasattr(model, name) for name in OVERLAP_METHODS)
+
+
+def windows_to_recording(X_segments: np.ndarray, step_samples: int) -> np.ndarray:
+    """Odtwarza ciągły fragment nagrania (T, kanały) z kolejnych okien przesuniętych o `step_samples`."""
+    num_channels = X_segments.shape[2]
+    return np.concatenate([X_segments[0], X_segments[1:, -step_samples:].reshape(-1, num_channels)])
+
+
+def overlap_forward(model: nn.Module, recording: torch.Tensor, num_windows: int, window_samples: int,
+                    step_samples: int, mode: str = 'exact', batch_size: int = 128) -> torch.Tensor:
+    """
+    Logity dla `num_windows` kolejnych okien ciągłego, znormalizowanego fragmentu nagrania.
+
+    `recording` ma kształt (1, kanały, T), gdzie T = (num_windows - 1) * step_samples + window_samples.
+    LSTM i klasyfikator przetwarzają okna w wycinkach po `batch_size`.
+    """
+    if step_samples % FEATURE_STRIDE or (window_samples - EDGE_SAMPLES) % FEATURE_STRIDE:
+        raise ValueError(f"Krok i długość okna muszą być wielokrotnością {FEATURE_STRIDE} próbek")
+    if mode not in ('exact', 'shared'):
+        raise ValueError(f"Nieznany tryb: {mode}")
+
+    # Długość sekwencji cech jednego okna (28 dla 120 próbek)
+    feature_len = model.cnn_features(recording[:, :, :window_samples]).shape[-1]
+
+    # Wspólna mapa cech (kanały_cech, F) -> sekwencje okien (N, kroki, kanały_cech)
+    shared = model.cnn_features(recording)[0]
+    features = shared.unfold(1, feature_len, step_samples // FEATURE_STRIDE)[:, :num_windows]
+    features = features.permute(1, 2, 0).contiguous()
+
+    if mode == 'exact':
+        # Skrajne kroki z zerowym dopełnieniem okna - jeden forward dla początków i końców wszystkich okien
+        windows = recording[0].unfold(1, window_samples, step_samples)[:, :num_windows].permute(1, 0, 2)
+        edges = model.cnn_features(torch.cat([windows[:, :, :EDGE_SAMPLES], windows[:, :, -EDGE_SAMPLES:]]))
+        features[:, 0] = edges[:num_windows, :, 0]
+        features[:, -1] = edges[num_windows:, :, -1]
+
+    logits = [model.sequence_logits(features[start:start + batch_size]) for start in range(0, num_windows, batch_size)]
+    return torch.cat(logits)
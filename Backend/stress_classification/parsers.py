@@ -0,0 +1,168 @@
+"""
+Binarne przesyłanie sygnałów do klasyfikacji (bez walidacji każdej liczby w Pythonie).
+
+Dwa formaty żądania:
+- `application/octet-stream` - surowe próbki ACC, BVP, EDA, TEMP jedna po drugiej (C-order),
+  opis w nagłówku `X-Signals-Header` (JSON):
+  {"shapes": {"acc": [N, 3], "bvp": [M], "eda": [K], "temp": [L]}, "dtype": "<f4",
+   "metadata": {"sampling_rates": {...}}, "start_timestamp": "...", "fidelity": "full"}
+- `multipart/form-data` - plik `signals` (.npz z tablicami acc, bvp, eda, temp) albo osobne
+  pliki .npy `acc`, `bvp`, `eda`, `temp`; pola `metadata` (JSON), `start_timestamp` i `fidelity`.
+"""
+import json
+import zipfile
+
+import numpy as np
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .preprocessing import SIGNAL_DTYPE
+from .serializers import MAX_SIGNAL_LENGTH
+
+SIGNAL_NAMES = ('acc', 'bvp', 'eda', 'temp')
+# Liczba kolumn sygnałów w plikach .npy/.npz
+SIGNAL_COLUMNS = {'acc': 3, 'bvp': 1, 'eda': 1, 'temp': 1}
+# Maksymalny rozmiar tablicy po dekompresji (jak MAX_SIGNAL_LENGTH próbek float32 w JSON)
+MAX_ARRAY_BYTES = {name: MAX_SIGNAL_LENGTH * columns * 4 for name, columns in SIGNAL_COLUMNS.items()}
+SIGNALS_HEADER = 'HTTP_X_SIGNALS_HEADER'
+# Dozwolone typy próbek w surowym strumieniu (little-endian float32 / float64)
+RAW_DTYPES = ('<f4', '<f8')
+
+
+class SignalArrayParser(BaseParser):
+    """
+    Parser surowych próbek float (`application/octet-stream`).
+
+    Oczekiwany rozmiar ciała jest liczony z nagłówka i porównywany z Content-Length
+    przed odczytem; próbki są dekodowane przez `np.frombuffer` bez kopiowania.
+    Zwraca słownik tablic (acc, bvp, eda, temp) oraz `metadata` i `start_timestamp` z nagłówka.
+    """
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        meta = request.META if request is not None else {}
+
+        try:
+            header = json.loads(meta.get(SIGNALS_HEADER, ''))
+        except ValueError:
+            raise ParseError("Brak lub niepoprawny nagłówek X-Signals-Header (JSON z kształtami sygnałów)")
+        if not isinstance(header, dict) or not isinstance(header.get('shapes'), dict):
+            raise ParseError("Nagłówek X-Signals-Header musi zawierać słownik 'shapes'")
+
+        dtype = header.get('dtype', '<f4')
+        if dtype not in RAW_DTYPES:
+            raise ParseError(f"Nieobsługiwany typ próbek '{dtype}' (dozwolone: {', '.join(RAW_DTYPES)})")
+        dtype = np.dtype(dtype)
+
+        shapes = {}
+        for name in SIGNAL_NAMES:
+            shape = header['shapes'].get(name)
+            if (not isinstance(shape, list) or not shape
+                    or not all(isinstance(dim, int) and dim >= 0 for dim in shape)):
+                raise ParseError(f"Brak poprawnego kształtu sygnału '{name}' w X-Signals-Header")
+            shapes[name] = tuple(shape)
+
+        sizes = {name: int(np.prod(shape)) for name, shape in shapes.items()}
+        expected = sum(sizes.values()) * dtype.itemsize
+        content_length = int(meta.get('CONTENT_LENGTH') or 0)
+        if content_length != expected:
+            raise ParseError(f"Rozmiar ciała ({content_length} B) nie zgadza się z kształtami "
+                             f"z nagłówka ({expected} B)")
+
+        body = stream.read(expected) if stream is not None and expected else b''
+        if len(body) != expected:
+            raise ParseError("Niepełne ciało żądania")
+
+        values = np.frombuffer(body, dtype=dtype)
+        data = {}
+        offset = 0
+        for name in SIGNAL_NAMES:
+            data[name] = values[offset:offset + sizes[name]].reshape(shapes[name])
+            offset += sizes[name]
+
+        for key in ('metadata', 'start_timestamp', 'fidelity'):
+            if key in header:
+                data[key] = header[key]
+        return data
+
+
+def read_signal_array(fp, name):
+    """
+    Wczytuje tablicę .npy sygnału `name` po sprawdzeniu nagłówka.
+
+    Typ (tylko float32 / float64) i rozmiar (`MAX_ARRAY_BYTES`) są sprawdzane przed odczytem
+    danych - mały, silnie skompresowany plik .npz nie może zająć dowolnej ilości pamięci.
+    """
+    start = fp.tell()
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(fp)
+    elif version == (2, 0):
+        shape, _, dtype = np.lib.format.read_array_header_2_0(fp)
+    else:
+        raise ValueError(f"Nieobsługiwana wersja formatu .npy {version} ({name})")
+
+    if dtype.kind != 'f' or dtype.itemsize not in (4, 8):
+        raise ValueError(f"{name.upper()} musi zawierać liczby float32 lub float64 (typ tablicy: {dtype})")
+    size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    if size > MAX_ARRAY_BYTES[name]:
+        raise ValueError(f"{name.upper()} za duży: {size} B po dekompresji (limit {MAX_ARRAY_BYTES[name]} B)")
+
+    fp.seek(start)
+    return np.lib.format.read_array(fp, allow_pickle=False)
+
+
+def load_signal_files(files):
+    """
+    Wczytuje sygnały z plików multipart: `signals` (.npz) albo `acc`/`bvp`/`eda`/`temp` (.npy).
+
+    Tablice są wczytywane bez pickle, po sprawdzeniu typu i rozmiaru z nagłówka .npy
+    (`read_signal_array`); zwraca słownik nazwa -> tablica.
+    """
+    try:
+        if 'signals' in files:
+            with zipfile.ZipFile(files['signals']) as archive:
+                members = set(archive.namelist())
+                missing = [name for name in SIGNAL_NAMES if f'{name}.npy' not in members]
+                if missing:
+                    raise ValueError(f"Brak tablic w pliku .npz: {', '.join(missing)}")
+                arrays = {}
+                for name in SIGNAL_NAMES:
+                    with archive.open(f'{name}.npy') as member:
+                        arrays[name] = read_signal_array(member, name)
+                return arrays
+
+        missing = [name for name in SIGNAL_NAMES if name not in files]
+        if missing:
+            raise ValueError(f"Brak plików .npy: {', '.join(missing)} (albo jednego pliku .npz 'signals')")
+        return {name: read_signal_array(files[name], name) for name in SIGNAL_NAMES}
+    except (OSError, EOFError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Niepoprawny plik .npy/.npz: {e}")
+
+
+def validate_signal_arrays(signals):
+    """
+    Sprawdza wymiary, typ i skończoność sygnałów (wektorowo).
+
+    Tablice zmiennoprzecinkowe zostają bez kopii (widoki na treść żądania) - float64 jest
+    konwertowany do float32 kawałek po kawałku w przetwarzaniu blokowym; liczby całkowite
+    są konwertowane do float32. Komunikaty błędów są takie same jak dla sygnałów przesyłanych w JSON.
+    """
+    arrays = {}
+    for name in SIGNAL_NAMES:
+        data = np.asarray(signals[name])
+        if not (np.issubdtype(data.dtype, np.floating) or np.issubdtype(data.dtype, np.integer)):
+            raise ValueError(f"{name.upper()} musi zawierać liczby (typ tablicy: {data.dtype})")
+        arrays[name] = data if np.issubdtype(data.dtype, np.floating) else data.astype(SIGNAL_DTYPE)
+
+    if arrays['acc'].ndim != 2 or arrays['acc'].shape[1] != 3:
+        raise ValueError('ACC musi być tablicą 2D z 3 kolumnami (lista list [x, y, z])')
+    for name in SIGNAL_NAMES[1:]:
+        if arrays[name].ndim != 1:
+            raise ValueError(f'{name.upper()} musi być tablicą 1D')
+
+    for name, data in arrays.items():
+        if not np.isfinite(data).all():
+            raise ValueError(f"{name.upper()} zawiera wartości NaN lub nieskończone")
+    return arrays
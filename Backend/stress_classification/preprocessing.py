@@ -0,0 +1,413 @@
+"""
+Wspólne przetwarzanie sygnałów biometrycznych (bez zależności od Django).
+
+Moduł jest używany zarówno przez serwis klasyfikacji (`ml_service.py`),
+jak i przez skrypt `MachineLearningService/classify_stress.py`.
+"""
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+from .instrumentation import count, stage
+
+# Kolejność kanałów w połączonym buforze (T, 6)
+CHANNEL_NAMES = ['ACC_x', 'ACC_y', 'ACC_z', 'BVP', 'EDA', 'TEMP']
+NUM_CHANNELS = len(CHANNEL_NAMES)
+
+# Sygnały bransoletki i liczba kolumn każdego z nich (w kolejności kanałów bufora)
+SIGNALS = [('ACC', 3), ('BVP', 1), ('EDA', 1), ('TEMP', 1)]
+
+# Oryginalne częstotliwości próbkowania bransoletki (Empatica E4)
+DEFAULT_SAMPLING_RATES = {'ACC': 32, 'BVP': 64, 'EDA': 4, 'TEMP': 4}
+
+# Maksymalny mianownik przy zamianie częstotliwości na ułamek (np. 25.6 Hz -> 128/5)
+MAX_RATE_DENOMINATOR = 1000
+
+# Maksymalny współczynnik interpolacji/decymacji resamplingu - filtr ma 20 * współczynnik + 1
+# współczynników (do ~20 tys.). Częstotliwości o "nieskracalnym" ilorazie (np. 32.123 Hz -> 4000/32123)
+# wymagałyby filtrów z setkami tysięcy współczynników i są odrzucane.
+MAX_RESAMPLING_FACTOR = 1000
+
+# Liczba zapamiętanych filtrów resamplingu (pary częstotliwości)
+RESAMPLING_FILTER_CACHE_SIZE = 32
+
+# Długość kawałka nagrania (s) w przetwarzaniu blokowym (`iter_signal_windows`)
+DEFAULT_CHUNK_SEC = 600
+
+# Typ próbek w całym torze przetwarzania (resampling, bufory okien, wejście modelu)
+SIGNAL_DTYPE = np.float32
+
+
+def resolve_sampling_rates(sampling_rates=None):
+    """Uzupełnia częstotliwości podane w metadanych urządzenia wartościami domyślnymi."""
+    rates = dict(DEFAULT_SAMPLING_RATES)
+    for name, rate in (sampling_rates or {}).items():
+        if rate is None:
+            continue
+        if rate <= 0:
+            raise ValueError(f"Częstotliwość próbkowania {name} musi być dodatnia")
+        rates[name] = rate
+    return rates
+
+
+def resampling_factors(original_rate, target_rate):
+    """
+    Zwraca (up, down) - skrócone całkowite współczynniki interpolacji/decymacji.
+
+    Zgłasza ValueError, gdy większy z nich przekracza `MAX_RESAMPLING_FACTOR`.
+    """
+    ratio = (Fraction(target_rate).limit_denominator(MAX_RATE_DENOMINATOR)
+             / Fraction(original_rate).limit_denominator(MAX_RATE_DENOMINATOR))
+    up, down = ratio.numerator, ratio.denominator
+    if max(up, down) > MAX_RESAMPLING_FACTOR:
+        raise ValueError(f"Nieobsługiwana częstotliwość próbkowania {original_rate} Hz - resampling do "
+                         f"{target_rate} Hz wymaga współczynników {up}/{down} (maksimum {MAX_RESAMPLING_FACTOR})")
+    return up, down
+
+
+@lru_cache(maxsize=RESAMPLING_FILTER_CACHE_SIZE)
+def design_resampling_filter(original_rate, target_rate):
+    """
+    Projektuje filtr dolnoprzepustowy FIR dla resamplingu polifazowego.
+
+    Zwraca (up, down, h) - całkowite współczynniki interpolacji/decymacji oraz
+    współczynniki filtra (jak w `scipy.signal.resample_poly`). Ostatnio używane
+    filtry są zapamiętywane (`RESAMPLING_FILTER_CACHE_SIZE` par częstotliwości).
+    """
+    up, down = resampling_factors(original_rate, target_rate)
+
+    if up == down:
+        return up, down, None
+
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = signal.firwin(2 * half_len + 1, 1. / max_rate, window=('kaiser', 5.0))
+    h.flags.writeable = False
+    return up, down, h
+
+
+def resampled_length(num_samples, original_rate, target_rate):
+    """Zwraca liczbę próbek sygnału po zmianie częstotliwości próbkowania."""
+    up, down, _ = design_resampling_filter(original_rate, target_rate)
+    return -(-num_samples * up // down)
+
+
+def resample_signal(data, original_rate, target_rate, out=None):
+    """
+    Unifikuje częstotliwość próbkowania za pomocą filtracji polifazowej (SciPy resample_poly).
+
+    Koszt jest liniowy względem długości nagrania. Jeśli podano `out`, wynik
+    (przycięty do jego długości) jest zapisywany bezpośrednio do tego wycinka
+    bufora zamiast tworzyć nową tablicę.
+    """
+    up, down, h = design_resampling_filter(original_rate, target_rate)
+    if h is None:
+        resampled = data
+    else:
+        resampled = signal.resample_poly(data, up, down, axis=0, window=h)
+
+    if out is None:
+        return np.asarray(resampled)
+
+    out[...] = np.reshape(resampled[:len(out)], out.shape)
+    return out
+
+
+class StreamingResampler:
+    """
+    Resampler polifazowy przetwarzający sygnał kawałek po kawałku.
+
+    Między wywołaniami `process` przechowuje tylko ogon wejścia potrzebny filtrowi,
+    więc koszt jest proporcjonalny do nowych danych. Połączone wyniki `process`
+    i końcowego `flush` są zgodne z `resample_signal` dla całego nagrania (w granicach
+    dokładności float32 - bank filtrów, historia i wynik są w `SIGNAL_DTYPE`).
+    """
+
+    def __init__(self, original_rate, target_rate, num_channels=1):
+        self.up, self.down, h = design_resampling_filter(original_rate, target_rate)
+        self.num_channels = num_channels
+        self.received = 0
+        self.emitted = 0
+
+        if h is None:
+            return
+
+        # Bank filtrów polifazowych: wiersz p zawiera współczynniki h[p::up],
+        # odwrócone tak, aby mnożyć je przez okno wejścia w kolejności czasowej
+        self._delay = (len(h) - 1) // 2
+        self._taps = -(-len(h) // self.up)
+        bank = np.zeros((self.up, self._taps), dtype=SIGNAL_DTYPE)
+        for phase in range(self.up):
+            coefficients = h[phase::self.up] * self.up
+            bank[phase, :len(coefficients)] = coefficients
+        self._bank = bank[:, ::-1].copy()
+
+        # Historia wejścia poprzedzona zerami (jak w resample_poly)
+        self._history = np.zeros((self._taps - 1, num_channels), dtype=SIGNAL_DTYPE)
+        self._history_start = -(self._taps - 1)
+
+    def _input_index(self, output_index):
+        """Zwraca indeks ostatniej próbki wejściowej potrzebnej dla danej próbki wyjściowej."""
+        return (output_index * self.down + self._delay) // self.up
+
+    def _emit(self, total):
+        """Liczy próbki wyjściowe od `emitted` do `total` i przycina historię."""
+        count = total - self.emitted
+        output = np.empty((max(count, 0), self.num_channels), dtype=SIGNAL_DTYPE)
+        if count <= 0:
+            return output
+
+        # Okna o długości filtra; okno w kończy się na próbce history_start + w + taps - 1
+        windows = np.lib.stride_tricks.sliding_window_view(self._history, self._taps, axis=0)
+        for offset in range(min(self.up, count)):
+            output_index = self.emitted + offset
+            phase = (output_index * self.down + self._delay) % self.up
+            first = self._input_index(output_index) - (self._taps - 1) - self._history_start
+            num_outputs = len(range(offset, count, self.up))
+            # Co `up` próbek wyjściowych faza się powtarza, a wejście przesuwa o `down`
+            selected = windows[first:first + (num_outputs - 1) * self.down + 1:self.down]
+            output[offset::self.up] = selected @ self._bank[phase]
+
+        self.emitted = total
+        keep_from = self._input_index(self.emitted) - (self._taps - 1)
+        if keep_from > self._history_start:
+            self._history = self._history[keep_from - self._history_start:]
+            self._history_start = keep_from
+        return output
+
+    def process(self, chunk):
+        """Przyjmuje kolejny kawałek sygnału i zwraca wszystkie gotowe próbki wyjściowe."""
+        chunk = np.asarray(chunk, dtype=SIGNAL_DTYPE).reshape(len(chunk), self.num_channels)
+        self.received += len(chunk)
+
+        if self._is_identity():
+            self.emitted = self.received
+            return chunk
+
+        self._history = np.concatenate([self._history, chunk])
+        ready = (self.received * self.up - 1 - self._delay) // self.down + 1
+        return self._emit(max(ready, 0))
+
+    def flush(self):
+        """Kończy strumień - dopełnia wejście zerami i zwraca pozostałe próbki."""
+        total = -(-self.received * self.up // self.down)
+        if self._is_identity() or total <= self.emitted:
+            return np.empty((0, self.num_channels), dtype=SIGNAL_DTYPE)
+
+        missing = self._input_index(total - 1) - (self._history_start + len(self._history) - 1)
+        if missing > 0:
+            self._history = np.concatenate([self._history, np.zeros((missing, self.num_channels), dtype=SIGNAL_DTYPE)])
+        return self._emit(total)
+
+    def _is_identity(self):
+        return self.up == self.down
+
+
+def aligned_length(acc, bvp, eda, temp, target_rate, sampling_rates=None):
+    """Zwraca liczbę wspólnych próbek kanałów po resamplingu (najkrótszy kanał wyznacza długość)."""
+    rates = resolve_sampling_rates(sampling_rates)
+    return min(
+        resampled_length(len(data), rates[name], target_rate)
+        for (name, _), data in zip(SIGNALS, (acc, bvp, eda, temp))
+    )
+
+
+def count_windows(num_samples, target_rate, window_sec, step_sec):
+    """Zwraca liczbę pełnych okien w sygnale o `num_samples` próbkach."""
+    window_samples = int(window_sec * target_rate)
+    step_samples = int(step_sec * target_rate)
+    if num_samples < window_samples:
+        return 0
+    return (num_samples - window_samples) // step_samples + 1
+
+
+def combine_signals(acc, bvp, eda, temp, target_rate, sampling_rates=None):
+    """
+    Przepróbkowuje kanały ACC/BVP/EDA/TEMP i łączy je w jeden bufor (T, 6) float32.
+
+    Bufor jest alokowany raz, a każdy sygnał po resamplingu trafia bezpośrednio
+    do swojego wycinka - bez pośrednich DataFrame'ów i konkatenacji.
+    `sampling_rates` to częstotliwości z metadanych urządzenia (domyślnie Empatica E4).
+    """
+    acc = np.asarray(acc)
+    if acc.ndim != 2 or acc.shape[1] != 3:
+        raise ValueError("ACC powinien mieć 3 kolumny (x, y, z)")
+
+    rates = resolve_sampling_rates(sampling_rates)
+    channels = [
+        (acc, rates['ACC'], slice(0, 3)),
+        (np.asarray(bvp).reshape(-1, 1), rates['BVP'], slice(3, 4)),
+        (np.asarray(eda).reshape(-1, 1), rates['EDA'], slice(4, 5)),
+        (np.asarray(temp).reshape(-1, 1), rates['TEMP'], slice(5, 6)),
+    ]
+
+    # Ujednolicanie długości - najkrótszy kanał po resamplingu wyznacza T
+    num_samples = aligned_length(acc, bvp, eda, temp, target_rate, sampling_rates)
+
+    combined = np.empty((num_samples, NUM_CHANNELS), dtype=SIGNAL_DTYPE)
+    for data, rate, columns in channels:
+        resample_signal(data, rate, target_rate, out=combined[:, columns])
+
+    return combined
+
+
+def segment_data(signals, target_rate, window_sec, step_sec):
+    """
+    Segmentuje dane na okna czasowe bez kopiowania.
+
+    Zwraca widok tylko do odczytu o kształcie (okna, próbki_okna, kanały) na jednym
+    ciągłym buforze float32 - kolejne okna współdzielą pamięć zamiast być kopiowane.
+    """
+    window_samples = int(window_sec * target_rate)
+    step_samples = int(step_sec * target_rate)
+
+    data = np.ascontiguousarray(signals, dtype=SIGNAL_DTYPE)
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+
+    if len(data) < window_samples:
+        empty = np.empty((0, window_samples, data.shape[1]), dtype=SIGNAL_DTYPE)
+        empty.flags.writeable = False
+        return empty
+
+    # (okna, kanały, próbki_okna) -> (okna, próbki_okna, kanały), nadal widok
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_samples, axis=0)
+    return windows[::step_samples].swapaxes(1, 2)
+
+
+class WindowAssembler:
+    """
+    Składa pełne okna z kolejnych kawałków surowych sygnałów.
+
+    Każdy kanał ma własny `StreamingResampler`; próbki po resamplingu czekają, aż
+    pozostałe kanały je dogonią, a wyrównany bufor przechowuje tylko próbki od początku
+    następnego, niedomkniętego okna - nakładanie okien przechodzi przez granice kawałków.
+    Pamięć zależy od długości kawałka, a nie od długości całego nagrania.
+    """
+
+    def __init__(self, target_rate, window_sec, step_sec, sampling_rates=None):
+        self.target_rate = target_rate
+        self.window_sec = window_sec
+        self.step_sec = step_sec
+        self.step_samples = int(step_sec * target_rate)
+        self.sampling_rates = resolve_sampling_rates(sampling_rates)
+        self.num_windows = 0
+
+        self._resamplers = {
+            name: StreamingResampler(self.sampling_rates[name], target_rate, width)
+            for name, width in SIGNALS
+        }
+        # Próbki po resamplingu czekające, aż pozostałe sygnały dogonią dany kanał
+        self._pending = {name: np.empty((0, width), dtype=SIGNAL_DTYPE) for name, width in SIGNALS}
+        # Wyrównane próbki od początku następnego (jeszcze niedomkniętego) okna
+        self._tail = np.empty((0, NUM_CHANNELS), dtype=SIGNAL_DTYPE)
+
+    @property
+    def processed_samples(self):
+        """Liczba próbek (po resamplingu) wyrównanych we wszystkich kanałach."""
+        return self.num_windows * self.step_samples + len(self._tail)
+
+    def unaligned_samples(self, incoming=None):
+        """
+        Próbki (po resamplingu), o które najdłuższy kanał wyprzedza najkrótszy - dane czekające
+        na pozostałe kanały; `incoming` (nazwa -> liczba próbek) dolicza kawałek przed jego dodaniem.
+        """
+        incoming = incoming or {}
+        lengths = [len(samples) + incoming.get(name, 0) for name, samples in self._pending.items()]
+        return max(lengths) - min(lengths)
+
+    def push(self, signals):
+        """
+        Dodaje kawałek sygnałów (słownik z dowolnym podzbiorem ACC/BVP/EDA/TEMP).
+
+        Zwraca nowo domknięte okna (okna, próbki_okna, kanały) - widok tylko do odczytu.
+        """
+        with stage('resampling'):
+            for name, width in SIGNALS:
+                chunk = signals.get(name)
+                if chunk is None or len(chunk) == 0:
+                    continue
+                # Sygnały float64 (np. WESAD, binarne <f8) są konwertowane kawałek po kawałku
+                chunk = np.asarray(chunk, dtype=SIGNAL_DTYPE)
+                if chunk.ndim != (2 if width > 1 else 1) or (width > 1 and chunk.shape[1] != width):
+                    raise ValueError(f"Nieprawidłowy kształt sygnału {name}")
+                self._append_resampled(name, self._resamplers[name].process(chunk))
+
+        return self._completed_windows()
+
+    def flush(self):
+        """Kończy nagranie - opróżnia resamplery i zwraca ostatnie pełne okna."""
+        with stage('resampling'):
+            for name, _ in SIGNALS:
+                self._append_resampled(name, self._resamplers[name].flush())
+        return self._completed_windows()
+
+    def _append_resampled(self, name, samples):
+        if len(samples):
+            self._pending[name] = np.concatenate([self._pending[name], samples])
+
+    def _completed_windows(self):
+        with stage('segmentation'):
+            windows = self._segment_pending()
+        count('segments', len(windows))
+        return windows
+
+    def _segment_pending(self):
+        # Wyrównaj kanały - do ogona trafiają tylko próbki obecne we wszystkich sygnałach
+        ready = min(len(samples) for samples in self._pending.values())
+        if ready:
+            block = np.empty((ready, NUM_CHANNELS), dtype=SIGNAL_DTYPE)
+            column = 0
+            for name, width in SIGNALS:
+                block[:, column:column + width] = self._pending[name][:ready]
+                self._pending[name] = self._pending[name][ready:]
+                column += width
+            self._tail = np.concatenate([self._tail, block])
+
+        windows = segment_data(self._tail, self.target_rate, self.window_sec, self.step_sec)
+        if len(windows):
+            self.num_windows += len(windows)
+            # Zostaw tylko próbki od początku następnego okna (widok `windows` zachowuje stary bufor)
+            self._tail = self._tail[len(windows) * self.step_samples:].copy()
+        return windows
+
+
+def iter_signal_windows(acc, bvp, eda, temp, target_rate, window_sec, step_sec,
+                        sampling_rates=None, chunk_sec=DEFAULT_CHUNK_SEC):
+    """
+    Przetwarzanie blokowe nagrania: resampling i segmentacja kolejnymi kawałkami `chunk_sec` sekund.
+
+    Generator zwraca bloki pełnych okien (okna, próbki_okna, kanały); połączone bloki są
+    zgodne z `segment_data(combine_signals(...))`, ale naraz w pamięci jest tylko jeden
+    kawałek sygnałów po konwersji do float32 i okna z jednego kawałka. Sygnały mogą być
+    tablicami mapowanymi z dysku (`np.load(..., mmap_mode='r')`) - czytany jest tylko bieżący kawałek.
+    """
+    acc = np.asarray(acc)
+    if acc.ndim != 2 or acc.shape[1] != 3:
+        raise ValueError("ACC powinien mieć 3 kolumny (x, y, z)")
+
+    assembler = WindowAssembler(target_rate, window_sec, step_sec, sampling_rates)
+    # Kanały jednowymiarowe mogą mieć kształt (N, 1) jak w plikach WESAD - reshape to widok
+    signals = [(name, data if width > 1 else np.asarray(data).reshape(-1), assembler.sampling_rates[name])
+               for (name, width), data in zip(SIGNALS, (acc, bvp, eda, temp))]
+
+    # Granice kawałków liczone od początku nagrania osobno dla każdej częstotliwości
+    chunk = 0
+    while True:
+        blocks = {}
+        for name, data, rate in signals:
+            start = int(round(chunk * chunk_sec * rate))
+            end = int(round((chunk + 1) * chunk_sec * rate))
+            blocks[name] = data[start:end]
+        if not any(len(block) for block in blocks.values()):
+            break
+        windows = assembler.push(blocks)
+        if len(windows):
+            yield windows
+        chunk += 1
+
+    windows = assembler.flush()
+    if len(windows):
+        yield windows
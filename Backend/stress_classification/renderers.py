@@ -0,0 +1,25 @@
+"""
+Renderery odpowiedzi klasyfikacji stresu.
+"""
+from api.renderers import ORJSONRenderer
+
+COLUMNAR_FORMAT = 'columnar'
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """
+    JSON w formacie kolumnowym (równoległe tablice zamiast listy obiektów segmentów).
+
+    Wybierany przez `?format=columnar` lub nagłówek
+    `Accept: application/vnd.synaptis.columnar+json`; widok sprawdza wybrany
+    renderer (`wants_columnar`) i buduje wynik od razu w postaci kolumn -
+    tablice NumPy są serializowane bezpośrednio przez orjson.
+    """
+    media_type = 'application/vnd.synaptis.columnar+json'
+    format = COLUMNAR_FORMAT
+
+
+def wants_columnar(request):
+    """Czy klient wybrał format kolumnowy (negocjacja treści DRF)."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format == COLUMNAR_FORMAT
@@ -0,0 +1,232 @@
+"""
+Cache wyników klasyfikacji adresowany zawartością nagrania.
+
+Klucz to skrót SHA-256 surowych buforów sygnałów (z typem i kształtem), timestampu
+początku, częstotliwości próbkowania, wersji modelu i konfiguracji okien - to samo
+nagranie wysłane ponownie (retry, ponowny upload pliku z bransoletki) trafia w cache.
+
+Dwa poziomy:
+- pamięć procesu - LRU ograniczone liczbą wpisów,
+- opcjonalnie dysk - pliki JSON we wspólnym katalogu (np. dla wszystkich workerów),
+  z usuwaniem najdawniej używanych plików po przekroczeniu limitu rozmiaru.
+Opcjonalny TTL dotyczy obu poziomów. Wynik jest serializowany do JSON raz przy zapisie - oba
+poziomy zwracają ten sam typ danych (listy i liczby Pythona zamiast tablic NumPy).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+
+def compute_cache_key(signals, **params):
+    """
+    Liczy klucz cache dla listy buforów sygnałów i parametrów klasyfikacji.
+
+    Bufory są haszowane bez kopiowania (o ile są ciągłe w pamięci); parametry
+    muszą dać się zserializować do JSON (np. timestamp jako tekst ISO).
+    """
+    digest = hashlib.sha256()
+    for data in signals:
+        data = np.ascontiguousarray(data)
+        digest.update(f"{data.dtype.str}{data.shape}".encode())
+        if data.size:
+            digest.update(memoryview(data).cast('B'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _json_default(obj):
+    """Skalary i tablice NumPy w wynikach (renderer API serializuje je natywnie)."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Obiekt typu {type(obj).__name__} nie jest serializowalny do JSON")
+
+
+def file_fingerprint(*paths):
+    """Skrót zawartości plików (np. wag modelu) - zmienia się po ponownym treningu."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Dwupoziomowy cache wyników `classify` (pamięć LRU + opcjonalny katalog na dysku).
+
+    W pamięci przechowywany jest zserializowany JSON - każde `get` zwraca nową kopię wyniku,
+    więc modyfikacja odpowiedzi nie zmienia wpisu w cache ani wyników innych żądań.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk_dir=None,
+                 disk_max_bytes=DEFAULT_DISK_MAX_BYTES, ttl_sec=None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_sec = ttl_sec or None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Liczniki
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._memory_evictions = 0
+        self._disk_evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key):
+        """Zwraca zapisany wynik lub None (najpierw pamięć, potem dysk)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, payload = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self._memory_hits += 1
+                    return json.loads(payload)
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            created, payload, result = entry
+            self._remember(key, created, payload)
+        return result
+
+    def put(self, key, result):
+        """Zapisuje wynik w pamięci i (jeśli włączony) na dysku."""
+        created = time.time()
+        payload = json.dumps(result, default=_json_default)
+        with self._lock:
+            self._stores += 1
+            self._remember(key, created, payload)
+
+        if self.disk_dir is not None:
+            try:
+                self._write_disk(key, created, payload)
+            except OSError as e:
+                logger.warning(f"Nie udało się zapisać wyniku w cache na dysku: {e}")
+
+    def stats(self):
+        """Zwraca liczniki trafień/chybień i zajętość obu poziomów."""
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            stats = {
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': (self._memory_hits + self._disk_hits) / lookups if lookups else 0.0,
+                'stores': self._stores,
+                'memory_entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_evictions': self._memory_evictions,
+                'disk_evictions': self._disk_evictions,
+                'ttl_sec': self.ttl_sec,
+            }
+        if self.disk_dir is not None:
+            files = self._disk_files()
+            stats.update({
+                'disk_entries': len(files),
+                'disk_bytes': sum(size for _, _, size in files),
+                'disk_max_bytes': self.disk_max_bytes,
+            })
+        return stats
+
+    def _expired(self, created):
+        return self.ttl_sec is not None and time.time() - created > self.ttl_sec
+
+    def _remember(self, key, created, payload):
+        self._entries[key] = (created, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._memory_evictions += 1
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{key}.json"
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Uszkodzony wpis cache {path.name}: {e}")
+            return None
+
+        if self._expired(entry['created']):
+            path.unlink(missing_ok=True)
+            return None
+
+        # Czas modyfikacji pliku = ostatnie użycie (kolejność usuwania przy przekroczeniu limitu)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['created'], json.dumps(entry['result']), entry['result']
+
+    def _write_disk(self, key, created, payload):
+        # Zapis atomowy - inne procesy nigdy nie widzą niepełnego pliku
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            # Wynik jest już zserializowany - wstawiany do pliku bez ponownego kodowania
+            with os.fdopen(fd, 'w') as f:
+                f.write(f'{{"created": {created!r}, "result": {payload}}}')
+            os.replace(tmp_path, self._disk_path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._evict_disk()
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _evict_disk(self):
+        """Usuwa najdawniej używane pliki, dopóki katalog przekracza limit rozmiaru."""
+        files = sorted(self._disk_files())
+        total = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self._disk_evictions += 1
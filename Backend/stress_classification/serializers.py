@@ -1,31 +1,137 @@
+from collections.abc import Mapping
+
+import numpy as np
 from rest_framework import serializers
+from rest_framework.utils import html
 from datetime import datetime
 
+from .adaptive_scan import DEFAULT_FIDELITY, FIDELITY_TIERS
+from .ml_service import TARGET_RATE
+from .models import ClassificationJob
+from .preprocessing import SIGNAL_DTYPE, resampling_factors
 
-class StressClassificationRequestSerializer(serializers.Serializer):
-    """Serializer dla żądania klasyfikacji stresu."""
+# Maksymalna liczba próbek jednego sygnału w żądaniu JSON (24 h przy 64 Hz)
+MAX_SIGNAL_LENGTH = 24 * 3600 * 64
+
+
+class SignalArrayField(serializers.ListField):
+    """
+    Lista liczb (lub wierszy po `columns` liczb) walidowana wektorowo i zwracana jako tablica float32.
+    
+    Szybka ścieżka: jedno `np.array(data, dtype=float32)` oraz sprawdzenie kształtu, długości
+    i skończoności wartości. Gdy konwersja lub kształt się nie zgadzają, walidacja przechodzi
+    do zwykłej ścieżki `ListField` (element po elemencie), więc błędy mają ten sam format
+    i komunikaty co dla `ListField(child=FloatField())`.
+    """
+    default_error_messages = {
+        'not_finite': 'Wartości muszą być skończone (bez NaN i nieskończoności).',
+    }
+    
+    def __init__(self, columns=None, max_length=MAX_SIGNAL_LENGTH, **kwargs):
+        self.columns = columns
+        if columns is None:
+            child = serializers.FloatField()
+        else:
+            child = serializers.ListField(child=serializers.FloatField(), min_length=columns, max_length=columns)
+        super().__init__(child=child, max_length=max_length, **kwargs)
+    
+    def to_internal_value(self, data):
+        if html.is_html_input(data) or isinstance(data, (str, Mapping)) or not hasattr(data, '__len__'):
+            return self._validate_per_element(data)
+        if self.max_length is not None and len(data) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+        
+        try:
+            # Wartości poza zakresem float32 stają się nieskończone - zgłasza je sprawdzenie skończoności
+            with np.errstate(over='ignore'):
+                array = np.array(data, dtype=SIGNAL_DTYPE)
+        except (TypeError, ValueError):
+            return self._validate_per_element(data)
+        
+        expected_ndim = 1 if self.columns is None else 2
+        if array.ndim != expected_ndim or (self.columns is not None and array.shape[1] != self.columns):
+            return self._validate_per_element(data)
+        
+        if not self.allow_empty and len(array) == 0:
+            self.fail('empty')
+        if not np.isfinite(array).all():
+            # None daje NaN - zwykła walidacja zgłosi go jak dotychczas
+            self._validate_per_element(data)
+            self.fail('not_finite')
+        return array
+    
+    def _validate_per_element(self, data):
+        values = super().to_internal_value(data)
+        with np.errstate(over='ignore'):
+            array = np.array(values, dtype=SIGNAL_DTYPE)
+        if self.columns is not None:
+            array = array.reshape(-1, self.columns)
+        if not np.isfinite(array).all():
+            self.fail('not_finite')
+        return array
+
+
+class SamplingRatesSerializer(serializers.Serializer):
+    """Częstotliwości próbkowania czujników bransoletki (Hz)."""
+    
+    ACC = serializers.FloatField(min_value=0.1, required=False)
+    BVP = serializers.FloatField(min_value=0.1, required=False)
+    EDA = serializers.FloatField(min_value=0.1, required=False)
+    TEMP = serializers.FloatField(min_value=0.1, required=False)
+    
+    def validate(self, attrs):
+        # Częstotliwości wymagające zbyt długiego filtra resamplingu (np. 32.123 Hz) są odrzucane
+        errors = {}
+        for name, rate in attrs.items():
+            try:
+                resampling_factors(rate, TARGET_RATE)
+            except ValueError as e:
+                errors[name] = [str(e)]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class RecordingMetadataSerializer(serializers.Serializer):
+    """Metadane nagrania - ten sam format co sekcja `metadata` pliku JSON z bransoletki."""
     
-    # Opcjonalne - jeśli nie podano, użyjemy symulowanych danych
-    acc = serializers.ListField(
-        child=serializers.ListField(child=serializers.FloatField(), min_length=3, max_length=3),
+    sampling_rates = SamplingRatesSerializer(
+        required=False,
+        help_text="Częstotliwości próbkowania sygnałów. Brakujące wartości: ACC 32, BVP 64, EDA 4, TEMP 4 Hz."
+    )
+
+
+class SignalsSerializer(serializers.Serializer):
+    """Surowe sygnały z bransoletki (ACC, BVP, EDA, TEMP)."""
+    
+    # Opcjonalne - w klasyfikacji jednorazowej brak danych oznacza użycie symulacji,
+    # a kawałek strumienia może zawierać tylko część sygnałów
+    acc = SignalArrayField(
+        columns=3,
         required=False,
         help_text="Dane akcelerometru (ACC) - lista list [x, y, z]"
     )
-    bvp = serializers.ListField(
-        child=serializers.FloatField(),
+    bvp = SignalArrayField(
         required=False,
         help_text="Dane BVP (Blood Volume Pulse)"
     )
-    eda = serializers.ListField(
-        child=serializers.FloatField(),
+    eda = SignalArrayField(
         required=False,
         help_text="Dane EDA (Electrodermal Activity)"
     )
-    temp = serializers.ListField(
-        child=serializers.FloatField(),
+    temp = SignalArrayField(
         required=False,
         help_text="Dane temperatury"
     )
+
+
+class StressClassificationRequestSerializer(SignalsSerializer):
+    """Serializer dla żądania klasyfikacji stresu."""
+    
+    metadata = RecordingMetadataSerializer(
+        required=False,
+        help_text="Metadane nagrania z bransoletki (m.in. sampling_rates)"
+    )
     start_timestamp = serializers.DateTimeField(
         required=False,
         help_text="Timestamp początku nagrania (ISO format). Jeśli nie podano, używa aktualnego czasu."
@@ -35,4 +141,61 @@ class StressClassificationRequestSerializer(serializers.Serializer):
         required=False,
         help_text="Czy użyć symulowanych danych (domyślnie True)"
     )
+    fidelity = serializers.ChoiceField(
+        choices=list(FIDELITY_TIERS),
+        default=DEFAULT_FIDELITY,
+        required=False,
+        help_text="Poziom szczegółowości: full - predykcja każdego okna (domyślnie); adaptive - skan zgrubny "
+                  "co 30 s z doprecyzowaniem przy zmianie klasy lub niskiej pewności; overview - tylko skan zgrubny"
+    )
+
+
+class BinaryClassificationOptionsSerializer(serializers.Serializer):
+    """Parametry klasyfikacji sygnałów przesłanych binarnie (nagłówek X-Signals-Header lub pola formularza)."""
+    
+    metadata = RecordingMetadataSerializer(
+        required=False,
+        help_text="Metadane nagrania z bransoletki (m.in. sampling_rates)"
+    )
+    start_timestamp = serializers.DateTimeField(
+        required=False,
+        help_text="Timestamp początku nagrania (ISO format). Jeśli nie podano, używa aktualnego czasu."
+    )
+    fidelity = serializers.ChoiceField(
+        choices=list(FIDELITY_TIERS),
+        default=DEFAULT_FIDELITY,
+        required=False,
+        help_text="Poziom szczegółowości: full - predykcja każdego okna (domyślnie); adaptive - skan zgrubny "
+                  "co 30 s z doprecyzowaniem przy zmianie klasy lub niskiej pewności; overview - tylko skan zgrubny"
+    )
+
+
+class StreamingSessionCreateSerializer(serializers.Serializer):
+    """Serializer dla otwarcia sesji klasyfikacji strumieniowej."""
+    
+    start_timestamp = serializers.DateTimeField(
+        required=False,
+        help_text="Timestamp początku nagrania (ISO format). Jeśli nie podano, używa aktualnego czasu."
+    )
+    metadata = RecordingMetadataSerializer(
+        required=False,
+        help_text="Metadane nagrania z bransoletki (m.in. sampling_rates)"
+    )
+
+
+class ClassificationJobSerializer(serializers.ModelSerializer):
+    """Stan zadania w tle (bez wyniku)."""
+    
+    class Meta:
+        model = ClassificationJob
+        fields = ['id', 'kind', 'status', 'progress', 'params', 'error',
+                  'created_at', 'started_at', 'finished_at', 'updated_at']
+        read_only_fields = fields
+
 
+class ClassificationJobDetailSerializer(ClassificationJobSerializer):
+    """Stan zadania w tle wraz z wynikiem (po zakończeniu)."""
+    
+    class Meta(ClassificationJobSerializer.Meta):
+        fields = ClassificationJobSerializer.Meta.fields + ['result']
+        read_only_fields = fields
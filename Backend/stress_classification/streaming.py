@@ -0,0 +1,153 @@
+"""
+Klasyfikacja strumieniowa - sesje na żywo dla danych napływających z bransoletki.
+
+Sesja przyjmuje kolejne kawałki surowych sygnałów i zwraca klasyfikacje tylko dla
+nowo domkniętych okien 30 s. Stan resamplerów oraz ogon ostatniego okna są
+przenoszone między kawałkami, więc koszt każdego wywołania zależy wyłącznie od
+ilości nowych danych, a nie od długości całej sesji.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from .ml_service import STEP_SEC, TARGET_RATE, WINDOW_SEC
+from .preprocessing import WindowAssembler
+
+# Sesja bez aktywności dłużej niż ten czas jest usuwana z pamięci
+SESSION_IDLE_TIMEOUT_SEC = 30 * 60
+# Limity pamięci: liczba aktywnych sesji w procesie i czas nagrania (s) zbuforowany w sesji -
+# dane czekające na pozostałe kanały (np. kawałki wysyłane osobno dla każdego sygnału)
+MAX_SESSIONS = 100
+MAX_BUFFERED_SEC = 3600
+
+
+class StreamingLimitExceeded(Exception):
+    """Przekroczony limit sesji strumieniowych lub danych zbuforowanych w sesji."""
+
+
+class StreamingClassificationSession:
+    """Stanowa sesja klasyfikacji strumieniowej jednego nagrania."""
+
+    def __init__(self, service, start_timestamp: Optional[datetime] = None,
+                 sampling_rates: Optional[Dict[str, float]] = None,
+                 max_buffered_sec: float = MAX_BUFFERED_SEC):
+        self.session_id = uuid.uuid4()
+        self.service = service
+        self.start_timestamp = start_timestamp or datetime.now()
+        self.last_activity = time.monotonic()
+        self.closed = False
+        self.num_segments = 0
+
+        self._lock = threading.Lock()
+        self._assembler = WindowAssembler(TARGET_RATE, WINDOW_SEC, STEP_SEC, sampling_rates)
+        self.sampling_rates = self._assembler.sampling_rates
+        self.max_buffered_samples = int(max_buffered_sec * TARGET_RATE)
+        self._predictions = []
+        self._probabilities = []
+
+    @property
+    def processed_seconds(self) -> float:
+        """Czas nagrania (w sekundach) wyrównany we wszystkich kanałach."""
+        return self._assembler.processed_samples / TARGET_RATE
+
+    def push(self, signals: Dict[str, np.ndarray]) -> Dict:
+        """
+        Dodaje kawałek sygnałów (dowolny podzbiór ACC/BVP/EDA/TEMP).
+
+        Zwraca segmenty i momenty stresu tylko dla nowo domkniętych okien. Kawałek, po którym
+        w sesji czekałoby więcej niż `max_buffered_sec` nagrania, jest odrzucany
+        (`StreamingLimitExceeded`) bez zmiany stanu sesji.
+        """
+        with self._lock:
+            if self.closed:
+                raise ValueError("Sesja została już zamknięta")
+            # Długości kawałków po resamplingu (szacunek)
+            incoming = {name: len(chunk) * TARGET_RATE / self.sampling_rates[name]
+                        for name, chunk in signals.items() if chunk is not None}
+            if self._assembler.unaligned_samples(incoming) > self.max_buffered_samples:
+                raise StreamingLimitExceeded(
+                    f"Za dużo danych oczekujących w sesji (limit {self.max_buffered_samples / TARGET_RATE:g} s "
+                    f"nagrania) - wysyłaj kawałki wszystkich sygnałów z tego samego okresu"
+                )
+            self.last_activity = time.monotonic()
+            return self._classify_windows(self._assembler.push(signals))
+
+    def close(self) -> Dict:
+        """Kończy sesję - opróżnia resamplery i klasyfikuje ostatnie pełne okna."""
+        with self._lock:
+            if self.closed:
+                raise ValueError("Sesja została już zamknięta")
+            self.last_activity = time.monotonic()
+
+            X_segments = self._assembler.flush()
+            self.closed = True
+            return self._classify_windows(X_segments)
+
+    def result(self) -> Optional[Dict]:
+        """Zwraca pełny wynik klasyfikacji (jak `classify`) dla dotychczasowych segmentów."""
+        with self._lock:
+            if self.num_segments == 0:
+                return None
+            predictions = np.concatenate(self._predictions)
+            probabilities = np.concatenate(self._probabilities)
+        results = self.service.analyze_stress_level(predictions, probabilities, self.start_timestamp)
+        return self.service.generate_json_output(predictions, probabilities, results, self.start_timestamp)
+
+    def _classify_windows(self, X_segments) -> Dict:
+        segments, stress_moments = [], []
+        if len(X_segments):
+            predictions, probabilities = self.service.predict_consecutive(X_segments)
+            segments, stress_moments = self.service.build_segments(
+                predictions, probabilities, self.start_timestamp, first_index=self.num_segments
+            )
+            self._predictions.append(predictions)
+            self._probabilities.append(probabilities)
+            self.num_segments += len(X_segments)
+
+        return {
+            'session_id': str(self.session_id),
+            'num_segments': self.num_segments,
+            'processed_seconds': self.processed_seconds,
+            'closed': self.closed,
+            'segments': segments,
+            'stress_moments': stress_moments,
+        }
+
+
+class StreamingSessionRegistry:
+    """Rejestr aktywnych sesji strumieniowych w pamięci procesu."""
+
+    def __init__(self, idle_timeout: float = SESSION_IDLE_TIMEOUT_SEC, max_sessions: int = MAX_SESSIONS,
+                 max_buffered_sec: float = MAX_BUFFERED_SEC):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_buffered_sec = max_buffered_sec
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self, service, start_timestamp=None, sampling_rates=None) -> StreamingClassificationSession:
+        session = StreamingClassificationSession(service, start_timestamp, sampling_rates, self.max_buffered_sec)
+        with self._lock:
+            self._remove_expired()
+            if len(self._sessions) >= self.max_sessions:
+                raise StreamingLimitExceeded(f"Limit aktywnych sesji strumieniowych: {self.max_sessions}")
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id) -> Optional[StreamingClassificationSession]:
+        with self._lock:
+            self._remove_expired()
+            return self._sessions.get(session_id)
+
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _remove_expired(self):
+        deadline = time.monotonic() - self.idle_timeout
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_activity < deadline]:
+            del self._sessions[session_id]
@@ -1,4 +1,710 @@
+import importlib.util
+import io
+import tempfile
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import torch
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import serializers
+
+from patient_management.models import Patient, Visit
+
+from . import views
+from .data_simulator import generate_simulated_data
+from .jobs import (
+    JOB_HANDLERS,
+    JobCancelled,
+    JobLimitExceeded,
+    JobProgress,
+    JobRunner,
+    _run_job,
+    cancel_job,
+    expire_stale_jobs,
+)
+from .management.commands.check_normalization_folding import FOLDING_TOLERANCE
+from .ml_service import (
+    CLASS_DESCRIPTIONS,
+    CLASS_NAMES,
+    CLASS_TABLE,
+    NUM_CLASSES,
+    STEP_SEC,
+    TARGET_RATE,
+    WINDOW_SEC,
+    StressClassificationService,
+    normalize_data,
+)
+from .models import ClassificationJob
+from .onnx_backend import OnnxRuntimeModel, export_onnx
+from .overlap_inference import EXACT_TOLERANCE
+from .parsers import load_signal_files
+from .preprocessing import (
+    DEFAULT_SAMPLING_RATES,
+    MAX_RESAMPLING_FACTOR,
+    SIGNAL_DTYPE,
+    design_resampling_filter,
+    iter_signal_windows,
+    segment_data,
+)
+from .result_cache import ResultCache
+from .serializers import MAX_SIGNAL_LENGTH, SamplingRatesSerializer, SignalArrayField
+from .streaming import StreamingLimitExceeded, StreamingSessionRegistry
+
+# Maksymalna różnica prawdopodobieństw modelu ONNX Runtime względem eager PyTorch (w praktyce ~1e-10)
+ONNX_TOLERANCE = 1e-5
+
+HAS_ONNX = all(importlib.util.find_spec(name) is not None for name in ('onnx', 'onnxruntime'))
+
+
+def simulated_segments(service, duration_sec=600, seed=0):
+    """Okna krótkiego symulowanego nagrania (powtarzalne - stałe ziarno)."""
+    np.random.seed(seed)
+    return service.preprocess_signals(*generate_simulated_data(duration_sec=duration_sec))
+
+
+def baseline_segment_data(data, target_rate, window_sec, step_sec):
+    """Segmentacja pętlą z kopiowaniem każdego okna (wersja sprzed `sliding_window_view`)."""
+    window_samples = window_sec * target_rate
+    step_samples = step_sec * target_rate
+
+    segments = []
+    for start in range(0, len(data) - window_samples + 1, step_samples):
+        segments.append(data[start:start + window_samples])
+    return np.array(segments)
+
+
+class SegmentationTests(TestCase):
+    """Okna `segment_data` są identyczne z oknami dawnej pętli i tylko do odczytu."""
+
+    def test_matches_baseline_loop(self):
+        rng = np.random.default_rng(0)
+        window_samples, step_samples = WINDOW_SEC * TARGET_RATE, STEP_SEC * TARGET_RATE
+        lengths = [0, 1, window_samples - 1, window_samples, window_samples + 1,
+                   window_samples + step_samples, window_samples + 3 * step_samples - 7, 4321]
+        for length in lengths:
+            with self.subTest(length=length):
+                data = rng.standard_normal((length, 6)).astype(np.float32)
+                windows = segment_data(data, TARGET_RATE, WINDOW_SEC, STEP_SEC)
+                reference = baseline_segment_data(data, TARGET_RATE, WINDOW_SEC, STEP_SEC)
+
+                self.assertFalse(windows.flags.writeable)
+                self.assertEqual(windows.dtype, np.float32)
+                if len(reference) == 0:
+                    self.assertEqual(windows.shape, (0, window_samples, 6))
+                else:
+                    np.testing.assert_array_equal(windows, reference)
+
+    def test_windows_share_input_buffer(self):
+        data = np.arange(1000 * 6, dtype=np.float32).reshape(1000, 6)
+        windows = segment_data(data, TARGET_RATE, WINDOW_SEC, STEP_SEC)
+        self.assertTrue(np.shares_memory(windows, data))
+        with self.assertRaises(ValueError):
+            windows[0, 0, 0] = 0
+
+
+@skipUnless(HAS_ONNX, "wymaga pakietów onnx i onnxruntime")
+class OnnxParityTests(TestCase):
+    """Model wyeksportowany do ONNX daje te same wyniki co model eager."""
+
+    def test_onnx_matches_eager(self):
+        service = StressClassificationService(model_format='eager', fold_normalization=False)
+        service.load_model()
+        X_segments = simulated_segments(service)
+        inputs = torch.from_numpy(np.ascontiguousarray(
+            normalize_data(X_segments, service.mean, service.std).transpose(0, 2, 1), dtype=np.float32))
+
+        with tempfile.TemporaryDirectory() as directory:
+            onnx_path = export_onnx(service._build_eager_model(service._get_model_path()),
+                                    Path(directory) / 'model.onnx',
+                                    num_channels=inputs.shape[1], seq_len=WINDOW_SEC * TARGET_RATE)
+            onnx_model = OnnxRuntimeModel(onnx_path, intra_op_threads=1)
+            with torch.inference_mode():
+                reference = torch.softmax(service.model(inputs), dim=1).numpy()
+                candidate = torch.softmax(onnx_model(inputs), dim=1).numpy()
+
+        self.assertLessEqual(float(np.abs(candidate - reference).max()), ONNX_TOLERANCE)
+        np.testing.assert_array_equal(candidate.argmax(axis=1), reference.argmax(axis=1))
+
+
+class NormalizationFoldingTests(TestCase):
+    """Normalizacja wbudowana w pierwszą warstwę daje te same wyniki co osobne normalize_data."""
+
+    def test_folded_matches_unfolded(self):
+        reference = StressClassificationService(model_format='eager', fold_normalization=False)
+        folded = StressClassificationService(model_format='eager', fold_normalization=True)
+        reference.load_model()
+        folded.load_model()
+        self.assertTrue(folded.normalization_folded)
+        self.assertNotEqual(folded.model_version, reference.model_version)
+
+        X_segments = simulated_segments(reference)
+        ref_predictions, ref_probabilities = reference.predict(X_segments)
+        predictions, probabilities = folded.predict(X_segments)
+
+        self.assertLessEqual(float(np.abs(probabilities - ref_probabilities).max()), FOLDING_TOLERANCE)
+        np.testing.assert_array_equal(predictions, ref_predictions)
+
+    def test_torchscript_export_folds_normalization(self):
+        reference = StressClassificationService(model_format='eager', fold_normalization=False)
+        X_segments = simulated_segments(reference)
+        ref_predictions, ref_probabilities = reference.predict(X_segments)
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+                StressClassificationService, '_get_torchscript_path',
+                return_value=Path(directory) / 'model.torchscript.pt'):
+            StressClassificationService(model_format='eager').export_torchscript()
+            scripted = StressClassificationService(model_format='auto')
+            self.assertTrue(scripted.model_version.endswith(':folded'))
+            self.assertEqual(scripted.loaded_format, 'torchscript')
+            self.assertTrue(scripted.normalization_folded)
+            predictions, probabilities = scripted.predict(X_segments)
+
+            # Artefakt z innym ustawieniem nie jest używany w trybie 'auto' - ani opisywany jako folded
+            unfolded = StressClassificationService(model_format='auto', fold_normalization=False)
+            self.assertFalse(unfolded._torchscript_is_current())
+            self.assertEqual(unfolded.model_version.split(':')[0], 'eager')
+            self.assertFalse(unfolded.model_version.endswith(':folded'))
+
+        self.assertLessEqual(float(np.abs(probabilities - ref_probabilities).max()), FOLDING_TOLERANCE)
+        np.testing.assert_array_equal(predictions, ref_predictions)
+
+    def test_model_version_reports_loaded_model(self):
+        # Zapisany model int8 (TorchScript) nie obsługuje wbudowania - wersja bez znacznika mimo fold_normalization
+        service = StressClassificationService(model_format='eager')
+        with mock.patch('stress_classification.ml_service.supports_normalization_folding', return_value=False):
+            self.assertFalse(service.model_version.endswith(':folded'))
+        self.assertFalse(service.normalization_folded)
+
+
+class OverlapInferenceTests(TestCase):
+    """Wspólna część konwolucyjna kolejnych okien a predykcja okno po oknie."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reference = StressClassificationService(model_format='eager')
+        cls.reference.load_model()
+        cls.X_segments = simulated_segments(cls.reference)
+        cls.ref_predictions, cls.ref_probabilities = cls.reference.predict(cls.X_segments)
+
+    def consecutive(self, mode):
+        service = StressClassificationService(model_format='eager', overlap_inference=mode)
+        service.load_model()
+        return service.predict_consecutive(self.X_segments)
+
+    def test_exact_matches_predict(self):
+        predictions, probabilities = self.consecutive('exact')
+        self.assertLessEqual(float(np.abs(probabilities - self.ref_probabilities).max()), EXACT_TOLERANCE)
+        np.testing.assert_array_equal(predictions, self.ref_predictions)
+
+    def test_shared_keeps_classes(self):
+        predictions, _ = self.consecutive('shared')
+        np.testing.assert_array_equal(predictions, self.ref_predictions)
+
+    def test_torchscript_export_supports_overlap(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+                StressClassificationService, '_get_torchscript_path',
+                return_value=Path(directory) / 'model.torchscript.pt'):
+            StressClassificationService(model_format='eager').export_torchscript()
+            service = StressClassificationService(model_format='torchscript', overlap_inference='shared')
+            service.load_model()
+            self.assertEqual(service.overlap_inference_active, 'shared')
+            self.assertIn(':overlap-shared', service.model_version)
+            with mock.patch.object(service, 'predict', side_effect=AssertionError("predykcja okno po oknie")):
+                predictions, _ = service.predict_consecutive(self.X_segments)
+        np.testing.assert_array_equal(predictions, self.ref_predictions)
+
+    def test_unsupported_model_reports_inactive_mode(self):
+        service = StressClassificationService(model_format='eager', overlap_inference='shared')
+        with mock.patch('stress_classification.ml_service.supports_overlap_inference', return_value=False), \
+                self.assertLogs('stress_classification.ml_service', 'WARNING'):
+            service.load_model()
+            self.assertEqual(service.overlap_inference_active, 'off')
+            self.assertNotIn(':overlap-shared', service.model_version)
+            predictions, _ = service.predict_consecutive(self.X_segments)
+        np.testing.assert_array_equal(predictions, self.ref_predictions)
+
+
+class SamplingRateValidationTests(TestCase):
+    """Częstotliwości wymagające zbyt długiego filtra resamplingu są odrzucane."""
+
+    def test_rejects_unbounded_filter(self):
+        serializer = SamplingRatesSerializer(data={'ACC': 32.123, 'BVP': 64})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors), ['ACC'])
+        with self.assertRaises(ValueError):
+            design_resampling_filter(32.123, TARGET_RATE)
+
+    def test_accepts_device_rates(self):
+        for rate in (4, 25.6, 32, 64, 128, 700):
+            with self.subTest(rate=rate):
+                self.assertTrue(SamplingRatesSerializer(data={'BVP': rate}).is_valid())
+                up, down, _ = design_resampling_filter(rate, TARGET_RATE)
+                self.assertLessEqual(max(up, down), MAX_RESAMPLING_FACTOR)
+
+
+class StreamingSessionTests(TestCase):
+    """Cykl życia sesji strumieniowych, limity i zgodność z przetwarzaniem całego nagrania."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Serwis z blokadami nie daje się kopiować (setUpTestData) - współdzielony przez testy klasy
+        cls.service = StressClassificationService(model_format='eager')
+        cls.service.load_model()
+        np.random.seed(0)
+        cls.signals = dict(zip(['ACC', 'BVP', 'EDA', 'TEMP'], generate_simulated_data(duration_sec=600)))
+
+    def chunks(self, bounds_sec):
+        """Kawałki nagrania między kolejnymi granicami (w sekundach) dla wszystkich sygnałów."""
+        for start_sec, end_sec in zip(bounds_sec, bounds_sec[1:]):
+            yield {name: data[int(start_sec * DEFAULT_SAMPLING_RATES[name]):int(end_sec * DEFAULT_SAMPLING_RATES[name])]
+                   for name, data in self.signals.items()}
+
+    def test_streamed_windows_match_one_shot(self):
+        X_segments = np.concatenate(list(iter_signal_windows(
+            self.signals['ACC'], self.signals['BVP'], self.signals['EDA'], self.signals['TEMP'],
+            TARGET_RATE, WINDOW_SEC, STEP_SEC)))
+        ref_predictions, ref_probabilities = self.service.predict(X_segments)
+
+        registry = StreamingSessionRegistry()
+        session = registry.open(self.service)
+        # Nierówne kawałki - granice nie pokrywają się z krokiem okien
+        segments = []
+        for chunk in self.chunks([0, 7, 45, 46, 200, 333, 600]):
+            segments += session.push(chunk)['segments']
+        segments += session.close()['segments']
+
+        self.assertEqual([segment['time_seconds'] for segment in segments],
+                         [i * STEP_SEC for i in range(len(X_segments))])
+        np.testing.assert_array_equal([segment['class_id'] for segment in segments], ref_predictions)
+        probabilities = np.array([[segment['probabilities'][name] for name in CLASS_NAMES] for segment in segments])
+        self.assertLessEqual(float(np.abs(probabilities - ref_probabilities).max()), 1e-5)
+        self.assertEqual(session.result()['metadata']['num_segments'], len(X_segments))
+
+    def test_session_lifecycle(self):
+        registry = StreamingSessionRegistry()
+        session = registry.open(self.service)
+        self.assertIs(registry.get(session.session_id), session)
+        self.assertIsNone(session.result())
+
+        update = session.push(next(self.chunks([0, 60])))
+        # Ostatnie próbki czekają na kolejne wejście filtra resamplingu - okno domyka dopiero close
+        self.assertEqual(update['num_segments'], 3)
+        update = session.close()
+        self.assertTrue(update['closed'])
+        self.assertEqual(update['num_segments'], 4)
+        self.assertEqual(update['processed_seconds'], 60)
+        self.assertEqual(session.result()['metadata']['num_segments'], 4)
+        with self.assertRaises(ValueError):
+            session.push(next(self.chunks([60, 120])))
+        with self.assertRaises(ValueError):
+            session.close()
+
+        registry.remove(session.session_id)
+        self.assertIsNone(registry.get(session.session_id))
+
+    def test_idle_sessions_expire(self):
+        registry = StreamingSessionRegistry(idle_timeout=60)
+        session = registry.open(self.service)
+        session.last_activity -= 61
+        self.assertIsNone(registry.get(session.session_id))
+
+    def test_max_sessions(self):
+        registry = StreamingSessionRegistry(max_sessions=2)
+        first = registry.open(self.service)
+        registry.open(self.service)
+        with self.assertRaises(StreamingLimitExceeded):
+            registry.open(self.service)
+
+        registry.remove(first.session_id)
+        registry.open(self.service)
+
+    def test_max_buffered_sec(self):
+        registry = StreamingSessionRegistry(max_buffered_sec=60)
+        session = registry.open(self.service)
+        # Tylko ACC - dane czekają na pozostałe kanały
+        with self.assertRaises(StreamingLimitExceeded):
+            session.push({'ACC': self.signals['ACC'][:120 * DEFAULT_SAMPLING_RATES['ACC']]})
+        self.assertEqual(session._assembler.unaligned_samples(), 0)
+
+        session.push({'ACC': self.signals['ACC'][:50 * DEFAULT_SAMPLING_RATES['ACC']]})
+        with self.assertRaises(StreamingLimitExceeded):
+            session.push({'ACC': self.signals['ACC'][50 * DEFAULT_SAMPLING_RATES['ACC']:70 * DEFAULT_SAMPLING_RATES['ACC']]})
+        # Pozostałe kanały doganiają ACC - bufor się opróżnia
+        update = session.push({name: data[:50 * DEFAULT_SAMPLING_RATES[name]]
+                               for name, data in self.signals.items() if name != 'ACC'})
+        self.assertEqual(update['num_segments'], 2)
+
+
+class ResultCacheTests(TestCase):
+    """Cache wyników obejmuje tylko żądania z timestampem i rzeczywistymi sygnałami."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.service = StressClassificationService(model_format='eager', result_cache=ResultCache())
+        cls.service.load_model()
+        np.random.seed(0)
+        acc, bvp, eda, temp = generate_simulated_data(duration_sec=120)
+        cls.payload = {'acc': acc.tolist(), 'bvp': bvp.tolist(), 'eda': eda.tolist(), 'temp': temp.tolist(),
+                       'use_simulation': False}
+
+    def setUp(self):
+        self.service.result_cache = ResultCache()
+
+    def classify(self, **fields):
+        with mock.patch.object(views, '_stress_service', self.service):
+            response = self.client.post(reverse('stress_classification:classify'), {**self.payload, **fields},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_repeated_request_with_timestamp_hits_cache(self):
+        first = self.classify(start_timestamp='2025-11-07T10:00:00')
+        second = self.classify(start_timestamp='2025-11-07T10:00:00')
+        stats = self.service.result_cache.stats()
+        self.assertEqual((stats['stores'], stats['memory_hits']), (1, 1))
+        self.assertEqual(second['segments'], first['segments'])
+
+    def test_requests_without_timestamp_or_simulated_are_not_stored(self):
+        self.classify()
+        self.classify(start_timestamp='2025-11-07T10:00:00', use_simulation=True)
+        stats = self.service.result_cache.stats()
+        self.assertEqual((stats['stores'], stats['memory_entries'], stats['misses']), (0, 0, 0))
+
+
+def baseline_build_segments(predictions, probabilities, start_timestamp):
+    """Segmenty i momenty stresu budowane pętlą po segmentach (wersja sprzed `build_segment_columns`)."""
+    segments = []
+    stress_moments = []
+    for i in range(len(predictions)):
+        segment_start_time = start_timestamp + timedelta(seconds=i * STEP_SEC)
+        segment_end_time = segment_start_time + timedelta(seconds=WINDOW_SEC)
+        predicted_class = int(predictions[i])
+        stress_level = CLASS_DESCRIPTIONS[predicted_class]['stress_level']
+        probabilities_dict = {CLASS_NAMES[j]: float(probabilities[i][j]) for j in range(4)}
+        segments.append({
+            'timestamp': segment_start_time.isoformat(),
+            'timestamp_end': segment_end_time.isoformat(),
+            'time_seconds': i * STEP_SEC,
+            'duration_seconds': WINDOW_SEC,
+            'class_id': predicted_class,
+            'class_name': CLASS_NAMES[predicted_class],
+            'stress_level': stress_level,
+            'stress_level_name': CLASS_DESCRIPTIONS[predicted_class]['level_name'],
+            'probabilities': probabilities_dict,
+            'confidence': float(probabilities[i][predicted_class])
+        })
+        if predicted_class == 1:
+            stress_moments.append({
+                'timestamp': segment_start_time.isoformat(),
+                'timestamp_end': segment_end_time.isoformat(),
+                'time_seconds': i * STEP_SEC,
+                'duration_seconds': WINDOW_SEC,
+                'stress_level': stress_level,
+                'confidence': float(probabilities[i][predicted_class]),
+                'probabilities': probabilities_dict
+            })
+    return segments, stress_moments
+
+
+class SegmentBuilderTests(TestCase):
+    """Wektorowe budowanie segmentów daje te same wartości co dawna pętla po segmentach."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.service = StressClassificationService(model_format='eager')
+        rng = np.random.default_rng(0)
+        cls.predictions = rng.integers(0, NUM_CLASSES, 500)
+        cls.probabilities = rng.dirichlet(np.ones(NUM_CLASSES), 500).astype(np.float32)
+
+    def test_rows_match_baseline(self):
+        start_timestamps = [
+            datetime(2025, 11, 7, 10, 0),
+            datetime(2025, 11, 7, 10, 0, 0, 761766),
+            datetime(2025, 11, 7, 10, 0, tzinfo=timezone.utc),
+            # Zmiana czasu w trakcie nagrania (przesunięcie strefy różne dla kolejnych segmentów)
+            datetime(2025, 3, 30, 1, 0, 0, 5, tzinfo=ZoneInfo('Europe/Warsaw')),
+        ]
+        for start_timestamp in start_timestamps:
+            with self.subTest(start_timestamp=start_timestamp.isoformat()):
+                segments, stress_moments = self.service.build_segments(
+                    self.predictions, self.probabilities, start_timestamp)
+                self.assertEqual((segments, stress_moments), baseline_build_segments(
+                    self.predictions, self.probabilities, start_timestamp))
+
+    def test_first_index_continues_recording(self):
+        start_timestamp = datetime(2025, 11, 7, 10, 0)
+        segments, _ = self.service.build_segments(self.predictions, self.probabilities, start_timestamp)
+        tail, _ = self.service.build_segments(self.predictions[200:], self.probabilities[200:], start_timestamp,
+                                              first_index=200)
+        self.assertEqual(tail, segments[200:])
+
+    def test_columnar_matches_rows(self):
+        start_timestamp = datetime(2025, 11, 7, 10, 0)
+        segments, stress_moments = self.service.build_segments(self.predictions, self.probabilities, start_timestamp)
+        columns, columnar_moments = self.service.build_columnar_segments(self.predictions, self.probabilities)
+
+        self.assertEqual(columns['time_seconds'].tolist(), [segment['time_seconds'] for segment in segments])
+        self.assertEqual(columns['class_id'].tolist(), [segment['class_id'] for segment in segments])
+        self.assertEqual(columns['confidence'].tolist(), [segment['confidence'] for segment in segments])
+        self.assertEqual(columns['probabilities'].tolist(),
+                         [[segment['probabilities'][name] for name in CLASS_NAMES] for segment in segments])
+        for segment in segments:
+            self.assertEqual(CLASS_TABLE[segment['class_id']]['class_name'], segment['class_name'])
+            self.assertEqual(CLASS_TABLE[segment['class_id']]['stress_level'], segment['stress_level'])
+        self.assertEqual([segments[i]['timestamp'] for i in columnar_moments['segment_index'].tolist()],
+                         [moment['timestamp'] for moment in stress_moments])
+
+
+def npz_upload(arrays, name='signals.npz'):
+    """Plik .npz (skompresowany) z podanymi tablicami jako upload multipart."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class SignalFileTests(TestCase):
+    """Wczytywanie sygnałów z plików .npz / .npy (POST /api/stress-classification/binary/)."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.arrays = {'acc': rng.standard_normal((320, 3), dtype=np.float32),
+                       'bvp': rng.standard_normal(640), 'eda': rng.standard_normal(40, dtype=np.float32),
+                       'temp': rng.standard_normal(40, dtype=np.float32)}
+
+    def test_loads_valid_archive(self):
+        signals = load_signal_files({'signals': npz_upload(self.arrays)})
+        for name, data in self.arrays.items():
+            np.testing.assert_array_equal(signals[name], data)
+            self.assertEqual(signals[name].dtype, data.dtype)
+
+    def test_loads_npy_files(self):
+        files = {}
+        for name, data in self.arrays.items():
+            buffer = io.BytesIO()
+            np.save(buffer, data)
+            files[name] = SimpleUploadedFile(f'{name}.npy', buffer.getvalue())
+        signals = load_signal_files(files)
+        np.testing.assert_array_equal(signals['acc'], self.arrays['acc'])
+
+    def test_rejects_malformed_archives(self):
+        archive = npz_upload(self.arrays).read()
+        for content in (b'', b'not a zip file', archive[:len(archive) // 2]):
+            with self.subTest(size=len(content)), self.assertRaises(ValueError):
+                load_signal_files({'signals': SimpleUploadedFile('signals.npz', content)})
+
+        del self.arrays['temp']
+        with self.assertRaisesRegex(ValueError, 'temp'):
+            load_signal_files({'signals': npz_upload(self.arrays)})
+
+    def test_rejects_non_float_arrays(self):
+        self.arrays['eda'] = np.arange(40)
+        with self.assertRaisesRegex(ValueError, 'EDA'):
+            load_signal_files({'signals': npz_upload(self.arrays)})
+
+    def test_rejects_oversized_array_before_decompression(self):
+        # Nagłówek deklaruje tablicę większą niż limit - dane nie są wczytywane
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, data in self.arrays.items():
+                if name != 'bvp':
+                    with archive.open(f'{name}.npy', 'w') as member:
+                        np.save(member, data)
+            with archive.open('bvp.npy', 'w') as member:
+                np.lib.format.write_array_header_1_0(
+                    member, {'descr': '<f4', 'fortran_order': False, 'shape': (MAX_SIGNAL_LENGTH + 1,)})
+        with self.assertRaisesRegex(ValueError, 'BVP za duży'):
+            load_signal_files({'signals': SimpleUploadedFile('signals.npz', buffer.getvalue())})
+
+
+class SignalArrayFieldTests(TestCase):
+    """Szybka ścieżka walidacji sygnałów JSON zgłasza te same błędy co `ListField(child=FloatField())`."""
+
+    def validate(self, field, data):
+        try:
+            return 'ok', field.run_validation(data)
+        except serializers.ValidationError as e:
+            return 'error', e.detail
+
+    def test_error_messages_match_list_field(self):
+        cases = [
+            (None, [1.0, 'abc', 3]), (None, [1, None, 2]), (None, 'abc'), (None, {'a': 1}), (None, 5),
+            (None, [[1, 2]]), (None, list(range(11))),
+            (3, [[1, 2, 3], [1, 2]]), (3, [1, 2, 3]), (3, [[1, 2, 'x']]), (3, [[1, 2, 3, 4]]),
+        ]
+        for columns, data in cases:
+            with self.subTest(columns=columns, data=data):
+                child = (serializers.FloatField() if columns is None else
+                         serializers.ListField(child=serializers.FloatField(), min_length=columns, max_length=columns))
+                expected = self.validate(serializers.ListField(child=child, max_length=10), data)
+                self.assertEqual(expected[0], 'error')
+                self.assertEqual(self.validate(SignalArrayField(columns=columns, max_length=10), data), expected)
+
+    def test_valid_lists_become_float32_arrays(self):
+        result = SignalArrayField(columns=3).run_validation([[1, 2, 3], ['4.5', 5, True]])
+        self.assertEqual(result.dtype, SIGNAL_DTYPE)
+        np.testing.assert_array_equal(result, [[1, 2, 3], [4.5, 5, 1]])
+        self.assertEqual(SignalArrayField().run_validation([1, '2.5']).tolist(), [1.0, 2.5])
+
+    def test_rejects_non_finite_values(self):
+        for data in ([1.0, float('nan')], [1.0, float('inf')], [1e39]):
+            with self.subTest(data=data):
+                status, detail = self.validate(SignalArrayField(), data)
+                self.assertEqual(status, 'error')
+                self.assertEqual(detail[0].code, 'not_finite')
+
+
+class InlineExecutor:
+    """Zamiast puli procesów - zapamiętuje zgłoszone wywołania i wykonuje je na żądanie w procesie testu."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.calls.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        for future, fn, args in self.calls:
+            future.set_result(fn(*args))
+        self.calls = []
+
+
+def cancelling_handler(params, inputs, progress):
+    """Obsługa zadania anulowanego przez użytkownika w trakcie wykonywania."""
+    progress(0.5)
+    cancel_job(ClassificationJob(pk=params['job_id']))
+    progress(0.9)
+    return {'unreachable': True}
+
+
+class JobTests(TestCase):
+    """Zgłaszanie, limit na użytkownika, anulowanie i wygasanie zadań w tle (bez prawdziwej puli procesów)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='jobs@example.com', password='x')
+
+    def setUp(self):
+        self.executor = InlineExecutor()
+        patches = [
+            mock.patch.object(JobRunner, '_get_executor', return_value=self.executor),
+            # Bez wątku heartbeat - odświeżanie kolejki wywoływane jawnie w testach
+            mock.patch.object(JobRunner, '_heartbeat_loop'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.runner = JobRunner(1)
+
+    def make_stale(self, job, seconds=3600):
+        ClassificationJob.objects.filter(pk=job.pk).update(
+            updated_at=datetime.now(timezone.utc) - timedelta(seconds=seconds))
+
+    def test_submit_creates_pending_job_and_queues_it(self):
+        job = self.runner.submit(self.user, ClassificationJob.KIND_CLASSIFICATION, {'timings': False})
+        self.assertEqual(job.status, ClassificationJob.STATUS_PENDING)
+        self.assertEqual(job.params, {'timings': False})
+        [(_, fn, args)] = self.executor.calls
+        self.assertIs(fn, _run_job)
+        self.assertEqual(args[:3], (job.pk, JOB_HANDLERS[ClassificationJob.KIND_CLASSIFICATION], {'timings': False}))
+        self.assertEqual(self.runner._queued, {job.pk})
+
+        self.executor.run_all()
+        self.assertEqual(self.runner._queued, set())
+
+    def test_submit_enforces_per_user_limit(self):
+        with self.settings(STRESS_CLASSIFICATION={'JOB_MAX_ACTIVE_PER_USER': 2}):
+            first = self.runner.submit(self.user, ClassificationJob.KIND_SIMULATION, {})
+            self.runner.submit(self.user, ClassificationJob.KIND_SIMULATION, {})
+            with self.assertRaises(JobLimitExceeded):
+                self.runner.submit(self.user, ClassificationJob.KIND_SIMULATION, {})
+            other = get_user_model().objects.create_user(email='other@example.com', password='x')
+            self.runner.submit(other, ClassificationJob.KIND_SIMULATION, {})
+
+            # Zakończone zadanie zwalnia miejsce w limicie
+            self.assertTrue(cancel_job(first))
+            self.runner.submit(self.user, ClassificationJob.KIND_SIMULATION, {})
+        self.assertEqual(ClassificationJob.objects.filter(user=self.user).count(), 3)
+
+    def test_cancel_pending_job_is_not_started(self):
+        job = self.runner.submit(self.user, ClassificationJob.KIND_CLASSIFICATION, {})
+        self.assertTrue(cancel_job(job))
+        self.assertFalse(cancel_job(job))
+        self.executor.run_all()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ClassificationJob.STATUS_CANCELLED)
+        self.assertIsNone(job.started_at)
+
+    def test_cancel_running_job_stops_at_next_progress_update(self):
+        job = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_CLASSIFICATION)
+        _run_job(job.pk, f'{__name__}.cancelling_handler', {'job_id': str(job.pk)}, None)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ClassificationJob.STATUS_CANCELLED)
+        self.assertEqual(job.progress, 0.5)
+        self.assertIsNone(job.result)
+        with self.assertRaises(JobCancelled):
+            JobProgress(job.pk)(1.0)
+
+    def test_cancelled_simulation_does_not_create_visit(self):
+        patient = Patient.objects.create(first_name='Jan', last_name='Test', dob='1990-01-01', gender='M',
+                                         pesel='90010112345')
+        job = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_SIMULATION)
+        metadata = {'step_size': 10, 'total_duration_seconds': 60, 'baseline_percentage': 100.0,
+                    'stress_percentage': 0.0, 'amusement_percentage': 0.0, 'meditation_percentage': 0.0}
+
+        def simulate_then_cancel(duration_sec, progress):
+            # Anulowanie po zakończeniu klasyfikacji, przed zapisem wizyty
+            progress(1.0)
+            cancel_job(job)
+            return [], metadata
+
+        with mock.patch('patient_management.services.create_session_simulation', side_effect=simulate_then_cancel):
+            _run_job(job.pk, JOB_HANDLERS[ClassificationJob.KIND_SIMULATION],
+                     {'patient_id': patient.pk, 'duration_sec': 60}, None)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ClassificationJob.STATUS_CANCELLED)
+        self.assertFalse(Visit.objects.filter(patient=patient).exists())
+
+    def test_expire_stale_jobs(self):
+        with self.settings(STRESS_CLASSIFICATION={'JOB_STALE_SEC': 600}):
+            running = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_CLASSIFICATION,
+                                                       status=ClassificationJob.STATUS_RUNNING)
+            orphaned = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_CLASSIFICATION)
+            fresh = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_CLASSIFICATION)
+            finished = ClassificationJob.objects.create(user=self.user, kind=ClassificationJob.KIND_CLASSIFICATION,
+                                                        status=ClassificationJob.STATUS_SUCCEEDED)
+            for job in (running, orphaned, finished):
+                self.make_stale(job)
+
+            self.assertEqual(expire_stale_jobs(ClassificationJob.objects.all()), 2)
+        statuses = dict(ClassificationJob.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[running.pk], ClassificationJob.STATUS_FAILED)
+        self.assertEqual(statuses[orphaned.pk], ClassificationJob.STATUS_FAILED)
+        self.assertEqual(statuses[fresh.pk], ClassificationJob.STATUS_PENDING)
+        self.assertEqual(statuses[finished.pk], ClassificationJob.STATUS_SUCCEEDED)
 
-# Na razie puste
+    def test_queued_job_is_kept_alive_by_pool(self):
+        with self.settings(STRESS_CLASSIFICATION={'JOB_STALE_SEC': 600}):
+            job = self.runner.submit(self.user, ClassificationJob.KIND_CLASSIFICATION, {})
+            self.make_stale(job)
+            self.assertEqual(self.runner.touch_queued_jobs(), 1)
+            self.assertEqual(expire_stale_jobs(ClassificationJob.objects.all()), 0)
 
+            # Po wykonaniu zadanie nie jest już odświeżane przez pulę
+            self.executor.run_all()
+            self.assertEqual(self.runner.touch_queued_jobs(), 0)
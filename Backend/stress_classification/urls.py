@@ -1,9 +1,29 @@
 from django.urls import path
-from .views import StressClassificationView
+from .views import (
+    StressClassificationView,
+    StressClassificationBinaryView,
+    StreamingSessionCreateView,
+    StreamingSessionDetailView,
+    StreamingSessionChunkView,
+    StreamingSessionCloseView,
+    StressServiceStatsView,
+    ClassificationJobListView,
+    ClassificationJobDetailView,
+    ClassificationJobCancelView,
+)
 
 app_name = 'stress_classification'
 
 urlpatterns = [
     path('', StressClassificationView.as_view(), name='classify'),
+    path('binary/', StressClassificationBinaryView.as_view(), name='classify-binary'),
+    path('stats/', StressServiceStatsView.as_view(), name='stats'),
+    path('jobs/', ClassificationJobListView.as_view(), name='job-list'),
+    path('jobs/<uuid:job_id>/', ClassificationJobDetailView.as_view(), name='job-detail'),
+    path('jobs/<uuid:job_id>/cancel/', ClassificationJobCancelView.as_view(), name='job-cancel'),
+    path('streams/', StreamingSessionCreateView.as_view(), name='stream-create'),
+    path('streams/<uuid:session_id>/', StreamingSessionDetailView.as_view(), name='stream-detail'),
+    path('streams/<uuid:session_id>/chunks/', StreamingSessionChunkView.as_view(), name='stream-chunks'),
+    path('streams/<uuid:session_id>/close/', StreamingSessionCloseView.as_view(), name='stream-close'),
 ]
 
@@ -1,34 +1,95 @@
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.settings import api_settings
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from .serializers import StressClassificationRequestSerializer
+from .serializers import (
+    BinaryClassificationOptionsSerializer,
+    ClassificationJobDetailSerializer,
+    ClassificationJobSerializer,
+    SignalsSerializer,
+    StreamingSessionCreateSerializer,
+    StressClassificationRequestSerializer,
+)
+from .jobs import JobLimitExceeded, cancel_job, get_job_runner, refresh_job, wait_for_job
 from .ml_service import StressClassificationService
+from .models import ClassificationJob
+from .parsers import SignalArrayParser, load_signal_files, validate_signal_arrays
+from .renderers import ColumnarJSONRenderer, wants_columnar
+from .result_cache import ResultCache
+from .streaming import StreamingLimitExceeded, StreamingSessionRegistry
 from .data_simulator import generate_simulated_data
 import numpy as np
 from datetime import datetime
+import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 # Singleton instance serwisu
 _stress_service = None
+_stress_service_lock = threading.Lock()
+
 
 def get_stress_service():
-    """Zwraca singleton instance serwisu klasyfikacji."""
+    """Zwraca singleton instance serwisu klasyfikacji (bezpieczne przy wielu wątkach)."""
     global _stress_service
     if _stress_service is None:
-        _stress_service = StressClassificationService()
-        try:
-            _stress_service.load_model()
-            logger.info("Model klasyfikacji stresu załadowany pomyślnie")
-        except Exception as e:
-            logger.error(f"Błąd podczas ładowania modelu: {e}")
-            raise
+        with _stress_service_lock:
+            if _stress_service is None:
+                config = getattr(settings, 'STRESS_CLASSIFICATION', {})
+                result_cache = None
+                if config.get('RESULT_CACHE_SIZE', 0) > 0:
+                    result_cache = ResultCache(
+                        max_entries=config['RESULT_CACHE_SIZE'],
+                        disk_dir=config.get('RESULT_CACHE_DIR') or None,
+                        disk_max_bytes=config.get('RESULT_CACHE_DISK_MAX_MB', 512) * 1024 * 1024,
+                        ttl_sec=config.get('RESULT_CACHE_TTL_SEC', 0),
+                    )
+                service = StressClassificationService(
+                    batching=config.get('BATCHING', False),
+                    max_batch_size=config.get('MAX_BATCH_SIZE', 256),
+                    max_wait_ms=config.get('MAX_WAIT_MS', 2.0),
+                    model_format=config.get('MODEL_FORMAT', 'auto'),
+                    onnx_threads=config.get('ONNX_INTRA_OP_THREADS', 0),
+                    inference_socket=config.get('INFERENCE_SOCKET') or None,
+                    inference_timeout=config.get('INFERENCE_TIMEOUT_SEC', 60),
+                    result_cache=result_cache,
+                    chunk_sec=config.get('CHUNK_SEC', 600),
+                    overlap_inference=config.get('OVERLAP_INFERENCE', 'off'),
+                    fold_normalization=config.get('FOLD_NORMALIZATION', True),
+                    instrumentation=config.get('INSTRUMENTATION', 'off'),
+                )
+                if service.inference_client is not None:
+                    # Model jest załadowany w procesach serwera inferencji, nie w workerze WWW
+                    logger.info(f"Klasyfikacja stresu przez serwer inferencji: {service.inference_client.socket_path}")
+                else:
+                    try:
+                        service.load_model()
+                        logger.info(f"Model klasyfikacji stresu załadowany pomyślnie ({service.loaded_format})")
+                    except Exception as e:
+                        logger.error(f"Błąd podczas ładowania modelu: {e}")
+                        raise
+                _stress_service = service
     return _stress_service
 
 
+def wants_timings(request):
+    """Czy klient poprosił o pomiary etapów klasyfikacji w metadata (`?timings=true`)."""
+    return request.query_params.get('timings', '').lower() in ('1', 'true', 'yes')
+
+
+# Rejestr sesji strumieniowych (w pamięci procesu)
+_stream_registry = StreamingSessionRegistry(
+    max_sessions=getattr(settings, 'STRESS_CLASSIFICATION', {}).get('STREAMING_MAX_SESSIONS', 100),
+    max_buffered_sec=getattr(settings, 'STRESS_CLASSIFICATION', {}).get('STREAMING_MAX_BUFFERED_SEC', 3600),
+)
+
+
 class StressClassificationView(APIView):
     """
     Endpoint do klasyfikacji poziomu stresu na podstawie sygnałów biometrycznych.
@@ -37,6 +98,7 @@ class StressClassificationView(APIView):
     Zwraca szczegółową analizę stresu w formacie JSON.
     """
     permission_classes = [AllowAny]  # Można zmienić na IsAuthenticated jeśli potrzeba
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
     
     @extend_schema(
         summary="Klasyfikacja stresu",
@@ -53,6 +115,22 @@ class StressClassificationView(APIView):
         - Statistics: statystyki rozkładu klas
         - Segments: lista wszystkich segmentów czasowych z predykcjami
         - Stress moments: lista momentów wykrytego stresu
+        
+        Format kolumnowy (`?format=columnar` lub `Accept: application/vnd.synaptis.columnar+json`):
+        - segments: równoległe tablice time_seconds, class_id, confidence i macierz probabilities (N x 4)
+        - stress_moments: segment_index - indeksy segmentów klasy Stress
+        - classes: tabela opisów klas (nazwa, opis, poziom stresu) indeksowana przez class_id
+        - timestamp segmentu = metadata.start_timestamp + time_seconds
+        
+        Poziom szczegółowości (`fidelity`) dla długich nagrań:
+        - full (domyślnie): predykcja każdego okna (krok 10 s)
+        - adaptive: okna co 30 s, doprecyzowanie krokiem 10 s przy zmianie klasy lub pewności < 0.6
+        - overview: tylko okna co 30 s (ok. 3x mniej predykcji)
+        Poza `full` każdy segment ma pole `inferred` (false = wynik przepisany z sąsiedniego okna),
+        a metadata - `fidelity`, `inferred_segments` i `filled_segments`.
+        
+        `?timings=true` dodaje `metadata.timings`: czas całkowity i czasy etapów (resampling,
+        segmentation, normalization, forward, analysis, json_output) w ms oraz liczniki okien i batchy.
         """,
         request=StressClassificationRequestSerializer,
         responses={
@@ -95,6 +173,9 @@ class StressClassificationView(APIView):
                     'bvp': [0.5, 0.6, 0.7],
                     'eda': [0.3, 0.4, 0.5],
                     'temp': [36.5, 36.6, 36.7],
+                    'metadata': {
+                        'sampling_rates': {'ACC': 32, 'BVP': 64, 'EDA': 4, 'TEMP': 4}
+                    },
                     'start_timestamp': '2025-11-07T10:00:00'
                 },
                 request_only=True
@@ -125,14 +206,15 @@ class StressClassificationView(APIView):
             use_simulation = validated_data.get('use_simulation', True)
             
             # Sprawdź czy wszystkie dane są podane
-            has_all_data = all([
-                validated_data.get('acc'),
-                validated_data.get('bvp'),
-                validated_data.get('eda'),
-                validated_data.get('temp')
-            ])
+            has_all_data = all(
+                len(validated_data.get(name, [])) > 0 for name in ('acc', 'bvp', 'eda', 'temp')
+            )
             
-            if use_simulation or not has_all_data:
+            # Częstotliwości próbkowania z metadanych urządzenia (tylko dla rzeczywistych danych)
+            sampling_rates = None
+            
+            simulated = use_simulation or not has_all_data
+            if simulated:
                 # Użyj symulowanych danych
                 logger.info("Używanie symulowanych danych")
                 acc, bvp, eda, temp = generate_simulated_data()
@@ -144,11 +226,11 @@ class StressClassificationView(APIView):
                 eda_data = validated_data.get('eda', [])
                 temp_data = validated_data.get('temp', [])
                 
-                # Konwersja do numpy arrays
-                acc = np.array(acc_data)
-                bvp = np.array(bvp_data)
-                eda = np.array(eda_data)
-                temp = np.array(temp_data)
+                # Serializer zwraca już tablice float32 (SignalArrayField)
+                acc = np.asarray(acc_data)
+                bvp = np.asarray(bvp_data)
+                eda = np.asarray(eda_data)
+                temp = np.asarray(temp_data)
                 
                 # Walidacja wymiarów
                 if len(acc.shape) != 2 or acc.shape[1] != 3:
@@ -174,18 +256,142 @@ class StressClassificationView(APIView):
                         {'error': 'TEMP musi być tablicą 1D'},
                         status=status.HTTP_400_BAD_REQUEST
                     )
+                
+                sampling_rates = validated_data.get('metadata', {}).get('sampling_rates')
             
-            # Parsowanie timestampu
-            start_timestamp = validated_data.get('start_timestamp')
-            if start_timestamp:
-                if isinstance(start_timestamp, str):
-                    start_timestamp = datetime.fromisoformat(start_timestamp.replace('Z', '+00:00'))
-            else:
-                start_timestamp = datetime.now()
+            # Bez timestampu generate_json_output użyje aktualnego czasu (wynik nie trafia do cache);
+            # losowe dane symulacji nigdy się nie powtórzą - też bez cache
+            result = service.classify(acc, bvp, eda, temp, validated_data.get('start_timestamp'),
+                                      sampling_rates=sampling_rates,
+                                      columnar=wants_columnar(request),
+                                      fidelity=validated_data.get('fidelity', 'full'),
+                                      timings=wants_timings(request),
+                                      cache=not simulated)
             
-            # Wykonaj klasyfikację
-            result = service.classify(acc, bvp, eda, temp, start_timestamp)
+            return Response(result, status=status.HTTP_200_OK)
             
+        except FileNotFoundError as e:
+            logger.error(f"Nie znaleziono pliku: {e}")
+            return Response(
+                {'error': 'Model nie znaleziony', 'details': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        except ValueError as e:
+            logger.error(f"Błąd walidacji danych: {e}")
+            return Response(
+                {'error': 'Błąd walidacji danych', 'details': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Błąd podczas klasyfikacji: {e}", exc_info=True)
+            return Response(
+                {'error': 'Błąd podczas klasyfikacji', 'details': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+
+class StressClassificationBinaryView(APIView):
+    """
+    Klasyfikacja stresu dla sygnałów przesłanych binarnie (surowe float32/float64, .npy, .npz).
+    
+    Próbki są dekodowane przez NumPy bez walidacji każdej liczby w Pythonie; żądania większe
+    niż `STRESS_CLASSIFICATION['MAX_UPLOAD_MB']` są odrzucane przed odczytem ciała.
+    """
+    permission_classes = [AllowAny]  # Jak w StressClassificationView
+    parser_classes = [SignalArrayParser, MultiPartParser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    
+    @extend_schema(
+        summary="Klasyfikacja stresu - sygnały binarne",
+        description="""
+        Wynik jak w POST /api/stress-classification/ (również `?format=columnar`).
+        
+        `Content-Type: application/octet-stream` - próbki acc, bvp, eda, temp jedna po drugiej,
+        nagłówek `X-Signals-Header` (JSON):
+        {"shapes": {"acc": [N, 3], "bvp": [M], "eda": [K], "temp": [L]}, "dtype": "<f4",
+         "metadata": {"sampling_rates": {"ACC": 32, "BVP": 64, "EDA": 4, "TEMP": 4}},
+         "start_timestamp": "2025-11-07T10:00:00"}
+        
+        `multipart/form-data` - plik `signals` (.npz z tablicami acc, bvp, eda, temp) albo pliki
+        .npy `acc`, `bvp`, `eda`, `temp`; opcjonalne pola `metadata` (JSON) i `start_timestamp`.
+        """,
+        request={
+            'application/octet-stream': {'type': 'string', 'format': 'binary'},
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'signals': {'type': 'string', 'format': 'binary'},
+                    'metadata': {'type': 'string'},
+                    'start_timestamp': {'type': 'string', 'format': 'date-time'},
+                },
+            },
+        },
+        responses={
+            200: {'description': 'Sukces - analiza stresu jak w POST /api/stress-classification/'},
+            400: {'description': 'Błąd walidacji danych lub niepoprawny format plików'},
+            411: {'description': 'Brak nagłówka Content-Length'},
+            413: {'description': 'Żądanie przekracza limit rozmiaru'},
+            500: {'description': 'Błąd serwera - problem z modelem lub przetwarzaniem'}
+        }
+    )
+    def post(self, request):
+        """
+        POST /api/stress-classification/binary/
+        """
+        # Limit rozmiaru sprawdzany przed odczytem ciała (request.data czyta i parsuje całość)
+        max_bytes = getattr(settings, 'STRESS_CLASSIFICATION', {}).get('MAX_UPLOAD_MB', 64) * 1024 * 1024
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length <= 0:
+            return Response({'error': 'Wymagany nagłówek Content-Length'},
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+        if content_length > max_bytes:
+            return Response(
+                {'error': 'Żądanie za duże', 'details': f"{content_length} B > limit {max_bytes} B"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        try:
+            data = request.data
+            if request.content_type.startswith('multipart/'):
+                signals = load_signal_files(request.FILES)
+                options = {'start_timestamp': data.get('start_timestamp') or None,
+                           'fidelity': data.get('fidelity') or None}
+                if data.get('metadata'):
+                    options['metadata'] = json.loads(data['metadata'])
+            else:
+                signals = data
+                options = {key: data[key] for key in ('metadata', 'start_timestamp', 'fidelity') if key in data}
+            arrays = validate_signal_arrays(signals)
+        except ValueError as e:
+            return Response(
+                {'error': 'Błąd walidacji danych', 'details': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = BinaryClassificationOptionsSerializer(
+            data={key: value for key, value in options.items() if value is not None}
+        )
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Błąd walidacji', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        validated_data = serializer.validated_data
+        
+        try:
+            service = get_stress_service()
+            result = service.classify(
+                arrays['acc'], arrays['bvp'], arrays['eda'], arrays['temp'],
+                validated_data.get('start_timestamp'),
+                sampling_rates=validated_data.get('metadata', {}).get('sampling_rates'),
+                columnar=wants_columnar(request),
+                fidelity=validated_data.get('fidelity', 'full'),
+                timings=wants_timings(request)
+            )
             return Response(result, status=status.HTTP_200_OK)
             
         except FileNotFoundError as e:
@@ -207,3 +413,341 @@ class StressClassificationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+
+class StreamingSessionCreateView(APIView):
+    """
+    Otwiera sesję klasyfikacji strumieniowej dla danych napływających na żywo z bransoletki.
+    """
+    permission_classes = [AllowAny]
+    
+    @extend_schema(
+        summary="Otwarcie sesji klasyfikacji strumieniowej",
+        description="""
+        Tworzy sesję, do której można wysyłać kolejne kawałki sygnałów
+        (POST /api/stress-classification/streams/{session_id}/chunks/).
+        Każda odpowiedź zawiera klasyfikacje tylko nowo domkniętych okien 30 s.
+        """,
+        request=StreamingSessionCreateSerializer,
+        responses={
+            201: {'description': 'Sesja utworzona - zwraca session_id'},
+            429: {'description': 'Osiągnięto limit aktywnych sesji strumieniowych'}
+        }
+    )
+    def post(self, request):
+        serializer = StreamingSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Błąd walidacji', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        validated_data = serializer.validated_data
+        sampling_rates = validated_data.get('metadata', {}).get('sampling_rates')
+        
+        try:
+            session = _stream_registry.open(
+                get_stress_service(),
+                start_timestamp=validated_data.get('start_timestamp') or datetime.now(),
+                sampling_rates=sampling_rates
+            )
+        except StreamingLimitExceeded as e:
+            return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        except FileNotFoundError as e:
+            logger.error(f"Nie znaleziono pliku: {e}")
+            return Response(
+                {'error': 'Model nie znaleziony', 'details': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        except ValueError as e:
+            return Response(
+                {'error': 'Błąd walidacji danych', 'details': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        logger.info(f"Otwarto sesję strumieniową {session.session_id}")
+        return Response({
+            'session_id': str(session.session_id),
+            'start_timestamp': session.start_timestamp.isoformat(),
+            'sampling_rates': session.sampling_rates,
+        }, status=status.HTTP_201_CREATED)
+
+
+class StreamingSessionDetailView(APIView):
+    """
+    Zwraca stan sesji strumieniowej oraz pełny wynik klasyfikacji dotychczasowych segmentów.
+    """
+    permission_classes = [AllowAny]
+    
+    @extend_schema(
+        summary="Stan sesji klasyfikacji strumieniowej",
+        responses={
+            200: {'description': 'Stan sesji i wynik klasyfikacji (jak w POST /api/stress-classification/)'},
+            404: {'description': 'Sesja nie istnieje lub wygasła'}
+        }
+    )
+    def get(self, request, session_id):
+        session = _stream_registry.get(session_id)
+        if session is None:
+            return Response({'error': 'Sesja nie istnieje lub wygasła'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'session_id': str(session.session_id),
+            'num_segments': session.num_segments,
+            'processed_seconds': session.processed_seconds,
+            'closed': session.closed,
+            'result': session.result()
+        }, status=status.HTTP_200_OK)
+
+
+class StreamingSessionChunkView(APIView):
+    """
+    Przyjmuje kolejny kawałek sygnałów i zwraca klasyfikacje nowo domkniętych okien.
+    """
+    permission_classes = [AllowAny]
+    
+    @extend_schema(
+        summary="Wysłanie kawałka sygnałów do sesji strumieniowej",
+        description="""
+        Kawałek może zawierać dowolny podzbiór sygnałów (acc, bvp, eda, temp).
+        Zwraca tylko segmenty, których okna 30 s zostały domknięte dzięki nowym danym.
+        """,
+        request=SignalsSerializer,
+        responses={
+            200: {'description': 'Nowe segmenty i momenty stresu'},
+            404: {'description': 'Sesja nie istnieje lub wygasła'},
+            413: {'description': 'Kawałek przekracza limit danych oczekujących w sesji'}
+        }
+    )
+    def post(self, request, session_id):
+        session = _stream_registry.get(session_id)
+        if session is None:
+            return Response({'error': 'Sesja nie istnieje lub wygasła'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = SignalsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Błąd walidacji', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        signals = {
+            name.upper(): values for name, values in serializer.validated_data.items()
+        }
+        
+        try:
+            update = session.push(signals)
+        except StreamingLimitExceeded as e:
+            return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            logger.error(f"Błąd walidacji danych: {e}")
+            return Response(
+                {'error': 'Błąd walidacji danych', 'details': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Błąd podczas klasyfikacji strumieniowej: {e}", exc_info=True)
+            return Response(
+                {'error': 'Błąd podczas klasyfikacji', 'details': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response(update, status=status.HTTP_200_OK)
+
+
+class StreamingSessionCloseView(APIView):
+    """
+    Zamyka sesję strumieniową i zwraca ostatnie segmenty oraz pełny wynik klasyfikacji.
+    """
+    permission_classes = [AllowAny]
+    
+    @extend_schema(
+        summary="Zamknięcie sesji klasyfikacji strumieniowej",
+        responses={
+            200: {'description': 'Ostatnie segmenty i pełny wynik klasyfikacji'},
+            404: {'description': 'Sesja nie istnieje lub wygasła'}
+        }
+    )
+    def post(self, request, session_id):
+        session = _stream_registry.get(session_id)
+        if session is None:
+            return Response({'error': 'Sesja nie istnieje lub wygasła'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            update = session.close()
+        except ValueError as e:
+            return Response(
+                {'error': 'Błąd walidacji danych', 'details': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        finally:
+            _stream_registry.remove(session_id)
+        
+        update['result'] = session.result()
+        logger.info(f"Zamknięto sesję strumieniową {session_id} ({session.num_segments} segmentów)")
+        return Response(update, status=status.HTTP_200_OK)
+
+
+class ClassificationJobListView(APIView):
+    """
+    Zadania klasyfikacji w tle: lista zadań użytkownika i zlecenie nowej klasyfikacji.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    
+    @extend_schema(
+        summary="Lista zadań w tle użytkownika",
+        responses={200: ClassificationJobSerializer(many=True)}
+    )
+    def get(self, request):
+        jobs = ClassificationJob.objects.filter(user=request.user)[:50]
+        return Response(ClassificationJobSerializer(jobs, many=True).data, status=status.HTTP_200_OK)
+    
+    @extend_schema(
+        summary="Zleć klasyfikację stresu w tle",
+        description="""
+        Body jak w POST /api/stress-classification/. Klasyfikacja jest wykonywana w lokalnej puli
+        procesów; odpowiedź 202 zawiera id zadania. Stan, postęp i wynik:
+        GET /api/stress-classification/jobs/{job_id}/ (long-polling: `?wait=<sekundy>`).
+        Z `?format=columnar` wynik zadania ma format kolumnowy.
+        """,
+        request=StressClassificationRequestSerializer,
+        responses={
+            202: ClassificationJobSerializer,
+            400: {'description': 'Błąd walidacji danych wejściowych'},
+            429: {'description': 'Przekroczony limit aktywnych zadań użytkownika'}
+        }
+    )
+    def post(self, request):
+        serializer = StressClassificationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Błąd walidacji', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        validated_data = serializer.validated_data
+        has_all_data = all(
+            len(validated_data.get(name, [])) > 0 for name in ('acc', 'bvp', 'eda', 'temp')
+        )
+        
+        # Sygnały trafiają tylko do procesu roboczego; w bazie zapisywane są parametry
+        inputs = None
+        sampling_rates = None
+        if not validated_data.get('use_simulation', True) and has_all_data:
+            inputs = tuple(validated_data[name] for name in ('acc', 'bvp', 'eda', 'temp'))
+            sampling_rates = validated_data.get('metadata', {}).get('sampling_rates')
+        
+        # Bez timestampu czas początku ustala classify w procesie roboczym
+        start_timestamp = validated_data.get('start_timestamp')
+        params = {
+            'start_timestamp': start_timestamp.isoformat() if start_timestamp else None,
+            'sampling_rates': sampling_rates,
+            'use_simulation': inputs is None,
+            'num_samples': {name: len(values) for name, values in zip(('acc', 'bvp', 'eda', 'temp'), inputs or ())},
+            'columnar': wants_columnar(request),
+            'fidelity': validated_data.get('fidelity', 'full'),
+            'timings': wants_timings(request),
+        }
+        try:
+            job = get_job_runner().submit(request.user, ClassificationJob.KIND_CLASSIFICATION, params, inputs)
+        except JobLimitExceeded as e:
+            return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        return Response(ClassificationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ClassificationJobDetailView(APIView):
+    """
+    Stan, postęp i wynik zadania w tle (long-polling przez `?wait=<sekundy>`).
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    
+    @extend_schema(
+        summary="Stan zadania w tle",
+        description="""
+        Z `?wait=<sekundy>` odpowiedź jest wstrzymywana do zmiany statusu lub postępu zadania
+        (najdłużej JOB_LONG_POLL_MAX_SEC). Wynik (`result`) jest dostępny po zakończeniu zadania.
+        """,
+        responses={
+            200: ClassificationJobDetailSerializer,
+            404: {'description': 'Zadanie nie istnieje'}
+        }
+    )
+    def get(self, request, job_id):
+        job = ClassificationJob.objects.filter(pk=job_id, user=request.user).first()
+        if job is None:
+            return Response({'error': 'Zadanie nie istnieje'}, status=status.HTTP_404_NOT_FOUND)
+        
+        refresh_job(job)
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = 0
+        max_wait = getattr(settings, 'STRESS_CLASSIFICATION', {}).get('JOB_LONG_POLL_MAX_SEC', 30)
+        if wait > 0:
+            wait_for_job(job, min(wait, max_wait))
+        
+        return Response(ClassificationJobDetailSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ClassificationJobCancelView(APIView):
+    """
+    Anuluje oczekujące lub trwające zadanie w tle.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(
+        summary="Anulowanie zadania w tle",
+        responses={
+            200: ClassificationJobSerializer,
+            404: {'description': 'Zadanie nie istnieje'},
+            409: {'description': 'Zadanie jest już zakończone'}
+        }
+    )
+    def post(self, request, job_id):
+        job = ClassificationJob.objects.filter(pk=job_id, user=request.user).first()
+        if job is None:
+            return Response({'error': 'Zadanie nie istnieje'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if not cancel_job(job):
+            job.refresh_from_db()
+            return Response(
+                {'error': 'Zadanie jest już zakończone', 'status': job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        job.refresh_from_db()
+        logger.info(f"Anulowano zadanie {job.pk}")
+        return Response(ClassificationJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class StressServiceStatsView(APIView):
+    """
+    Zwraca statystyki serwisu klasyfikacji (kolejka i rozmiary wspólnych batchy, cache wyników,
+    zagregowane pomiary etapów classify).
+    """
+    permission_classes = [IsAdminUser]  # Ścieżka gniazda, kolejki i czasy etapów - tylko dla administratorów
+    
+    @extend_schema(
+        summary="Statystyki serwisu klasyfikacji",
+        responses={
+            200: {'description': 'Format i wersja modelu, faktyczne tryby overlap inference i wbudowanej normalizacji, '
+                                 'statystyki schedulera predykcji i cache wyników (null, jeśli wyłączone) '
+                                 'oraz pomiary etapów classify (instrumentation)'},
+            403: {'description': 'Dostęp tylko dla administratorów (is_staff)'}
+        }
+    )
+    def get(self, request):
+        service = get_stress_service()
+        return Response({
+            'model_format': service.loaded_format,
+            'model_version': service.model_version,
+            # Tryby faktycznie użyte przez załadowany model (żądany overlap może być niedostępny, np. ONNX)
+            'overlap_inference': {'requested': service.overlap_inference, 'active': service.overlap_inference_active},
+            'normalization_folded': service.normalization_folded if service.inference_client is None else None,
+            'inference_socket': service.inference_client.socket_path if service.inference_client else None,
+            'scheduler': service.scheduler.stats() if service.scheduler else None,
+            'result_cache': service.result_cache.stats() if service.result_cache else None,
+            'instrumentation': {'mode': service.instrumentation, **service.instrumentation_stats.stats()}
+        }, status=status.HTTP_200_OK)
@@ -1,7 +1,4 @@
-import pickle
 import numpy as np
-import pandas as pd
-from scipy import signal
 from collections import Counter
 import os
 import torch
@@ -9,9 +6,22 @@ import torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 from pathlib import Path
 import argparse
+import glob
+import io
 import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Iterator
+
+# Przetwarzanie sygnałów współdzielone z serwisem klasyfikacji w Backend/stress_classification
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'Backend'))
+from stress_classification.preprocessing import (  # noqa: E402
+    DEFAULT_CHUNK_SEC, combine_signals, iter_signal_windows, segment_data,
+)
+from wesad_cache import load_recording  # noqa: E402
 
 # --- KONFIGURACJA PRZETWARZANIA ---
 TARGET_RATE = 4    # Hz - Docelowa częstotliwość próbkowania
@@ -57,47 +67,26 @@ TARGET_LABELS = [1, 2, 3, 4]
 
 # --- FUNKCJE PRZETWARZANIA DANYCH ---
 
-def resample_signal(df_signal, original_rate, target_rate):
-    """Unifikuje częstotliwość próbkowania (downsampling) za pomocą SciPy resample."""
-    if original_rate == target_rate:
-        return df_signal
-    
-    num_samples_target = int(len(df_signal) * (target_rate / original_rate))
-    resampled_data = signal.resample(df_signal, num_samples_target)
-    return pd.DataFrame(resampled_data, columns=df_signal.columns)
-
-
-def segment_data(df_combined, target_rate, window_sec, step_sec):
-    """Segmentuje dane na okna czasowe (bez etykiet - dla predykcji)."""
-    window_samples = window_sec * target_rate
-    step_samples = step_sec * target_rate
+def preprocess_from_pkl(file_path: str, chunk_sec: float = DEFAULT_CHUNK_SEC) -> Optional[Tuple[Iterator[np.ndarray], Optional[np.ndarray]]]:
+    """Przetwarza plik .pkl (lub katalog cache Sx.wesad) blokowo - zwraca generator bloków okien gotowych do klasyfikacji i etykiety.
     
-    segments = []
-    
-    for start in range(0, len(df_combined) - window_samples + 1, step_samples):
-        end = start + window_samples
-        data_segment = df_combined.iloc[start:end].values
-        segments.append(data_segment)
-    
-    return np.array(segments)
-
-
-def preprocess_from_pkl(file_path: str) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
-    """Przetwarza plik .pkl i zwraca dane gotowe do klasyfikacji."""
+    Resampling i segmentacja są wykonywane kolejnymi kawałkami `chunk_sec` sekund nagrania
+    (stan filtrów i nakładanie okien przechodzą przez granice kawałków), więc naraz
+    w pamięci są tylko okna jednego kawałka. Sygnały z klatki piersiowej (700 Hz) nie są zatrzymywane.
+    """
     subject_id = os.path.basename(file_path).split('.')[0]
     print(f"Przetwarzanie pliku: {subject_id}")
 
     try:
-        with open(file_path, 'rb') as file:
-            data = pickle.load(file, encoding='latin1')
+        # Z aktualnym cache (wesad_cache.py) sygnały są mapowane z plików .npy - blokowe
+        # przetwarzanie czyta z dysku tylko bieżący kawałek
+        recording = load_recording(file_path)
+        labels_700hz = recording['label']  # Opcjonalne - może nie być etykiet
         
-        wrist_signals = data['signal']['wrist']
-        labels_700hz = data.get('label', None)  # Opcjonalne - może nie być etykiet
-        
-        df_acc = pd.DataFrame(wrist_signals['ACC'], columns=['ACC_x', 'ACC_y', 'ACC_z'])
-        df_bvp = pd.DataFrame(wrist_signals['BVP'], columns=['BVP'])
-        df_eda = pd.DataFrame(wrist_signals['EDA'], columns=['EDA'])
-        df_temp = pd.DataFrame(wrist_signals['TEMP'], columns=['TEMP'])
+        acc = recording['ACC']
+        bvp = recording['BVP']
+        eda = recording['EDA']
+        temp = recording['TEMP']
         
     except FileNotFoundError:
         print(f"Błąd: Plik {file_path} nie został znaleziony.")
@@ -106,64 +95,23 @@ def preprocess_from_pkl(file_path: str) -> Optional[Tuple[np.ndarray, Optional[n
         print(f"Błąd podczas przetwarzania {file_path}: {e}")
         return None
     
-    # Downsampling do 4 Hz
-    df_acc_resampled = resample_signal(df_acc, 32, TARGET_RATE)
-    df_bvp_resampled = resample_signal(df_bvp, 64, TARGET_RATE)
-    df_eda_resampled = resample_signal(df_eda, 4, TARGET_RATE)
-    df_temp_resampled = resample_signal(df_temp, 4, TARGET_RATE)
-
-    # Ujednolicanie długości i połączenie
-    min_len = min(len(df_acc_resampled), len(df_bvp_resampled), len(df_eda_resampled), len(df_temp_resampled))
-    
-    df_combined = pd.concat([
-        df_acc_resampled.iloc[:min_len],
-        df_bvp_resampled.iloc[:min_len],
-        df_eda_resampled.iloc[:min_len],
-        df_temp_resampled.iloc[:min_len]
-    ], axis=1)
-
-    # Segmentacja danych
-    X_segments = segment_data(df_combined, TARGET_RATE, WINDOW_SEC, STEP_SEC)
-    
-    if len(X_segments) == 0:
-        print(f"  Ostrzeżenie: {subject_id} - za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
-        return None
-    
-    print(f"  Utworzono {len(X_segments)} segmentów (okien 30s)")
+    # Downsampling do 4 Hz, połączenie kanałów i segmentacja - kawałek po kawałku
+    blocks = iter_signal_windows(acc, bvp, eda, temp, TARGET_RATE, WINDOW_SEC, STEP_SEC, chunk_sec=chunk_sec)
     
-    return X_segments, labels_700hz if labels_700hz is not None else None
+    return blocks, labels_700hz if labels_700hz is not None else None
 
 
 def preprocess_from_raw_signals(acc: np.ndarray, bvp: np.ndarray, eda: np.ndarray, temp: np.ndarray) -> Optional[np.ndarray]:
     """Przetwarza surowe sygnały i zwraca dane gotowe do klasyfikacji."""
-    # Konwersja do DataFrame
     if acc.shape[1] != 3:
         print("Błąd: ACC powinien mieć 3 kolumny (x, y, z)")
         return None
     
-    df_acc = pd.DataFrame(acc, columns=['ACC_x', 'ACC_y', 'ACC_z'])
-    df_bvp = pd.DataFrame(bvp, columns=['BVP'])
-    df_eda = pd.DataFrame(eda, columns=['EDA'])
-    df_temp = pd.DataFrame(temp, columns=['TEMP'])
-    
-    # Downsampling do 4 Hz (zakładamy oryginalne częstotliwości)
-    df_acc_resampled = resample_signal(df_acc, 32, TARGET_RATE)
-    df_bvp_resampled = resample_signal(df_bvp, 64, TARGET_RATE)
-    df_eda_resampled = resample_signal(df_eda, 4, TARGET_RATE)
-    df_temp_resampled = resample_signal(df_temp, 4, TARGET_RATE)
-
-    # Ujednolicanie długości i połączenie
-    min_len = min(len(df_acc_resampled), len(df_bvp_resampled), len(df_eda_resampled), len(df_temp_resampled))
-    
-    df_combined = pd.concat([
-        df_acc_resampled.iloc[:min_len],
-        df_bvp_resampled.iloc[:min_len],
-        df_eda_resampled.iloc[:min_len],
-        df_temp_resampled.iloc[:min_len]
-    ], axis=1)
+    # Downsampling do 4 Hz i połączenie kanałów w jeden bufor (T, 6)
+    combined = combine_signals(acc, bvp, eda, temp, TARGET_RATE)
 
     # Segmentacja danych
-    X_segments = segment_data(df_combined, TARGET_RATE, WINDOW_SEC, STEP_SEC)
+    X_segments = segment_data(combined, TARGET_RATE, WINDOW_SEC, STEP_SEC)
     
     if len(X_segments) == 0:
         print(f"  Ostrzeżenie: za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
@@ -179,8 +127,9 @@ def normalize_data(X, mean, std):
     num_channels = X.shape[-1]
     X_flat = X.reshape(-1, num_channels)
     
-    # Normalizacja używając zapisanych parametrów
-    X_normalized = (X_flat - mean) / std
+    # Normalizacja używając zapisanych parametrów (w typie danych - float32 bez promocji do float64)
+    dtype = X_flat.dtype if np.issubdtype(X_flat.dtype, np.floating) else np.float64
+    X_normalized = (X_flat - np.asarray(mean, dtype=dtype)) / np.asarray(std, dtype=dtype)
     X_normalized = X_normalized.reshape(X.shape)
     
     return X_normalized
@@ -265,6 +214,23 @@ def predict(model, dataloader):
     return np.array(all_predictions), np.array(all_probabilities)
 
 
+def predict_blocks(model, blocks: Iterator[np.ndarray], mean, std) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalizuje i klasyfikuje kolejne bloki okien; zwraca połączone predykcje i prawdopodobieństwa."""
+    all_predictions = []
+    all_probabilities = []
+    
+    for X_block in blocks:
+        X_normalized = normalize_data(X_block, mean, std)
+        dataloader = DataLoader(WESADDataset(X_normalized), batch_size=BATCH_SIZE, shuffle=False)
+        predictions, probabilities = predict(model, dataloader)
+        all_predictions.append(predictions)
+        all_probabilities.append(probabilities)
+    
+    if not all_predictions:
+        return np.empty(0, dtype=np.int64), np.empty((0, NUM_CLASSES), dtype=np.float32)
+    return np.concatenate(all_predictions), np.concatenate(all_probabilities)
+
+
 def analyze_stress_level(predictions: np.ndarray, probabilities: np.ndarray, start_timestamp: Optional[datetime] = None) -> Dict:
     """Analizuje poziom stresu na podstawie predykcji."""
     num_segments = len(predictions)
@@ -457,26 +423,15 @@ def print_classification_results(results: Dict, predictions: np.ndarray, probabi
         print(f"\n✅ Brak wykrytego stresu - stan w normie")
 
 
-def classify_file(file_path: str, model_path: str, norm_params_path: str, 
-                 output_json: Optional[str] = None, start_timestamp: Optional[datetime] = None,
-                 return_json: bool = False) -> Optional[Dict]:
-    """Główna funkcja klasyfikująca plik .pkl.
-    
-    Args:
-        file_path: Ścieżka do pliku .pkl
-        model_path: Ścieżka do modelu
-        norm_params_path: Ścieżka do parametrów normalizacji
-        output_json: Opcjonalna ścieżka do zapisu JSON (jeśli None, nie zapisuje)
-        start_timestamp: Opcjonalny timestamp początku nagrania
-        return_json: Czy zwrócić JSON jako string w wynikach
-    
-    Returns:
-        Dict z wynikami klasyfikacji i opcjonalnie JSON
-    """
-    # Ładowanie modelu
-    base_dir = Path(__file__).parent
-    model_full_path = base_dir / model_path if not Path(model_path).is_absolute() else Path(model_path)
-    norm_full_path = base_dir / norm_params_path if not Path(norm_params_path).is_absolute() else Path(norm_params_path)
+def resolve_path(path: str) -> Path:
+    """Ścieżka względna jest liczona od katalogu skryptu."""
+    return Path(path) if Path(path).is_absolute() else Path(__file__).parent / path
+
+
+def load_classifier(model_path: str, norm_params_path: str) -> Optional[Tuple[nn.Module, np.ndarray, np.ndarray]]:
+    """Ładuje model i parametry normalizacji; zwraca (model, mean, std) lub None, jeśli brakuje plików."""
+    model_full_path = resolve_path(model_path)
+    norm_full_path = resolve_path(norm_params_path)
     
     if not model_full_path.exists():
         print(f"Błąd: Nie znaleziono modelu: {model_full_path}")
@@ -505,23 +460,54 @@ def classify_file(file_path: str, model_path: str, norm_params_path: str,
     model.eval()
     print(f"Model załadowany pomyślnie na urządzeniu: {DEVICE}")
     
+    return model, mean, std
+
+
+def classify_file(file_path: str, model_path: str, norm_params_path: str, 
+                 output_json: Optional[str] = None, start_timestamp: Optional[datetime] = None,
+                 return_json: bool = False, chunk_sec: float = DEFAULT_CHUNK_SEC) -> Optional[Dict]:
+    """Główna funkcja klasyfikująca plik .pkl.
+    
+    Args:
+        file_path: Ścieżka do pliku .pkl
+        model_path: Ścieżka do modelu
+        norm_params_path: Ścieżka do parametrów normalizacji
+        output_json: Opcjonalna ścieżka do zapisu JSON (jeśli None, nie zapisuje)
+        start_timestamp: Opcjonalny timestamp początku nagrania
+        return_json: Czy zwrócić JSON jako string w wynikach
+        chunk_sec: Długość kawałka nagrania (s) w przetwarzaniu blokowym
+    
+    Returns:
+        Dict z wynikami klasyfikacji i opcjonalnie JSON
+    """
+    classifier = load_classifier(model_path, norm_params_path)
+    if classifier is None:
+        return None
+    
+    model, mean, std = classifier
+    return classify_with_model(file_path, model, mean, std, output_json, start_timestamp, return_json, chunk_sec)
+
+
+def classify_with_model(file_path: str, model: nn.Module, mean: np.ndarray, std: np.ndarray,
+                        output_json: Optional[str] = None, start_timestamp: Optional[datetime] = None,
+                        return_json: bool = False, chunk_sec: float = DEFAULT_CHUNK_SEC) -> Optional[Dict]:
+    """Klasyfikuje plik .pkl załadowanym modelem (parametry jak w `classify_file`)."""
     # Przetwarzanie pliku
-    result = preprocess_from_pkl(file_path)
+    result = preprocess_from_pkl(file_path, chunk_sec)
     if result is None:
         return None
     
-    X_segments, _ = result
+    blocks, _ = result
     
-    # Normalizacja
-    X_normalized = normalize_data(X_segments, mean, std)
+    # Normalizacja i predykcja blok po bloku
+    print("Wykonywanie predykcji...")
+    predictions, probabilities = predict_blocks(model, blocks, mean, std)
     
-    # Tworzenie datasetu i dataloadera
-    dataset = WESADDataset(X_normalized)
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=False)
+    if len(predictions) == 0:
+        print(f"  Ostrzeżenie: za mało danych do segmentacji (wymagane minimum {WINDOW_SEC * TARGET_RATE} próbek)")
+        return None
     
-    # Predykcja
-    print("Wykonywanie predykcji...")
-    predictions, probabilities = predict(model, dataloader)
+    print(f"  Utworzono {len(predictions)} segmentów (okien 30s)")
     
     # Analiza wyników
     results = analyze_stress_level(predictions, probabilities, start_timestamp)
@@ -534,9 +520,7 @@ def classify_file(file_path: str, model_path: str, norm_params_path: str,
     
     # Zapis JSON do pliku jeśli podano ścieżkę
     if output_json:
-        output_path = Path(output_json)
-        if not output_path.is_absolute():
-            output_path = base_dir / output_json
+        output_path = resolve_path(output_json)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(json_output, f, indent=2, ensure_ascii=False)
@@ -556,9 +540,192 @@ def classify_file(file_path: str, model_path: str, norm_params_path: str,
     return result_dict
 
 
+# --- TRYB WSADOWY ---
+
+# Plik indeksu wyników w katalogu wyjściowym trybu wsadowego
+BATCH_INDEX_FILE = 'index.json'
+
+# Model załadowany w procesie roboczym puli (raz na proces, nie na plik)
+_worker_classifier = None
+
+
+def expand_inputs(patterns: List[str]) -> List[Path]:
+    """Rozwija listę plików i wzorców glob (np. 'WESAD/S*/*.pkl', 'dane/**/*.pkl') - bez duplikatów."""
+    inputs = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = Path(match).resolve()
+            if path not in seen:
+                seen.add(path)
+                inputs.append(path)
+    return inputs
+
+
+def is_output_current(output_path: Path, dependencies: List[Path]) -> bool:
+    """Wynik jest aktualny, jeśli istnieje i jest nowszy od pliku wejściowego, modelu i parametrów normalizacji."""
+    if not output_path.exists():
+        return False
+    output_mtime = output_path.stat().st_mtime
+    return all(dependency.stat().st_mtime <= output_mtime for dependency in dependencies)
+
+
+def write_json_atomic(output_path: Path, data: Dict):
+    """Zapisuje JSON przez plik tymczasowy - przerwany zapis nie zostawia wyniku uznawanego za aktualny."""
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+
+
+def summarize_output(json_output: Dict) -> Dict:
+    """Skrót wyniku do indeksu: liczba segmentów, czas trwania i sekcja `summary`."""
+    return {
+        'num_segments': json_output['metadata']['num_segments'],
+        'total_duration_seconds': json_output['metadata']['total_duration_seconds'],
+        **json_output['summary'],
+    }
+
+
+def _init_batch_worker(model_path: str, norm_params_path: str, threads: int):
+    # Komunikaty ładowania modelu nie trafiają na konsolę trybu wsadowego (raport pliku - _classify_batch_item)
+    global _worker_classifier
+    torch.set_num_threads(threads)
+    with redirect_stdout(io.StringIO()) as log:
+        classifier = load_classifier(model_path, norm_params_path)
+    if classifier is None:
+        # Wyjątek inicjalizatora przerywa pulę - pliki nie są klasyfikowane bez modelu
+        raise RuntimeError(log.getvalue().strip() or "Nie udało się załadować modelu")
+    _worker_classifier = classifier
+
+
+def _classify_batch_item(input_path: Path, output_path: Path, start_timestamp: Optional[datetime],
+                         chunk_sec: float) -> Dict:
+    model, mean, std = _worker_classifier
+    with redirect_stdout(io.StringIO()) as log:
+        result = classify_with_model(str(input_path), model, mean, std, start_timestamp=start_timestamp,
+                                     chunk_sec=chunk_sec)
+    if result is None:
+        # Przyczyna jest w raporcie tekstowym (ostatni komunikat błędu lub ostrzeżenia)
+        messages = [line.strip() for line in log.getvalue().splitlines()
+                    if line.strip().startswith(('Błąd', 'Ostrzeżenie'))]
+        raise ValueError(messages[-1] if messages else "Nie udało się sklasyfikować pliku")
+    write_json_atomic(output_path, result['json'])
+    return summarize_output(result['json'])
+
+
+def classify_batch(patterns: List[str], model_path: str, norm_params_path: str, output_dir: str,
+                   start_timestamp: Optional[datetime] = None, workers: Optional[int] = None,
+                   force: bool = False, chunk_sec: float = DEFAULT_CHUNK_SEC) -> Optional[Dict]:
+    """Klasyfikuje wiele plików .pkl w puli procesów i zapisuje wynik każdego pliku oraz indeks.
+    
+    Args:
+        patterns: Pliki lub wzorce glob
+        model_path: Ścieżka do modelu
+        norm_params_path: Ścieżka do parametrów normalizacji
+        output_dir: Katalog wyników (<nazwa>.json dla każdego wejścia + index.json)
+        start_timestamp: Opcjonalny timestamp początku nagrań
+        workers: Liczba procesów (domyślnie: liczba rdzeni, nie więcej niż plików)
+        force: Klasyfikuj ponownie także pliki z aktualnym wynikiem
+        chunk_sec: Długość kawałka nagrania (s) w przetwarzaniu blokowym
+    
+    Returns:
+        Dict indeksu wyników lub None, jeśli brakuje modelu lub plików wejściowych
+    """
+    model_full_path = resolve_path(model_path)
+    norm_full_path = resolve_path(norm_params_path)
+    for path, description in ((model_full_path, 'modelu'), (norm_full_path, 'parametrów normalizacji')):
+        if not path.exists():
+            print(f"Błąd: Nie znaleziono {description}: {path}")
+            return None
+    
+    inputs = expand_inputs(patterns)
+    missing = [path for path in inputs if not path.exists()]
+    for path in missing:
+        print(f"Ostrzeżenie: Plik {path} nie istnieje - pomijam")
+    inputs = [path for path in inputs if path.exists()]
+    if not inputs:
+        print("Błąd: Brak plików do klasyfikacji")
+        return None
+    
+    # Wynik każdego pliku: <nazwa>.json - nazwa nie zależy od zestawu wejść, więc wznawianie działa
+    # także przy innym wzorcu wejściowym
+    duplicates = sorted(stem for stem, count in Counter(path.stem for path in inputs).items() if count > 1)
+    if duplicates:
+        print(f"Błąd: Pliki o tych samych nazwach ({', '.join(duplicates)}) - użyj osobnych katalogów wyjściowych")
+        return None
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    outputs = {path: output_path / f"{path.stem}.json" for path in inputs}
+    
+    # Wznawianie: pliki z aktualnym wynikiem są pomijane (wynik nowszy od wejścia, modelu i normalizacji)
+    entries = {}
+    pending = []
+    for path in inputs:
+        if not force and is_output_current(outputs[path], [path, model_full_path, norm_full_path]):
+            with open(outputs[path], encoding='utf-8') as f:
+                summary = summarize_output(json.load(f))
+            entries[path] = {'status': 'skipped', **summary}
+        else:
+            pending.append(path)
+    
+    print(f"Pliki: {len(inputs)}, do klasyfikacji: {len(pending)}, aktualne: {len(inputs) - len(pending)}")
+    
+    if pending:
+        num_workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        threads = max(1, (os.cpu_count() or 1) // num_workers)
+        print(f"Pula: {num_workers} proc. x {threads} wątków")
+        
+        batch_start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(str(model_full_path), str(norm_full_path), threads)) as executor:
+            futures = {
+                executor.submit(_classify_batch_item, path, outputs[path], start_timestamp, chunk_sec): path
+                for path in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                path = futures[future]
+                try:
+                    entries[path] = {'status': 'classified', **future.result()}
+                    status = f"{entries[path]['num_segments']} segmentów, stres {entries[path]['stress_percentage']}%"
+                except Exception as e:
+                    entries[path] = {'status': 'failed', 'error': str(e)}
+                    status = f"BŁĄD: {e}"
+                elapsed = time.perf_counter() - batch_start
+                print(f"[{done}/{len(pending)}] {path.name}: {status} ({elapsed:.1f} s)")
+    
+    # Indeks obejmuje też wcześniejsze uruchomienia dla innych plików (istniejące wyniki i błędy)
+    files = {str(path): {'input': str(path), 'output': str(outputs[path]), **entries[path]} for path in inputs}
+    index_path = output_path / BATCH_INDEX_FILE
+    if index_path.exists():
+        with open(index_path, encoding='utf-8') as f:
+            previous = json.load(f).get('files', [])
+        for entry in previous:
+            if entry['input'] not in files and (entry['status'] == 'failed' or Path(entry['output']).exists()):
+                files[entry['input']] = entry
+    
+    index = {
+        'generated_at': datetime.now().isoformat(),
+        'model': str(model_full_path),
+        'normalization_params': str(norm_full_path),
+        'files': sorted(files.values(), key=lambda entry: entry['input']),
+    }
+    write_json_atomic(index_path, index)
+    
+    counts = Counter(entry['status'] for entry in entries.values())
+    print(f"\n✅ Sklasyfikowano: {counts['classified']}, pominięto (aktualne): {counts['skipped']}, "
+          f"błędy: {counts['failed']}")
+    print(f"Indeks wyników: {output_path / BATCH_INDEX_FILE}")
+    
+    return index
+
+
 def main():
     parser = argparse.ArgumentParser(description='Klasyfikacja poziomu stresu używając wytrenowanej sieci')
-    parser.add_argument('input_file', type=str, help='Ścieżka do pliku .pkl do klasyfikacji')
+    parser.add_argument('input_files', type=str, nargs='+',
+                       help='Ścieżka do pliku .pkl (lub katalogu cache Sx.wesad) do klasyfikacji; w trybie wsadowym wiele plików lub wzorców glob (np. "WESAD/S*/*.pkl")')
     parser.add_argument('--model', type=str, default='stress_classifier_multi_subject.pth',
                        help='Ścieżka do wytrenowanego modelu (domyślnie: stress_classifier_multi_subject.pth)')
     parser.add_argument('--norm', type=str, default='normalization_params.npz',
@@ -569,15 +736,18 @@ def main():
                        help='Timestamp początku nagrania w formacie ISO (np. 2024-01-01T10:00:00). Jeśli nie podano, używa aktualnego czasu.')
     parser.add_argument('--json-only', action='store_true',
                        help='Wyświetl tylko JSON (bez szczegółowego raportu tekstowego)')
+    parser.add_argument('--chunk-sec', type=float, default=DEFAULT_CHUNK_SEC,
+                       help=f'Długość kawałka nagrania w sekundach przy przetwarzaniu blokowym (domyślnie: {DEFAULT_CHUNK_SEC})')
+    parser.add_argument('--output-dir', type=str, default=None,
+                       help='Tryb wsadowy: katalog wyników (<nazwa>.json dla każdego pliku + index.json). '
+                            'Wymagany przy wielu plikach wejściowych.')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Tryb wsadowy: liczba procesów (domyślnie: liczba rdzeni)')
+    parser.add_argument('--force', action='store_true',
+                       help='Tryb wsadowy: klasyfikuj ponownie także pliki z aktualnym wynikiem')
     
     args = parser.parse_args()
     
-    # Sprawdzenie czy plik istnieje
-    input_path = Path(args.input_file)
-    if not input_path.exists():
-        print(f"Błąd: Plik {input_path} nie istnieje")
-        return
-    
     # Parsowanie timestampu
     start_timestamp = None
     if args.start_timestamp:
@@ -587,9 +757,32 @@ def main():
             print(f"Ostrzeżenie: Nieprawidłowy format timestampu: {args.start_timestamp}")
             print("Używam aktualnego czasu jako timestamp początkowy")
     
+    # Tryb wsadowy - wiele plików / wzorców glob
+    if args.output_dir or len(args.input_files) > 1 or glob.has_magic(args.input_files[0]):
+        if not args.output_dir:
+            parser.error('Tryb wsadowy (wiele plików lub wzorzec glob) wymaga --output-dir')
+        index = classify_batch(
+            args.input_files,
+            args.model,
+            args.norm,
+            args.output_dir,
+            start_timestamp=start_timestamp,
+            workers=args.workers,
+            force=args.force,
+            chunk_sec=args.chunk_sec
+        )
+        if index is None or any(entry['status'] == 'failed' for entry in index['files']):
+            sys.exit(1)
+        return
+    
+    # Sprawdzenie czy plik istnieje
+    input_path = Path(args.input_files[0])
+    if not input_path.exists():
+        print(f"Błąd: Plik {input_path} nie istnieje")
+        return
+    
     # Jeśli --json-only, nie wyświetlaj szczegółowego raportu
     if args.json_only:
-        import sys
         # Tymczasowo przekieruj stdout, aby ukryć szczegółowy output
         original_stdout = sys.stdout
         sys.stdout = open(os.devnull, 'w')
@@ -601,7 +794,8 @@ def main():
         args.norm,
         output_json=args.output_json,
         start_timestamp=start_timestamp,
-        return_json=args.json_only
+        return_json=args.json_only,
+        chunk_sec=args.chunk_sec
     )
     
     if args.json_only:
@@ -1,10 +1,11 @@
-import pickle
 import numpy as np
 import pandas as pd
 from scipy import signal
 from collections import Counter
 import os
 
+from wesad_cache import load_recording
+
 # --- KONFIGURACJA PRZETWARZANIA ---
 TARGET_RATE = 4    # Hz - Docelowa częstotliwość próbkowania (jak EDA i TEMP)
 WINDOW_SEC = 30    # Sekundy - Długość okna czasowego
@@ -78,11 +79,9 @@ def preprocess_single_file(file_path):
 
     # [cite_start]Krok 1: Ładowanie i ekstrakcja danych [cite: 57-62]
     try:
-        with open(file_path, 'rb') as file:
-            data = pickle.load(file, encoding='latin1')
-        
-        wrist_signals = data['signal']['wrist']
-        labels_700hz = data['label']
+        # Z aktualnym cache (wesad_cache.py) sygnały i etykiety są mapowane z plików .npy
+        wrist_signals = load_recording(file_path)
+        labels_700hz = wrist_signals['label']
         
         # Tworzenie DataFrame dla sygnałów z nadgarstka (E4)
         df_acc = pd.DataFrame(wrist_signals['ACC'], columns=['ACC_x', 'ACC_y', 'ACC_z'])
@@ -1,4 +1,3 @@
-import pickle
 import numpy as np
 import pandas as pd
 from scipy import signal
@@ -10,6 +9,8 @@ import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader, WeightedRandomSampler
 from pathlib import Path
 
+from wesad_cache import load_recording
+
 # --- KONFIGURACJA PRZETWARZANIA ---
 TARGET_RATE = 4    # Hz - Docelowa częstotliwość próbkowania
 WINDOW_SEC = 30    # Sekundy - Długość okna czasowego
@@ -83,11 +84,9 @@ def preprocess_single_file(file_path):
     print(f"--- PRZETWARZANIE: {subject_id} ---")
 
     try:
-        with open(file_path, 'rb') as file:
-            data = pickle.load(file, encoding='latin1')
-        
-        wrist_signals = data['signal']['wrist']
-        labels_700hz = data['label']
+        # Z aktualnym cache (wesad_cache.py) sygnały i etykiety są mapowane z plików .npy
+        wrist_signals = load_recording(file_path)
+        labels_700hz = wrist_signals['label']
         
         df_acc = pd.DataFrame(wrist_signals['ACC'], columns=['ACC_x', 'ACC_y', 'ACC_z'])
         df_bvp = pd.DataFrame(wrist_signals['BVP'], columns=['BVP'])
@@ -0,0 +1,177 @@
+"""
+Cache surowych nagrań WESAD w postaci plików .npy mapowanych z dysku.
+
+Plik Sx.pkl zawiera oprócz sygnałów z nadgarstka (E4) sygnały z klatki piersiowej
+(RespiBAN, 700 Hz), których klasyfikacja ani trening nie używają - każde `pickle.load`
+deserializuje i trzyma w pamięci cały plik. Jednorazowa konwersja zapisuje sygnały
+nadgarstka ACC/BVP/EDA/TEMP i etykiety w osobnych plikach .npy (katalog `Sx.wesad`
+obok pliku .pkl) wraz z manifestem JSON. `load_recording` odczytuje je przez
+`np.load(mmap_mode='r')` - dane są wczytywane z dysku dopiero przy dostępie
+(np. kawałek po kawałku w przetwarzaniu blokowym).
+
+Konwersja:
+    python wesad_cache.py data/S*.pkl
+"""
+import argparse
+import glob
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+# Wersja formatu katalogu cache - zmiana unieważnia istniejące katalogi
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = '.wesad'
+MANIFEST_FILE = 'manifest.json'
+
+# Sygnały z nadgarstka (Empatica E4) i ich częstotliwości próbkowania (Hz)
+WRIST_SAMPLING_RATES = {'ACC': 32, 'BVP': 64, 'EDA': 4, 'TEMP': 4}
+# Etykiety protokołu WESAD są próbkowane z częstotliwością RespiBAN
+LABEL_SAMPLING_RATE = 700
+
+
+def cache_dir_for(pkl_path, cache_root: Optional[str] = None) -> Path:
+    """Katalog cache dla pliku .pkl: obok pliku (`Sx.wesad`) lub w `cache_root`."""
+    pkl_path = Path(pkl_path)
+    parent = Path(cache_root) if cache_root else pkl_path.parent
+    return parent / f"{pkl_path.stem}{CACHE_SUFFIX}"
+
+
+def read_manifest(cache_dir) -> Optional[Dict]:
+    """Zwraca manifest katalogu cache lub None (brak katalogu, niepełna konwersja, inna wersja formatu)."""
+    manifest_path = Path(cache_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def is_cache_current(pkl_path, cache_root: Optional[str] = None) -> bool:
+    """Cache jest aktualny, jeśli manifest opisuje plik .pkl o tym samym rozmiarze i czasie modyfikacji."""
+    manifest = read_manifest(cache_dir_for(pkl_path, cache_root))
+    if manifest is None:
+        return False
+    stat = Path(pkl_path).stat()
+    return manifest['source']['size'] == stat.st_size and manifest['source']['mtime'] == stat.st_mtime
+
+
+def _load_pkl(pkl_path) -> Dict[str, Optional[np.ndarray]]:
+    """Wczytuje plik .pkl i zwraca tylko sygnały z nadgarstka i etykiety."""
+    with open(pkl_path, 'rb') as file:
+        data = pickle.load(file, encoding='latin1')
+    recording = {name: np.asarray(data['signal']['wrist'][name]) for name in WRIST_SAMPLING_RATES}
+    recording['label'] = np.asarray(data['label']) if data.get('label') is not None else None
+    return recording
+
+
+def convert_pkl(pkl_path, cache_root: Optional[str] = None, force: bool = False) -> Path:
+    """
+    Konwertuje plik .pkl do katalogu cache (pliki .npy + manifest) i zwraca ścieżkę katalogu.
+
+    Manifest jest zapisywany na końcu, więc przerwana konwersja nie zostawia katalogu
+    uznawanego za aktualny. Aktualny cache jest pomijany, chyba że `force=True`.
+    """
+    pkl_path = Path(pkl_path)
+    cache_dir = cache_dir_for(pkl_path, cache_root)
+    if not force and is_cache_current(pkl_path, cache_root):
+        return cache_dir
+
+    stat = pkl_path.stat()
+    recording = _load_pkl(pkl_path)
+
+    tmp_dir = cache_dir.with_name(cache_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    channels = {}
+    for name, array in recording.items():
+        if array is None:
+            continue
+        file_name = f"{name}.npy"
+        np.save(tmp_dir / file_name, np.ascontiguousarray(array), allow_pickle=False)
+        channels[name] = {
+            'file': file_name,
+            'shape': list(array.shape),
+            'dtype': array.dtype.str,
+            'sampling_rate': WRIST_SAMPLING_RATES.get(name, LABEL_SAMPLING_RATE),
+        }
+
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'subject': pkl_path.stem,
+        'source': {'path': str(pkl_path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime},
+        'created_at': datetime.now().isoformat(),
+        'channels': channels,
+    }
+    with open(tmp_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return cache_dir
+
+
+def load_cache(cache_dir) -> Dict[str, Optional[np.ndarray]]:
+    """Otwiera katalog cache - sygnały i etykiety jako tablice mapowane z dysku (tylko do odczytu)."""
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Brak aktualnego cache WESAD w {cache_dir}")
+    recording = {name: None for name in [*WRIST_SAMPLING_RATES, 'label']}
+    for name, channel in manifest['channels'].items():
+        recording[name] = np.load(Path(cache_dir) / channel['file'], mmap_mode='r', allow_pickle=False)
+    return recording
+
+
+def load_recording(path, cache_root: Optional[str] = None) -> Dict[str, Optional[np.ndarray]]:
+    """
+    Zwraca sygnały z nadgarstka (ACC, BVP, EDA, TEMP) i etykiety (`label`, None jeśli brak) nagrania WESAD.
+
+    `path` to plik .pkl lub katalog cache. Dla pliku .pkl z aktualnym cache dane są mapowane
+    z plików .npy; bez cache plik .pkl jest wczytywany jak dotychczas (`pickle.load`).
+    """
+    path = Path(path)
+    if path.is_dir():
+        return load_cache(path)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    if is_cache_current(path, cache_root):
+        return load_cache(cache_dir_for(path, cache_root))
+    return _load_pkl(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Konwersja plików WESAD .pkl do cache .npy mapowanego z dysku')
+    parser.add_argument('input_files', type=str, nargs='+',
+                        help='Pliki .pkl lub wzorce glob (np. "data/S*.pkl")')
+    parser.add_argument('--cache-root', type=str, default=None,
+                        help='Katalog na cache (domyślnie: obok pliku .pkl, katalog Sx.wesad)')
+    parser.add_argument('--force', action='store_true',
+                        help='Konwertuj ponownie także pliki z aktualnym cache')
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.input_files:
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+
+    for pkl_path in map(Path, paths):
+        if not pkl_path.is_file():
+            print(f"Ostrzeżenie: Plik {pkl_path} nie istnieje - pomijam")
+            continue
+        if not args.force and is_cache_current(pkl_path, args.cache_root):
+            print(f"{pkl_path.name}: cache aktualny")
+            continue
+        cache_dir = convert_pkl(pkl_path, args.cache_root, force=True)
+        size_mb = sum(f.stat().st_size for f in cache_dir.iterdir()) / 2 ** 20
+        print(f"{pkl_path.name}: {pkl_path.stat().st_size / 2 ** 20:.1f} MB -> {cache_dir} ({size_mb:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()